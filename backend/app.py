@@ -1,13 +1,26 @@
 import os
-from fastapi import FastAPI, HTTPException
+import json
+import time
+from contextlib import closing
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 from factories.embeddings_factory import get_embeddings
 from factories.llm_factory import get_llm
 from factories.vectorstore_factory import get_vectorstore
+from factories.chunker_factory import get_chunker
+from factories.reranker_factory import get_reranker
 from services.indexing_service import IndexingService
+from services.corpus_service import CorpusIndexer
 from services.rag_service import RAGService
+from services.answer_cache import SemanticAnswerCache
+from services.session_store import SessionStore
+from services.reranking import RerankStage
+from services.lexical_index import BM25Index
+from services.prompt_assembler import PromptAssembler
+from services import metrics
 
 load_dotenv()
 
@@ -17,48 +30,224 @@ app = FastAPI(title="RAG Tesis API")
 EMB = get_embeddings()
 LLM = get_llm()
 VS = get_vectorstore()
+CHUNKER = get_chunker()
+RERANKER = get_reranker()
 
-DATA_PDF = os.path.join("data", "paper.pdf")
+CORPUS_DIR = os.getenv("CORPUS_DIR", "data")
+INDEX_STATE_DIR = os.getenv("INDEX_STATE_DIR", os.path.join("data", "index_state"))
+CORPUS_POLL_SECONDS = float(os.getenv("CORPUS_POLL_SECONDS", "5"))
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "150"))
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "1"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "2"))
+
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+BM25_PATH = os.getenv("BM25_PATH", os.path.join("data", "bm25.json"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+BATCH_RETRIEVAL_SIZE = int(os.getenv("BATCH_RETRIEVAL_SIZE", "32"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+PROMPT_MAX_TOKENS = int(os.getenv("PROMPT_MAX_TOKENS", "3000"))
+PROMPT_DEDUP_THRESHOLD = float(os.getenv("PROMPT_DEDUP_THRESHOLD", "0.8"))
+SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "1000"))
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "12"))
+SESSION_REUSE_COVERAGE = float(os.getenv("SESSION_REUSE_COVERAGE", "0.8"))
+RERANK_FETCH = int(os.getenv("RERANK_FETCH", "4"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "20000"))
+OTEL_ENABLED = os.getenv("OTEL_ENABLED", "false").lower() == "true"
 
 # Services
-INDEX = IndexingService(VS, EMB, CHUNK_SIZE, CHUNK_OVERLAP)
-RAG_SERVICE = RAGService(VS, EMB, LLM)
+LEXICAL = BM25Index(BM25_PATH) if HYBRID_SEARCH else None
+INDEX = IndexingService(VS, EMB, CHUNK_SIZE, CHUNK_OVERLAP, embed_workers=EMBED_WORKERS,
+                        extract_workers=EXTRACT_WORKERS, lexical=LEXICAL, chunker=CHUNKER, state_dir=INDEX_STATE_DIR)
+CORPUS = CorpusIndexer(INDEX, CORPUS_DIR, poll_seconds=CORPUS_POLL_SECONDS)
+ANSWER_CACHE = SemanticAnswerCache(ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL, ANSWER_CACHE_SIZE) if ANSWER_CACHE_SIZE > 0 else None
+ASSEMBLER = PromptAssembler(PROMPT_MAX_TOKENS, PROMPT_DEDUP_THRESHOLD, max_overlap=CHUNK_OVERLAP)
+RERANK = RerankStage(RERANKER, RERANK_BATCH_SIZE, RERANK_BUDGET_MS, RERANK_CACHE_SIZE) if RERANKER is not None else None
+SESSIONS = SessionStore(SESSION_TTL, SESSION_MAX, SESSION_MAX_MESSAGES)
+RAG_SERVICE = RAGService(VS, EMB, LLM, answer_cache=ANSWER_CACHE, max_llm_concurrency=LLM_MAX_CONCURRENCY,
+                         lexical=LEXICAL, assembler=ASSEMBLER, sessions=SESSIONS, reuse_coverage=SESSION_REUSE_COVERAGE,
+                         reranker=RERANK, rerank_fetch=RERANK_FETCH)
+if ANSWER_CACHE is not None:
+    INDEX.add_listener(ANSWER_CACHE.clear)
+if RERANK is not None:
+    INDEX.add_listener(RERANK.clear)
+INDEX.add_listener(SESSIONS.clear_contexts)
 
 # Models
 class QueryRequest(BaseModel):
     question: str
     k: int = 4
+    source: Optional[str] = None
+    debug: bool = False
+    # Previous messages of the chat, oldest first: [{"role": "user" | "assistant", "content": str}].
+    history: Optional[List[Dict[str, str]]] = None
+    # Chat session kept by the backend; created on first use. Its turns take precedence over `history`.
+    session_id: Optional[str] = None
     
+class BatchQueryRequest(BaseModel):
+    questions: List[str]
+    k: int = 4
+    source: Optional[str] = None
+    debug: bool = False
+
 class QueryResponse(BaseModel):
     answer: str
     contexts: List[Dict[str, Any]]
+    cached: bool = False
+    reused: bool = False
+    session_id: Optional[str] = None
+    # Only with `debug`: {"timings_ms": {stage: milliseconds}}.
+    debug: Optional[Dict[str, Any]] = None
+
+# Middleware
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # The route template ("/query") rather than the raw path keeps the label set bounded.
+    # Streaming responses are timed until their headers are sent.
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method, path=path,
+                                         status=response.status_code)
+    return response
 
 # Routes
 @app.on_event("startup")
 def on_startup():
+    # Indexing runs in a background worker: the API serves queries while documents are ingested.
+    if OTEL_ENABLED:
+        metrics.enable_tracing()
     try:
-        count = INDEX.index_pdf(DATA_PDF, force=False)
-        print(f"[RAG] {count} fragments have been indexed from {DATA_PDF}")
+        CORPUS.start()
+        print(f"[RAG] watching {CORPUS_DIR} for PDF documents")
     except Exception as e:
-        print(f"[RAG] failed to index on startup: {e}")
+        print(f"[RAG] failed to start the corpus indexer: {e}")
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
+@app.get("/ready")
+def ready():
+    # Ready once the first corpus scan has been processed, or earlier if documents indexed by a
+    # previous run can already be queried. 503 lets orchestrators hold traffic until then.
+    is_ready = CORPUS.synced.is_set() or bool(CORPUS.documents)
+    body = {"ready": is_ready, "indexing": CORPUS.current, "progress": INDEX.progress}
+    return JSONResponse(body, status_code=200 if is_ready else 503)
+
+@app.get("/stats")
+def stats():
+    out = {}
+    if ANSWER_CACHE is not None:
+        out["answer_cache"] = ANSWER_CACHE.stats()
+    # Like /metrics: reading the stats must not build a provider that was never used.
+    if getattr(EMB, "initialized", True) and hasattr(EMB, "stats"):
+        out["embedding_cache"] = EMB.stats()
+    out["coalescing"] = RAG_SERVICE.inflight.stats()
+    out["sessions"] = SESSIONS.stats()
+    docstore = getattr(VS, "docstore", None) if getattr(VS, "initialized", True) else None
+    if docstore is not None:
+        out["docstore"] = docstore.stats()
+    if RERANK is not None:
+        out["rerank"] = RERANK.stats()
+    return out
+
+@app.get("/metrics")
+def prometheus_metrics() -> PlainTextResponse:
+    # Cache counters are sampled at scrape time; providers that were never used are not built for it.
+    if ANSWER_CACHE is not None:
+        for stat, value in ANSWER_CACHE.stats().items():
+            if value is not None:
+                metrics.CACHE_STATS.set(value, cache="answer", stat=stat)
+    if getattr(EMB, "initialized", True) and hasattr(EMB, "stats"):
+        for stat, value in EMB.stats().items():
+            if value is not None:
+                metrics.CACHE_STATS.set(value, cache="embedding", stat=stat)
+    for stat, value in RAG_SERVICE.inflight.stats().items():
+        metrics.CACHE_STATS.set(value, cache="coalescing", stat=stat)
+    for stat, value in SESSIONS.stats().items():
+        metrics.CACHE_STATS.set(value, cache="sessions", stat=stat)
+    if RERANK is not None:
+        for stat, value in RERANK.stats().items():
+            if value is not None:
+                metrics.CACHE_STATS.set(value, cache="rerank", stat=stat)
+    docstore = getattr(VS, "docstore", None) if getattr(VS, "initialized", True) else None
+    if docstore is not None:
+        for stat, value in docstore.stats().items():
+            if value is not None:
+                metrics.CACHE_STATS.set(value, cache="docstore", stat=stat)
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/documents")
+def documents():
+    return CORPUS.status()
+
 @app.post("/reindex")
-def reindex():
+def reindex(incremental: bool = False):
+    # A full rebuild goes into a new version of the collection, swapped in when complete:
+    # queries keep using the current one meanwhile. `incremental` only re-indexes changed files.
     try:
-        count = INDEX.index_pdf(DATA_PDF)
-        return {"indexed_chunks": count}
+        if incremental:
+            return {"scheduled": CORPUS.scan(full=True)}
+        return {"scheduled": CORPUS.rebuild()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str):
+    if not SESSIONS.delete(session_id):
+        raise HTTPException(status_code=404, detail="session not found")
+    return {"deleted": session_id}
+
 @app.post("/query", response_model=QueryResponse)
-def query(req: QueryRequest) -> QueryResponse:
+async def query(req: QueryRequest) -> QueryResponse:
     if not req.question.strip():
         raise HTTPException(status_code=400, detail="question is empty")
-    out = RAG_SERVICE.query(req.question, k=req.k)
-    return QueryResponse(**out)
+    out = await RAG_SERVICE.aquery(req.question, k=req.k, source=req.source, history=req.history,
+                                  session_id=req.session_id)
+    debug = {"timings_ms": out["timings"]} if req.debug else None
+    return QueryResponse(answer=out["answer"], contexts=out["contexts"], cached=out["cached"], reused=out["reused"],
+                         session_id=out.get("session_id"), debug=debug)
+
+@app.post("/query/stream")
+def query_stream(req: QueryRequest) -> StreamingResponse:
+    if not req.question.strip():
+        raise HTTPException(status_code=400, detail="question is empty")
+
+    # Server-Sent Events: one `event:`/`data:` pair per RAG event.
+    def events():
+        try:
+            for event in RAG_SERVICE.query_stream(req.question, k=req.k, source=req.source, history=req.history,
+                                                  session_id=req.session_id):
+                if not req.debug:
+                    event.pop("timings", None)
+                yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/query/batch")
+def query_batch(req: BatchQueryRequest) -> StreamingResponse:
+    if not req.questions or any(not q.strip() for q in req.questions):
+        raise HTTPException(status_code=400, detail="questions must be non-empty")
+
+    # Newline-delimited JSON: one line per question, in completion order.
+    def lines():
+        results = RAG_SERVICE.query_batch(req.questions, k=req.k, max_concurrency=BATCH_LLM_CONCURRENCY,
+                                          source=req.source, retrieval_batch=BATCH_RETRIEVAL_SIZE)
+        # Closed explicitly when the client disconnects, so pending generations are cancelled.
+        with closing(results):
+            for result in results:
+                if not req.debug:
+                    result.pop("timings", None)
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,106 @@
+"""Chunk count and retrieval hit-rate of every chunking strategy.
+
+A synthetic thesis with numbered sections and paragraphs that flow across pages is
+written to a PDF. Some long sentences state a "fact" ("En el experimento E17 el
+dispositivo D4821 obtuvo un valor de 0.8342 ..."); a question hits when one of the
+top-k retrieved chunks contains its fact sentence complete, i.e. the answer was not
+cut by a chunk boundary. Everything runs in-process with the fake providers.
+
+Run from the `backend/` directory:
+
+    python -m benchmarks.bench_chunking --pages 120 --facts 150
+"""
+import io
+import os
+import random
+import argparse
+import tempfile
+import textwrap
+import contextlib
+from typing import List, Tuple
+from benchmarks.fakes import HashEmbeddings, MemoryStore
+from benchmarks.synthetic_pdf import WORDS, make_pdf
+from core.chunker import Chunker
+from infra.chunkers.sliding_window import SlidingWindowChunker
+from infra.chunkers.structure import StructureChunker
+from services.indexing_service import IndexingService
+
+def make_document(pages: int, n_facts: int, lines_per_page: int = 60, seed: int = 0) -> Tuple[List[List[str]], List[Tuple[str, str]]]:
+    """Lines of every page and the (question, fact sentence) pairs."""
+    rng = random.Random(seed)
+    facts = []
+    for i in range(n_facts):
+        # Two tokens unique to the fact make the question answerable by bag-of-words retrieval;
+        # the filler makes the sentence longer than the sliding-window overlap.
+        device = f"D{rng.randint(1000, 9999)}"
+        filler = " ".join(rng.choice(WORDS) for _ in range(25))
+        fact = (f"En el experimento E{i} el dispositivo {device} obtuvo un valor de {rng.randint(1000, 9999) / 10000} "
+                f"para {filler} según la tabla.")
+        facts.append((f"E{i} {device}", fact))
+    fact_queue = [fact for _, fact in facts]
+
+    lines: List[str] = []
+    section = 0
+    while len(lines) < pages * lines_per_page:
+        section += 1
+        lines.append(f"{section}. {rng.choice(WORDS).capitalize()} y {rng.choice(WORDS)}")
+        for _ in range(rng.randint(2, 5)):
+            sentences = []
+            for _ in range(rng.randint(3, 8)):
+                if fact_queue and rng.random() < 0.25:
+                    sentences.append(fact_queue.pop())
+                else:
+                    sentences.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + ".")
+            lines.extend(textwrap.wrap(" ".join(sentences), width=95))
+    # Facts that did not fit are dropped together with their questions.
+    kept = [pair for pair in facts if pair[1] not in fact_queue]
+    page_texts = [lines[i:i + lines_per_page] for i in range(0, pages * lines_per_page, lines_per_page)]
+    return page_texts, kept
+
+def evaluate(name: str, chunker: Chunker, pdf_path: str, questions: List[Tuple[str, str]], ks: List[int]) -> str:
+    """Index the PDF with `chunker` and return its row of the report."""
+    emb, vs = HashEmbeddings(dim=4096), MemoryStore()
+    service = IndexingService(vs, emb, chunker=chunker)
+    with contextlib.redirect_stdout(io.StringIO()):
+        n_chunks = service.index_pdf(pdf_path, force=True)
+    chars = [len(text) for text, _, _ in vs._points.values()]
+
+    hits = {k: 0 for k in ks}
+    context_chars = 0
+    for question, fact in questions:
+        res = vs.query(emb.embed([question])[0], k=max(ks))
+        # Line wrapping and page breaks turn some spaces into newlines: compare whitespace-insensitively.
+        docs = [" ".join(doc.split()) for doc in res["documents"]]
+        for k in ks:
+            hits[k] += any(fact in doc for doc in docs[:k])
+        context_chars += sum(len(doc) for doc in docs[:min(ks)])
+
+    hit_rates = " ".join(f"{hits[k] / len(questions):>7.3f}" for k in ks)
+    return f"{name:>22} {n_chunks:>7} {sum(chars) / len(chars):>9.0f} {hit_rates} {context_chars / len(questions) / 4:>12.0f}"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=120)
+    parser.add_argument("--facts", type=int, default=150)
+    args = parser.parse_args()
+    ks = [1, 2, 4]
+
+    strategies = [
+        ("sliding 1000/150", SlidingWindowChunker(1000, 150)),
+        ("sliding 500/75", SlidingWindowChunker(500, 75)),
+        ("structure 256 tok", StructureChunker(max_tokens=256)),
+        ("structure 128 tok", StructureChunker(max_tokens=128, min_tokens=32)),
+    ]
+    page_texts, questions = make_document(args.pages, args.facts)
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_pdf(os.path.join(tmp, "synthetic.pdf"), page_texts=page_texts)
+        rows = [evaluate(name, chunker, pdf_path, questions, ks) for name, chunker in strategies]
+
+    print(f"pages: {args.pages}, questions: {len(questions)}")
+    header = " ".join(f"{f'hit@{k}':>7}" for k in ks)
+    print(f"{'strategy':>22} {'chunks':>7} {'avg chars':>9} {header} {f'tokens@{min(ks)}':>12}")
+    for row in rows:
+        print(row)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Compare serial and multi-process PDF text extraction (pages/sec).
+
+Run from the `backend/` directory:
+
+    python -m benchmarks.bench_extraction --pages 400 --workers 4
+"""
+import os
+import time
+import argparse
+import tempfile
+from benchmarks.synthetic_pdf import make_pdf
+from services.indexing_service import IndexingService
+
+def measure(pdf_path: str, workers: int) -> float:
+    """Extract every page of `pdf_path` and return the throughput in pages/sec."""
+    service = IndexingService(vs=None, emb=None, extract_workers=workers)
+    start = time.perf_counter()
+    pages = sum(1 for _ in service._iter_pdf_pages(pdf_path))
+    return pages / (time.perf_counter() - start)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_pdf(os.path.join(tmp, "synthetic.pdf"), pages=args.pages)
+        serial = measure(pdf_path, 1)
+        parallel = measure(pdf_path, args.workers)
+
+    print(f"pages: {args.pages}")
+    print(f"serial:              {serial:8.1f} pages/s")
+    print(f"parallel ({args.workers} procs): {parallel:8.1f} pages/s  (x{parallel / serial:.2f})")
+
+if __name__ == "__main__":
+    main()
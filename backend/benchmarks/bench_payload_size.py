@@ -0,0 +1,103 @@
+"""Collection size and search-response bytes of QdrantStore with texts in the payload vs in a DocStore.
+
+The chunks of a synthetic PDF are indexed twice, once per mode, and the same
+questions are searched in both. Reports the on-disk size of the collection and of
+the docstore, the bytes of the search responses and the search latency (including
+the docstore reads).
+
+With `QDRANT_URL` the collections go to that server and response bytes are those
+of the HTTP search responses; the collection size is not available from the client.
+Otherwise an embedded Qdrant in a temporary directory is used and response bytes
+are those of the hits serialized to JSON.
+
+Run from the `backend/` directory:
+
+    python -m benchmarks.bench_payload_size --pages 200
+    QDRANT_URL=http://localhost:6333 python -m benchmarks.bench_payload_size
+"""
+import io
+import os
+import time
+import json
+import argparse
+import tempfile
+import contextlib
+import statistics
+from typing import Dict, List, Optional
+import httpx
+from benchmarks.fakes import HashEmbeddings
+from benchmarks.suite import questions
+from benchmarks.synthetic_pdf import make_pdf
+from infra.vectorstores.docstore import DocStore
+from infra.vectorstores.qdrant import QdrantStore
+from services.indexing_service import IndexingService
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+def response_bytes(store: QdrantStore, q_emb: List[float], k: int) -> int:
+    """Bytes of the search response for one query, as sent by the server (or serialized, when embedded)."""
+    url = os.getenv("QDRANT_URL")
+    if url:
+        body = {"vector": q_emb, "limit": k, "with_payload": True, "with_vector": False}
+        return len(httpx.post(f"{url}/collections/{store.collection_name}/points/search", json=body).content)
+    hits = store.client.search(collection_name=store.collection_name, query_vector=q_emb, limit=k, with_payload=True)
+    return len(json.dumps([hit.model_dump(mode="json") for hit in hits]).encode("utf-8"))
+
+def measure(name: str, pdf_path: str, tmp: str, docstore: Optional[DocStore], args: argparse.Namespace) -> Dict[str, float]:
+    emb = HashEmbeddings(dim=args.dim)
+    store = QdrantStore(collection_name=f"bench_payload_{name}", vector_size=args.dim, docstore=docstore)
+    store.reset()
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunks = IndexingService(store, emb, state_dir=os.path.join(tmp, f"state_{name}")).index_pdf(pdf_path, force=True)
+    # A waited request is applied after the unwaited upserts.
+    store.client.count(collection_name=store.collection_name, exact=True)
+    if docstore is not None:
+        docstore.flush()
+
+    embeddings = emb.embed(questions(args.queries))
+    sizes, latencies = [], []
+    for q_emb in embeddings:
+        sizes.append(response_bytes(store, q_emb, args.k))
+        start = time.perf_counter()
+        store.query(q_emb, k=args.k)
+        latencies.append(time.perf_counter() - start)
+
+    out = {"chunks": chunks, "response_bytes": statistics.mean(sizes), "query_ms": statistics.median(latencies) * 1000}
+    if not os.getenv("QDRANT_URL"):
+        out["collection_bytes"] = dir_size(os.path.join(os.environ["QDRANT_PATH"], "collection"))
+    if docstore is not None:
+        out["docstore_bytes"] = dir_size(docstore.path)
+    store.client.close()
+    return out
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_pdf(os.path.join(tmp, "synthetic.pdf"), pages=args.pages, seed=args.seed)
+        results = {}
+        for name in ("payload", "docstore"):
+            if not os.getenv("QDRANT_URL"):
+                # One embedded instance per mode, so each directory only holds one collection.
+                os.environ["QDRANT_PATH"] = os.path.join(tmp, f"qdrant_{name}")
+            docstore = DocStore(os.path.join(tmp, "docstore")) if name == "docstore" else None
+            results[name] = measure(name, pdf_path, tmp, docstore, args)
+
+    before, after = results["payload"], results["docstore"]
+    print(f"{'':<22}{'payload':>14}{'docstore':>14}{'change':>10}")
+    for metric in ("chunks", "collection_bytes", "docstore_bytes", "response_bytes", "query_ms"):
+        a, b = before.get(metric), after.get(metric)
+        if a is None and b is None:
+            continue
+        change = f"{(b - a) / a:+.1%}" if a and b is not None else ""
+        print(f"{metric:<22}{'-' if a is None else f'{a:,.1f}':>14}{'-' if b is None else f'{b:,.1f}':>14}{change:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Recall@k vs latency of QdrantStore with and without quantization.
+
+Needs a running Qdrant (e.g. `docker-compose up qdrant`). Random clustered vectors
+are indexed into temporary collections (scalar, binary and no quantization) and the
+results of every search setting are compared with exact NumPy search.
+
+Run from the `backend/` directory:
+
+    QDRANT_URL=http://localhost:6333 python -m benchmarks.bench_qdrant_quantization --n 20000
+"""
+import time
+import uuid
+import argparse
+import statistics
+from typing import List, Optional
+import numpy as np
+from qdrant_client import models
+from infra.vectorstores.qdrant import QdrantStore
+
+def make_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors drawn around a few hundred centroids, closer to real embeddings than pure noise."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.normal(size=(max(1, n // 100), dim))
+    data = centroids[rng.integers(0, len(centroids), n)] + 0.5 * rng.normal(size=(n, dim))
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data.astype(np.float32)
+
+def wait_until_indexed(store: QdrantStore, n: int) -> None:
+    while True:
+        info = store.client.get_collection(store.collection_name)
+        if info.points_count == n and info.status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(0.5)
+
+def build(name: str, quantization: Optional[str], data: np.ndarray) -> QdrantStore:
+    store = QdrantStore(collection_name=f"bench_quant_{name}", vector_size=data.shape[1], quantization=quantization)
+    store.reset()
+    for i in range(0, len(data), 256):
+        rows = range(i, min(i + 256, len(data)))
+        store.add_texts(
+            texts=[""] * len(rows), metadatas=[{} for _ in rows],
+            embeddings=data[i:i + len(rows)].tolist(), ids=[str(uuid.UUID(int=r)) for r in rows],
+        )
+    wait_until_indexed(store, len(data))
+    return store
+
+def evaluate(store: QdrantStore, queries: np.ndarray, truth: List[set], k: int):
+    latencies, recalls = [], []
+    for q, expected in zip(queries, truth):
+        start = time.perf_counter()
+        res = store.query(q.tolist(), k=k)
+        latencies.append(time.perf_counter() - start)
+        got = {uuid.UUID(pid).int for pid in res["ids"]}
+        recalls.append(len(got & expected) / k)
+    return statistics.mean(recalls), statistics.median(latencies) * 1000, np.percentile(latencies, 95) * 1000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    data = make_vectors(args.n, args.dim)
+    queries = make_vectors(args.queries, args.dim, seed=1)
+    exact = np.argsort(-(queries @ data.T), axis=1)[:, :args.k]
+    truth = [set(row.tolist()) for row in exact]
+
+    print(f"{'quantization':>12} {'ef':>5} {'oversample':>10} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, quantization in (("none", None), ("scalar", "scalar"), ("binary", "binary")):
+        store = build(name, quantization, data)
+        for ef in (32, 128):
+            for oversampling in ((1.0,) if quantization is None else (1.0, 2.0, 4.0)):
+                store.hnsw_ef, store.oversampling = ef, oversampling
+                recall, p50, p95 = evaluate(store, queries, truth, args.k)
+                print(f"{name:>12} {ef:>5} {oversampling:>10} {recall:>9.3f} {p50:>8.2f} {p95:>8.2f}")
+        store.client.delete_collection(store.collection_name)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Deterministic in-process providers for benchmarks.
+
+They implement the interfaces of `core/` without any network access, with
+configurable simulated latency, so the services and the API can be measured
+in isolation and reproducibly.
+"""
+import time
+import uuid
+import asyncio
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+import numpy as np
+from core.embeddings import Embeddings
+from core.llm import LLM
+from core.vectorstore import VectorStore
+
+class HashEmbeddings(Embeddings):
+    model_name = "hash-embeddings"
+
+    def __init__(self, dim: int = 256, latency: float = 0.0):
+        """Bag-of-words embeddings built by hashing every token into one of `dim` buckets.
+
+        Texts sharing words get similar vectors, so retrieval quality is meaningful.
+
+        Args:
+            dim (int, optional): Vector size. Defaults to 256.
+            latency (float, optional): Simulated seconds per call. Defaults to 0.0.
+        """
+        self.dim = dim
+        self.latency = latency
+        self.calls = 0
+        self.texts = 0
+
+    def _vector(self, text: str) -> List[float]:
+        v = np.zeros(self.dim, dtype=np.float32)
+        for token in text.lower().split():
+            h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            v[h % self.dim] += 1.0
+        norm = np.linalg.norm(v)
+        return (v / norm if norm > 0 else v).tolist()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts += len(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts += len(texts)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+class EchoLLM(LLM):
+    def __init__(self, latency: float = 0.0, tokens: int = 20):
+        """LLM that answers with a fixed text after a simulated delay.
+
+        Args:
+            latency (float, optional): Simulated seconds per generation. Defaults to 0.0.
+            tokens (int, optional): Number of fragments yielded by `generate_stream`. Defaults to 20.
+        """
+        self.latency = latency
+        self.tokens = tokens
+        self.calls = 0
+
+    def _answer(self, prompt: str) -> str:
+        return "respuesta " + hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(prompt)
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._answer(prompt)
+
+    def generate_stream(self, prompt: str, **kwargs):
+        self.calls += 1
+        for i in range(self.tokens):
+            if self.latency:
+                time.sleep(self.latency / self.tokens)
+            yield f"tok{i} "
+
+class MemoryStore(VectorStore):
+    def __init__(self, latency: float = 0.0):
+        """Brute-force in-memory vector store.
+
+        Args:
+            latency (float, optional): Simulated seconds per search. Defaults to 0.0.
+        """
+        self.latency = latency
+        self._lock = threading.Lock()
+        self.reset()
+
+    def add_texts(self, texts: List[str], metadatas: List[Dict[str, Any]], embeddings: List[List[float]],
+                  ids: Optional[List[str]] = None) -> List[str]:
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        with self._lock:
+            for pid, text, meta, vec in zip(ids, texts, metadatas, embeddings):
+                self._points[pid] = (text, dict(meta), np.asarray(vec, dtype=np.float32))
+        return ids
+
+    def query(self, query_embedding: List[float], k: int = 4, source: Optional[str] = None) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._search(query_embedding, k, source)
+
+    async def aquery(self, query_embedding: List[float], k: int = 4, source: Optional[str] = None) -> Dict[str, Any]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._search(query_embedding, k, source)
+
+    def _search(self, query_embedding: List[float], k: int, source: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            items = [item for item in self._points.items() if source is None or item[1][1].get("source") == source]
+        if not items:
+            return {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        matrix = np.stack([p[2] for _, p in items])
+        q = np.asarray(query_embedding, dtype=np.float32)
+        scores = matrix @ q / ((np.linalg.norm(matrix, axis=1) * (np.linalg.norm(q) or 1.0)) + 1e-12)
+        top = np.argsort(-scores)[:k]
+        return {
+            "ids": [items[i][0] for i in top],
+            "documents": [items[i][1][0] for i in top],
+            "metadatas": [dict(items[i][1][1]) for i in top],
+            "distances": [float(scores[i]) for i in top],
+        }
+
+    def get_texts(self, ids: List[str]) -> List[Optional[str]]:
+        with self._lock:
+            return [self._points[pid][0] if pid in self._points else None for pid in ids]
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            for pid in ids:
+                self._points.pop(pid, None)
+
+    def delete_source(self, source: str) -> None:
+        with self._lock:
+            for pid in [pid for pid, (_, meta, _) in self._points.items() if meta.get("source") == source]:
+                del self._points[pid]
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for pid, meta in zip(ids, metadatas):
+                if pid in self._points:
+                    text, _, vec = self._points[pid]
+                    self._points[pid] = (text, dict(meta), vec)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._points: Dict[str, Any] = {}
@@ -0,0 +1,110 @@
+"""Load test of the sync vs async /query request path against stub providers.
+
+Both apps mirror the routes of `app.py`: the "sync" one with the previous `def`
+handlers calling `RAGService.query` (Starlette threadpool), the "async" one with
+`async def` handlers awaiting `RAGService.aquery`. Providers are the in-process
+fakes with simulated network latency. While the load runs, `/health` is polled
+to show whether slow queries starve it.
+
+Run from the `backend/` directory:
+
+    python -m benchmarks.load_test --users 64 --requests 10
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Dict, List
+import httpx
+from fastapi import FastAPI
+from pydantic import BaseModel
+from benchmarks.fakes import EchoLLM, HashEmbeddings, MemoryStore
+from services.rag_service import RAGService
+
+class QueryRequest(BaseModel):
+    question: str
+    k: int = 4
+
+def build_app(rag: RAGService, mode: str) -> FastAPI:
+    app = FastAPI()
+    if mode == "sync":
+        @app.get("/health")
+        def health():
+            return {"status": "ok"}
+
+        @app.post("/query")
+        def query(req: QueryRequest):
+            return rag.query(req.question, k=req.k)
+    else:
+        @app.get("/health")
+        async def health():
+            return {"status": "ok"}
+
+        @app.post("/query")
+        async def query(req: QueryRequest):
+            return await rag.aquery(req.question, k=req.k)
+    return app
+
+def build_rag(args: argparse.Namespace) -> RAGService:
+    emb = HashEmbeddings(latency=args.embed_latency)
+    vs = MemoryStore(latency=args.search_latency)
+    texts = [f"fragmento {i} sobre segmentación de aneurismas tema {i % 37}" for i in range(500)]
+    vs.add_texts(texts, [{"source": "bench", "page": i, "chunk": 0} for i in range(len(texts))], emb.embed(texts))
+    return RAGService(vs, emb, EchoLLM(latency=args.llm_latency), max_llm_concurrency=args.users)
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+async def run(app: FastAPI, args: argparse.Namespace) -> Dict[str, float]:
+    latencies: List[float] = []
+    health: List[float] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        done = asyncio.Event()
+
+        async def user(u: int) -> None:
+            for r in range(args.requests):
+                start = time.perf_counter()
+                resp = await client.post("/query", json={"question": f"pregunta {u} {r} tema {r % 37}"})
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        async def probe() -> None:
+            while not done.is_set():
+                start = time.perf_counter()
+                (await client.get("/health")).raise_for_status()
+                health.append(time.perf_counter() - start)
+                await asyncio.sleep(0.05)
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(user(u) for u in range(args.users)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+
+    return {
+        "qps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "health_p95_ms": percentile(health, 95) * 1000 if health else float("nan"),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=10, help="requests per user")
+    parser.add_argument("--embed-latency", type=float, default=0.03)
+    parser.add_argument("--search-latency", type=float, default=0.01)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(f"{args.users} concurrent users x {args.requests} requests")
+    for mode in ("sync", "async"):
+        result = asyncio.run(run(build_app(build_rag(args), mode), args))
+        print(f"{mode:>5}: {result['qps']:7.1f} QPS  p50 {result['p50_ms']:7.1f} ms  "
+              f"p95 {result['p95_ms']:7.1f} ms  /health p95 {result['health_p95_ms']:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Offline benchmark suite: indexing, RAG queries and the API, against a stored baseline.
+
+Every scenario runs on the deterministic fakes of `benchmarks.fakes` and a
+synthetic PDF, so results only depend on this code and the machine:
+
+    indexing   IndexingService.index_pdf on a fresh store (chunks/s)
+    rag        RAGService.query, one question at a time (QPS, p50/p95/p99)
+    rag_async  RAGService.aquery, `--users` concurrent questions
+    app        POST /query on the FastAPI app of `app.py`, `--users` concurrent clients
+
+Every scenario runs `--repeat` times and the best run is kept. The metrics are
+compared with `--baseline` (`benchmarks/baseline.json`): a throughput lower, or
+a latency higher, than the baseline by more than `--tolerance` plus the spread
+seen between the repeats (of the baseline and of this run) is reported as a
+regression and the exit status is 1. Noisy metrics thus need a larger change to
+be flagged than stable ones.
+
+Baselines are machine-specific: the baseline stores a fingerprint of the machine
+(CPU, cores, Python) and the settings, and if either differs the results are only
+printed, not compared. The first step on a new machine is to store a baseline:
+
+    python -m benchmarks.suite --save-baseline
+    python -m benchmarks.suite
+
+Run from the `backend/` directory.
+"""
+import io
+import os
+import sys
+import json
+import time
+import platform
+import asyncio
+import argparse
+import tempfile
+import contextlib
+import statistics
+from typing import Callable, Dict, List, Tuple
+import httpx
+from benchmarks.fakes import EchoLLM, HashEmbeddings, MemoryStore
+from benchmarks.load_test import percentile
+from benchmarks.synthetic_pdf import make_pdf
+from services.indexing_service import IndexingService
+from services.rag_service import RAGService
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def questions(n: int) -> List[str]:
+    """`n` distinct, deterministic questions over the vocabulary of the synthetic PDF."""
+    topics = ["aneurisma", "segmentación", "stent", "coil", "dataset", "métrica dice", "unet", "flujo sanguíneo"]
+    return [f"pregunta {i} sobre {topics[i % len(topics)]} y {topics[(i * 3) % len(topics)]}" for i in range(n)]
+
+def latency_stats(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    return {
+        "qps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+def bench_indexing(pdf_path: str, args: argparse.Namespace) -> Dict[str, float]:
+    service = IndexingService(MemoryStore(), HashEmbeddings(latency=args.embed_latency))
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        chunks = service.index_pdf(pdf_path, force=True)
+        elapsed = time.perf_counter() - start
+    return {"chunks": chunks, "chunks_per_s": chunks / elapsed}
+
+def build_rag(pdf_path: str, args: argparse.Namespace) -> RAGService:
+    """A RAG service over the synthetic PDF, without answer cache so every query runs every stage."""
+    emb = HashEmbeddings(latency=args.embed_latency)
+    vs = MemoryStore(latency=args.search_latency)
+    with contextlib.redirect_stdout(io.StringIO()):
+        IndexingService(vs, HashEmbeddings()).index_pdf(pdf_path, force=True)
+    return RAGService(vs, emb, EchoLLM(latency=args.llm_latency), max_llm_concurrency=args.users)
+
+def bench_rag(rag: RAGService, args: argparse.Namespace) -> Dict[str, float]:
+    latencies = []
+    start = time.perf_counter()
+    for question in questions(args.queries):
+        t = time.perf_counter()
+        rag.query(question, k=4)
+        latencies.append(time.perf_counter() - t)
+    return latency_stats(latencies, time.perf_counter() - start)
+
+async def _concurrent(call: Callable[[str], "asyncio.Future"], args: argparse.Namespace) -> Dict[str, float]:
+    latencies: List[float] = []
+    pending = iter(questions(args.queries))
+
+    async def user() -> None:
+        for question in pending:
+            t = time.perf_counter()
+            await call(question)
+            latencies.append(time.perf_counter() - t)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(args.users)))
+    return latency_stats(latencies, time.perf_counter() - start)
+
+def bench_rag_async(rag: RAGService, args: argparse.Namespace) -> Dict[str, float]:
+    return asyncio.run(_concurrent(lambda q: rag.aquery(q, k=4), args))
+
+def bench_app(pdf_path: str, tmp: str, args: argparse.Namespace) -> Dict[str, float]:
+    """Import `app.py` with the fakes in place of the configured providers and load it over ASGI."""
+    import factories.embeddings_factory as embeddings_factory
+    import factories.llm_factory as llm_factory
+    import factories.vectorstore_factory as vectorstore_factory
+    embeddings_factory.get_embeddings = lambda: HashEmbeddings(latency=args.embed_latency)
+    llm_factory.get_llm = lambda: EchoLLM(latency=args.llm_latency)
+    vectorstore_factory.get_vectorstore = lambda: MemoryStore(latency=args.search_latency)
+    os.environ.update({
+        "CORPUS_DIR": os.path.join(tmp, "corpus"),
+        "INDEX_STATE_DIR": os.path.join(tmp, "index_state"),
+        "BM25_PATH": os.path.join(tmp, "bm25.json"),
+        "ANSWER_CACHE_SIZE": "0",
+        "LLM_MAX_CONCURRENCY": str(args.users),
+    })
+    import app
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.INDEX.index_pdf(pdf_path, force=True)
+
+    async def run() -> Dict[str, float]:
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            async def call(question: str) -> None:
+                (await client.post("/query", json={"question": question, "k": 4})).raise_for_status()
+            return await _concurrent(call, args)
+
+    return asyncio.run(run())
+
+def machine_fingerprint() -> Dict[str, object]:
+    """What a baseline depends on besides the code and the settings."""
+    cpu = platform.processor()
+    if os.path.exists("/proc/cpuinfo"):
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    return {"system": platform.system(), "machine": platform.machine(), "cpu": cpu, "cpus": os.cpu_count(),
+            "python": platform.python_version()}
+
+def run_suite(args: argparse.Namespace) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Best value of every metric over `--repeat` runs, and its spread: |median - best| / best."""
+    results: Dict[str, float] = {}
+    spread: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_pdf(os.path.join(tmp, "synthetic.pdf"), pages=args.pages, seed=args.seed)
+        scenarios = [
+            ("indexing", lambda: bench_indexing(pdf_path, args)),
+            ("rag", lambda: bench_rag(build_rag(pdf_path, args), args)),
+            ("rag_async", lambda: bench_rag_async(build_rag(pdf_path, args), args)),
+            ("app", lambda: bench_app(pdf_path, tmp, args)),
+        ]
+        for name, scenario in scenarios:
+            if args.only and name not in args.only:
+                continue
+            # Best of `--repeat` runs: the least disturbed by the rest of the machine.
+            runs = [scenario() for _ in range(args.repeat)]
+            for metric in runs[0]:
+                values = [r[metric] for r in runs]
+                best = max(values) if higher_is_better(metric) else min(values)
+                results[f"{name}.{metric}"] = round(best, 3)
+                # The median, not the worst run: a single disturbed run should not widen the margin.
+                spread[f"{name}.{metric}"] = round(abs(statistics.median(values) - best) / best, 3) if best else 0.0
+    return results, spread
+
+def higher_is_better(metric: str) -> bool:
+    return not metric.endswith("_ms")
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float,
+            spread: Dict[str, float], baseline_spread: Dict[str, float]) -> List[str]:
+    """Lines of the comparison table, the regressions flagged with "REGRESSION".
+
+    A change is a regression when it is worse than `tolerance` plus the spread of the metric
+    in this run and in the baseline run.
+    """
+    lines = []
+    for metric, value in results.items():
+        base = baseline.get(metric)
+        if base is None or metric.endswith(".chunks"):
+            lines.append(f"{metric:<28} {value:>12.3f}")
+            continue
+        change = (value - base) / base if base else 0.0
+        worse = -change if higher_is_better(metric) else change
+        allowed = tolerance + spread.get(metric, 0.0) + baseline_spread.get(metric, 0.0)
+        flag = "  REGRESSION" if worse > allowed else ""
+        lines.append(f"{metric:<28} {value:>12.3f}  baseline {base:>12.3f}  {change:+7.1%}  (±{allowed:.0%}){flag}")
+    return lines
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per scenario; the best one is kept")
+    parser.add_argument("--embed-latency", type=float, default=0.002)
+    parser.add_argument("--search-latency", type=float, default=0.001)
+    parser.add_argument("--llm-latency", type=float, default=0.01)
+    parser.add_argument("--only", nargs="*", choices=["indexing", "rag", "rag_async", "app"])
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative change reported as a regression, on top of the spread between repeats")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args()
+
+    settings = {k: v for k, v in vars(args).items() if k not in ("baseline", "save_baseline", "only", "tolerance")}
+    machine = machine_fingerprint()
+    results, spread = run_suite(args)
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    if not args.save_baseline:
+        if not stored:
+            print(f"Aviso: no hay baseline en {args.baseline}; guardá una con --save-baseline. No se compara.")
+        elif stored.get("machine") != machine or stored.get("settings") != settings:
+            print("Aviso: la baseline se midió en otra máquina o con otros parámetros; no se compara. "
+                  "Guardá una nueva con --save-baseline.")
+            print(f"  baseline: {stored.get('machine')} {stored.get('settings')}")
+            print(f"  actual:   {machine} {settings}")
+            stored = {}
+    lines = compare(results, stored.get("results", {}), args.tolerance, spread, stored.get("spread", {}))
+    print("\n".join(lines))
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "machine": machine, "results": results, "spread": spread}, f, indent=2)
+        print(f"Baseline guardada en {args.baseline}")
+    elif any(line.endswith("REGRESSION") for line in lines):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import random
+from typing import List, Optional
+
+WORDS = (
+    "aneurisma segmentación modelo imagen volumen red neuronal entrenamiento evaluación "
+    "dispositivo tratamiento cerebral médico precisión métrica dice pérdida capa convolución "
+    "dataset anotación slicer pytorch slurm nodo clúster resultado experimento validación "
+    "arquitectura unet muestra paciente vaso sanguíneo flujo stent coil región interés"
+).split()
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _page_lines(rng: random.Random, page: int, lines: int) -> List[str]:
+    out = [f"Seccion {page // 10 + 1}.{page % 10 + 1}"]
+    for _ in range(lines):
+        out.append(" ".join(rng.choice(WORDS) for _ in range(12)) + ".")
+    return out
+
+def make_pdf(path: str, pages: int = 300, lines_per_page: int = 40, seed: int = 0,
+             page_texts: Optional[List[List[str]]] = None) -> str:
+    """Write a text-only PDF with `pages` pages of pseudo-random Spanish-like prose.
+
+    The file is built by hand (Helvetica, one content stream per page) so no PDF writer
+    dependency is needed. It is deterministic for a given `seed`.
+
+    Args:
+        path (str): Output file path.
+        pages (int, optional): Number of pages. Defaults to 300.
+        lines_per_page (int, optional): Lines of text per page. Defaults to 40.
+        seed (int, optional): Seed of the text generator. Defaults to 0.
+        page_texts (List[List[str]], optional): Explicit lines for every page; overrides the generator.
+
+    Returns:
+        str: The output path.
+    """
+    rng = random.Random(seed)
+    if page_texts is None:
+        page_texts = [_page_lines(rng, i, lines_per_page) for i in range(pages)]
+
+    objects: List[bytes] = []
+    n = len(page_texts)
+    # 1: catalog, 2: pages, 3: font, then (page, content) pairs.
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(n))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {n} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    for i, lines in enumerate(page_texts):
+        ops = ["BT", "/F1 9 Tf", "11 TL", "40 800 Td"]
+        ops += [f"({_escape(line)}) '" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("cp1252", errors="replace")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{num} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
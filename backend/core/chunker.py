@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+class Chunker(ABC):
+
+    @abstractmethod
+    def chunk(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Split the text of a document into chunks.
+
+        `pages` is consumed lazily and chunks are yielded as soon as they are complete,
+        so chunking runs as a streaming stage between extraction and embedding.
+
+        Args:
+            pages (Iterable[Tuple[int, str]]): Page number (1-based) and text of every page, in order.
+
+        Raises:
+            NotImplementedError: Must be implemented in subclasses.
+
+        Returns:
+            Iterator[Tuple[str, Dict[str, Any]]]: Chunk text and metadata with "page" (page where the
+                chunk starts) and "chunk" (position among the chunks starting on that page).
+        """
+        raise NotImplementedError
+
+    def settings(self) -> Dict[str, Any]:
+        """Name and parameters of the chunker, stored with every indexed document.
+
+        A document indexed with other settings is fully re-indexed. The default takes the
+        public attributes of the instance; override it if they do not determine the chunks.
+
+        Returns:
+            Dict[str, Any]: JSON-serializable description of the chunker.
+        """
+        return {"name": type(self).__name__, **{k: v for k, v in vars(self).items() if not k.startswith("_")}}
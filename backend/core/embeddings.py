@@ -1,8 +1,11 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import List
 
 class Embeddings(ABC):
-    
+    # Identifies the model that produced the vectors; used to key chunk IDs and caches.
+    model_name: str = "default"
+
     @abstractmethod
     def embed(self, texts: List[str]) -> List[List[float]]:
         """Generate vector embeddings for a list of texts.
@@ -16,4 +19,18 @@ class Embeddings(ABC):
         Returns:
             List[List[float]]: A list of embedding vectors, one per input text.
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of `embed`.
+
+        Providers with a native async client should override this method. The default
+        implementation runs `embed` in a worker thread so it never blocks the event loop.
+
+        Args:
+            texts (List[str]): List of input strings to embed.
+
+        Returns:
+            List[List[float]]: A list of embedding vectors, one per input text.
+        """
+        return await asyncio.to_thread(self.embed, texts)
@@ -1,4 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 class LLM(ABC):
     
@@ -16,4 +18,34 @@ class LLM(ABC):
         Returns:
             str: Generated response from the language model.
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        """Generate a response incrementally, yielding text fragments as they are produced.
+
+        Providers that support streaming should override this method. The default
+        implementation yields the whole response of `generate` at once.
+
+        Args:
+            prompt (str): Input text prompt to guide the model output.
+            **kwargs: Additional parameters to configure generation (e.g., temperature, max tokens).
+
+        Yields:
+            Iterator[str]: Consecutive fragments of the generated response.
+        """
+        yield self.generate(prompt, **kwargs)
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        """Async variant of `generate`.
+
+        Providers with a native async client should override this method. The default
+        implementation runs `generate` in a worker thread so it never blocks the event loop.
+
+        Args:
+            prompt (str): Input text prompt to guide the model output.
+            **kwargs: Additional parameters to configure generation (e.g., temperature, max tokens).
+
+        Returns:
+            str: Generated response from the language model.
+        """
+        return await asyncio.to_thread(self.generate, prompt, **kwargs)
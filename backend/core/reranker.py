@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+class Reranker(ABC):
+    # Identifies the scoring model; scores of different models are cached separately.
+    model_name: str = "default"
+
+    @abstractmethod
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        """Score how well every text answers a query.
+
+        Scores are only compared among the texts of one call: higher means more relevant.
+        Callers pass the texts in batches, so implementations may run them in a single
+        forward pass.
+
+        Args:
+            query (str): The search query.
+            texts (List[str]): Candidate passages.
+
+        Raises:
+            NotImplementedError: Must be implemented in subclasses.
+
+        Returns:
+            List[float]: One score per text, in the order of `texts`.
+        """
+        raise NotImplementedError
@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+# Priority classes of calls to rate-limited providers; lower values are served first.
+INTERACTIVE = 0
+BACKGROUND = 1
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_priority: ContextVar[int] = ContextVar("provider_priority", default=INTERACTIVE)
+
+def current_priority() -> int:
+    """Priority of the provider calls made from the current context. Interactive unless set."""
+    return _priority.get()
+
+@contextmanager
+def priority(level: int) -> Iterator[None]:
+    """Make the provider calls of the enclosed block with `level` priority.
+
+    The priority follows the block into coroutines and `asyncio.to_thread`, but not into
+    threads started by it (e.g. a `ThreadPoolExecutor`): set it again inside their work.
+
+    Args:
+        level (int): `INTERACTIVE` or `BACKGROUND`.
+    """
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
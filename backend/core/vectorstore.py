@@ -1,16 +1,21 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 class VectorStore(ABC):
     
     @abstractmethod
-    def add_texts(self, texts: List[str], metadatas: List[Dict[str, Any]], embeddings: List[List[float]]) -> List[str]:
+    def add_texts(self, texts: List[str], metadatas: List[Dict[str, Any]], embeddings: List[List[float]],
+                  ids: Optional[List[str]] = None) -> List[str]:
         """Add texts and their embeddings to the vector store.
 
+        Adding a document with an ID that already exists replaces it.
+
         Args:
             texts (List[str]): List of documents to store.
             metadatas (List[Dict[str, Any]]): Metadata associated with each document.
             embeddings (List[List[float]]): Embedding vectors corresponding to each text.
+            ids (List[str], optional): IDs to store the documents under. Random IDs are generated if omitted.
 
         Raises:
             NotImplementedError: Must be implemented in subclasses.
@@ -21,22 +26,106 @@ class VectorStore(ABC):
         raise NotImplementedError
     
     @abstractmethod
-    def query(self, query_embedding: List[float], k: int = 4) -> Dict[str, Any]:
+    def query(self, query_embedding: List[float], k: int = 4, source: Optional[str] = None) -> Dict[str, Any]:
         """Query the vector store for the most relevant documents.
 
         Args:
             query_embedding (List[float]): Embedding vector of the query.
             k (int, optional): Number of top results to retrieve. Defaults to 4.
+            source (str, optional): Only search documents whose "source" metadata equals this value.
 
         Raises:
             NotImplementedError: Must be implemented in subclasses.
 
         Returns:
-            Dict[str, Any]: A dictionary containing retrieved documents, 
+            Dict[str, Any]: A dictionary containing retrieved documents, their IDs,
                 their metadata, and similarity scores/distances.
         """
         raise NotImplementedError
     
+    def query_batch(self, query_embeddings: List[List[float]], k: int = 4,
+                    source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Query the vector store with several embeddings at once.
+
+        Stores with a native batch search should override this method. The default
+        implementation runs `query` once per embedding.
+
+        Args:
+            query_embeddings (List[List[float]]): Embedding vectors of the queries.
+            k (int, optional): Number of top results to retrieve per query. Defaults to 4.
+            source (str, optional): Only search documents whose "source" metadata equals this value.
+
+        Returns:
+            List[Dict[str, Any]]: One result, with the structure of `query`, per embedding.
+        """
+        return [self.query(q, k=k, source=source) for q in query_embeddings]
+
+    async def aquery(self, query_embedding: List[float], k: int = 4, source: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of `query`.
+
+        Stores with a native async client should override this method. The default
+        implementation runs `query` in a worker thread so it never blocks the event loop.
+
+        Args:
+            query_embedding (List[float]): Embedding vector of the query.
+            k (int, optional): Number of top results to retrieve. Defaults to 4.
+            source (str, optional): Only search documents whose "source" metadata equals this value.
+
+        Returns:
+            Dict[str, Any]: Same structure as `query`.
+        """
+        return await asyncio.to_thread(self.query, query_embedding, k, source)
+
+    def get_texts(self, ids: List[str]) -> List[Optional[str]]:
+        """Texts of stored documents, e.g. to fill in the results of a retriever that does not keep them.
+
+        Args:
+            ids (List[str]): IDs of the documents.
+
+        Raises:
+            NotImplementedError: If the store does not support it.
+
+        Returns:
+            List[Optional[str]]: The text of every document, or None for unknown IDs.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """Remove documents from the vector store.
+
+        Args:
+            ids (List[str]): IDs of the documents to remove. Unknown IDs are ignored.
+
+        Raises:
+            NotImplementedError: Must be implemented in subclasses.
+        """
+        raise NotImplementedError
+
+    def delete_source(self, source: str) -> None:
+        """Remove every document whose "source" metadata equals `source`, whatever its ID.
+
+        Args:
+            source (str): Source of the documents to remove.
+
+        Raises:
+            NotImplementedError: If the store does not support it.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Replace the metadata of stored documents without touching their text or embedding.
+
+        Args:
+            ids (List[str]): IDs of the documents to update.
+            metadatas (List[Dict[str, Any]]): New metadata for each document.
+
+        Raises:
+            NotImplementedError: Must be implemented in subclasses.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def reset(self) -> None:
         """Clear the collection to allow reindexing.
@@ -44,4 +133,31 @@ class VectorStore(ABC):
         Raises:
             NotImplementedError: Must be implemented in subclasses.
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Persist pending writes before the caller records them as done (e.g. in an index state).
+
+        Stores that write through keep this default.
+        """
+        return None
+
+    def begin_build(self) -> None:
+        """Start building a new version of the collection.
+
+        Until `commit_build`, writes (`add_texts`, `delete`, `update_metadata`) go to the
+        new version while queries keep being answered by the current one, so a full
+        re-index never serves empty or partial results. `abort_build` discards it.
+
+        Stores without versioning should keep this default, which clears the collection
+        (`reset`) and writes in place.
+        """
+        self.reset()
+
+    def commit_build(self) -> None:
+        """Atomically replace the current version of the collection with the one being built."""
+        return None
+
+    def abort_build(self) -> None:
+        """Discard the version being built. Queries keep using the current one."""
+        return None
@@ -0,0 +1,38 @@
+import os
+from core.chunker import Chunker
+
+def get_chunker() -> Chunker:
+    """Factory method to create a Chunker instance.
+
+    The strategy is selected using the environment variable `CHUNKER`.
+    Currently supported:
+        - "sliding": Uses `SlidingWindowChunker`, fixed character windows per page (default).
+        - "structure": Uses `StructureChunker`, sentence- and heading-aware chunks continued across pages.
+
+    Environment Variables:
+        CHUNKER (str): Chunking strategy. Defaults to "sliding".
+        CHUNK_SIZE (int): Characters per sliding window. Defaults to 1000.
+        CHUNK_OVERLAP (int): Characters repeated between sliding windows. Defaults to 150.
+        CHUNK_MAX_TOKENS (int): Maximum estimated tokens per structure-aware chunk. Defaults to 256.
+        CHUNK_MIN_TOKENS (int): Structure-aware chunks smaller than this are not closed. Defaults to 64.
+
+    Raises:
+        ValueError: If the strategy is not supported.
+
+    Returns:
+        Chunker: An instance of the selected chunker.
+    """
+    strategy = os.getenv("CHUNKER", "sliding").lower()
+    if strategy == "sliding":
+        from infra.chunkers.sliding_window import SlidingWindowChunker
+        return SlidingWindowChunker(
+            chunk_size=int(os.getenv("CHUNK_SIZE", "1000")),
+            chunk_overlap=int(os.getenv("CHUNK_OVERLAP", "150")),
+        )
+    if strategy == "structure":
+        from infra.chunkers.structure import StructureChunker
+        return StructureChunker(
+            max_tokens=int(os.getenv("CHUNK_MAX_TOKENS", "256")),
+            min_tokens=int(os.getenv("CHUNK_MIN_TOKENS", "64")),
+        )
+    raise ValueError(f"Chunker not supported: {strategy}")
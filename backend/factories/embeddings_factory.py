@@ -1,6 +1,9 @@
 import os
+from functools import lru_cache
 from core.embeddings import Embeddings
+from factories.lazy import Lazy
 
+@lru_cache(maxsize=None)
 def get_embeddings() -> Embeddings:
     """Factory method to create an Embeddings provider instance.
 
@@ -11,16 +14,49 @@ def get_embeddings() -> Embeddings:
     Environment Variables:
         EMBEDDINGS_PROVIDER (str): Embeddings backend (e.g., "gemini").
         GEMINI_EMBED_MODEL (str): Model name to use for Gemini embeddings.
+        GEMINI_EMBED_BATCH_SIZE (int): Texts per batch request. Defaults to 100.
+        GEMINI_EMBED_CONCURRENCY (int): Batches of one call sent in parallel; the scheduler bounds the
+            requests in flight. Defaults to 4.
+        GEMINI_EMBED_MAX_RETRIES (int): Retries on rate-limit errors, paced by the scheduler. Defaults to 5.
+        GEMINI_RPM, GEMINI_MAX_CONCURRENCY, ...: Scheduler shared with the Gemini LLM
+            (see `get_gemini_scheduler`).
+        EMBED_CACHE_PATH (str): SQLite file of the on-disk embedding cache that wraps the selected
+            provider. Defaults to "data/embeddings.sqlite"; "none" (or empty) disables the cache.
+        EMBED_CACHE_MAX_ENTRIES (int): Maximum number of cached vectors. Defaults to 200000.
+
+    The provider is built on first use (see `Lazy`), so calling the factory is cheap and
+    does not import the provider SDK nor connect to any service. Every call returns the
+    same instance.
 
     Raises:
-        ValueError: If the provider is not supported.
+        ValueError: If the provider is not supported (raised on first use).
 
     Returns:
         Embeddings: An instance of the selected embeddings provider.
     """
+    return Lazy(_build_embeddings, "embeddings")
+
+def _build_embeddings() -> Embeddings:
     provider = os.getenv("EMBEDDINGS_PROVIDER").lower()
+    emb = _get_provider(provider)
+
+    cache_path = os.getenv("EMBED_CACHE_PATH", os.path.join("data", "embeddings.sqlite")).strip()
+    if cache_path.lower() not in ("", "none", "off"):
+        from infra.embeddings.cache import CachedEmbeddings
+        max_entries = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "200000"))
+        return CachedEmbeddings(emb, path=cache_path, max_entries=max_entries)
+    return emb
+
+def _get_provider(provider: str) -> Embeddings:
     if provider == "gemini":
         from infra.embeddings.gemini import GeminiEmbeddings
-        model = os.getenv("GEMINI_EMBED_MODEL")
-        return GeminiEmbeddings(model_name=model)
+        from factories.scheduler_factory import get_gemini_scheduler
+        model = os.getenv("GEMINI_EMBED_MODEL", "text-embedding-004")
+        return GeminiEmbeddings(
+            model_name=model,
+            batch_size=int(os.getenv("GEMINI_EMBED_BATCH_SIZE", "100")),
+            max_concurrency=int(os.getenv("GEMINI_EMBED_CONCURRENCY", "4")),
+            max_retries=int(os.getenv("GEMINI_EMBED_MAX_RETRIES", "5")),
+            scheduler=get_gemini_scheduler(),
+        )
     raise ValueError(f"Embeddings provider not supported: {provider}")
\ No newline at end of file
@@ -0,0 +1,43 @@
+import threading
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+class Lazy(Generic[T]):
+    def __init__(self, build: Callable[[], T], name: str = "provider"):
+        """Proxy that builds a provider the first time one of its attributes is used.
+
+        Provider modules import heavy SDKs (`google.generativeai`, `qdrant_client`) and
+        their constructors open network connections. Deferring both to the first call
+        keeps the application import fast, and the first request (or the background
+        indexer) pays the cost instead of the process start.
+
+        Args:
+            build (Callable[[], T]): Function that creates the provider.
+            name (str, optional): Name used in error messages. Defaults to "provider".
+        """
+        self._build = build
+        self._name = name
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        """Whether the provider has been built."""
+        return self._instance is not None
+
+    def get(self) -> T:
+        """Build the provider if needed and return it. Concurrent first calls build it once."""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._build()
+        return self._instance
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only called for attributes not found on the proxy itself.
+        return getattr(self.get(), attr)
+
+    def __repr__(self) -> str:
+        state = repr(self._instance) if self._instance is not None else "not built"
+        return f"Lazy({self._name}: {state})"
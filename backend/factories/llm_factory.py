@@ -1,6 +1,9 @@
 import os
+from functools import lru_cache
 from core.llm import LLM
+from factories.lazy import Lazy
 
+@lru_cache(maxsize=None)
 def get_llm() -> LLM:
     """Factory method to create a Language Model (LLM) instance.
 
@@ -11,16 +14,26 @@ def get_llm() -> LLM:
     Environment Variables:
         LLM_PROVIDER (str): LLM backend (e.g., "gemini").
         GEMINI_LLM_MODEL (str): Model name to use for Gemini LLM.
+        GEMINI_RPM, GEMINI_MAX_CONCURRENCY, ...: Scheduler shared with the Gemini embeddings
+            (see `get_gemini_scheduler`).
+
+    The provider is built on first use (see `Lazy`), so calling the factory is cheap and
+    does not import the provider SDK nor connect to any service. Every call returns the
+    same instance.
 
     Raises:
-        ValueError: If the provider is not supported.
+        ValueError: If the provider is not supported (raised on first use).
 
     Returns:
         LLM: An instance of the selected language model provider.
     """
+    return Lazy(_build_llm, "llm")
+
+def _build_llm() -> LLM:
     provider = os.getenv("LLM_PROVIDER").lower()
     if provider == "gemini":
         from infra.llm.gemini import GeminiLLM
+        from factories.scheduler_factory import get_gemini_scheduler
         model = os.getenv("GEMINI_LLM_MODEL")
-        return GeminiLLM(model_name=model)
+        return GeminiLLM(model_name=model, scheduler=get_gemini_scheduler())
     raise ValueError(f"LLM provider not supported: {provider}") 
\ No newline at end of file
@@ -0,0 +1,47 @@
+import os
+from functools import lru_cache
+from typing import Optional
+from core.reranker import Reranker
+from factories.lazy import Lazy
+
+@lru_cache(maxsize=None)
+def get_reranker() -> Optional[Reranker]:
+    """Factory method to create a Reranker instance.
+
+    The reranker is selected using the environment variable `RERANKER`.
+    Currently supported:
+        - "none": No reranking; contexts keep retrieval order (default).
+        - "lexical": Uses `LexicalReranker`, term and phrase overlap with the question. No model needed.
+        - "cross-encoder": Uses `CrossEncoderReranker`, a local CPU cross-encoder (requires sentence-transformers).
+
+    Environment Variables:
+        RERANKER (str): Reranker backend. Defaults to "none".
+        RERANKER_MODEL (str): Cross-encoder model. Defaults to "cross-encoder/ms-marco-MiniLM-L-6-v2".
+        RERANKER_DEVICE (str): Torch device of the cross-encoder. Defaults to "cpu".
+        RERANK_BATCH_SIZE (int): Pairs per cross-encoder forward pass. Defaults to 16.
+
+    The cross-encoder is loaded on first use (see `Lazy`).
+
+    Raises:
+        ValueError: If the reranker is not supported.
+
+    Returns:
+        Optional[Reranker]: An instance of the selected reranker, or None if reranking is disabled.
+    """
+    provider = os.getenv("RERANKER", "none").lower()
+    if provider == "none":
+        return None
+    if provider == "lexical":
+        from infra.rerankers.lexical import LexicalReranker
+        return LexicalReranker()
+    if provider == "cross-encoder":
+        return Lazy(_build_cross_encoder, "reranker")
+    raise ValueError(f"Reranker not supported: {provider}")
+
+def _build_cross_encoder() -> Reranker:
+    from infra.rerankers.cross_encoder import CrossEncoderReranker
+    return CrossEncoderReranker(
+        model_name=os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+        batch_size=int(os.getenv("RERANK_BATCH_SIZE", "16")),
+        device=os.getenv("RERANKER_DEVICE", "cpu"),
+    )
@@ -0,0 +1,28 @@
+import os
+from functools import lru_cache
+from infra.scheduler import RateLimitScheduler
+
+@lru_cache(maxsize=None)
+def get_gemini_scheduler() -> RateLimitScheduler:
+    """Scheduler shared by every Gemini provider (embeddings and LLM), so they split one quota.
+
+    Environment Variables:
+        GEMINI_RPM (float): Requests per minute allowed by the quota; 0 disables the token bucket. Defaults to 0.
+        GEMINI_BURST (int, optional): Requests that may be sent at once after an idle period.
+            Defaults to one second of requests.
+        GEMINI_MAX_CONCURRENCY (int): Upper bound of the adaptive concurrency limit. Defaults to 8.
+        GEMINI_INTERACTIVE_RESERVE (int): Slots that background indexing cannot use. Defaults to 1.
+        GEMINI_COOLDOWN_SECONDS (float): Pause of every call after a 429/503. Defaults to 2.0.
+
+    Returns:
+        RateLimitScheduler: The process-wide scheduler.
+    """
+    burst = os.getenv("GEMINI_BURST")
+    return RateLimitScheduler(
+        name="gemini",
+        requests_per_minute=float(os.getenv("GEMINI_RPM", "0")),
+        burst=int(burst) if burst else None,
+        max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")),
+        interactive_reserve=int(os.getenv("GEMINI_INTERACTIVE_RESERVE", "1")),
+        cooldown_seconds=float(os.getenv("GEMINI_COOLDOWN_SECONDS", "2.0")),
+    )
@@ -1,26 +1,75 @@
 import os
+from functools import lru_cache
+from typing import Optional
 from core.vectorstore import VectorStore
+from factories.lazy import Lazy
 
+def _optional_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+@lru_cache(maxsize=None)
 def get_vectorstore() -> VectorStore:
     """Factory method to create a VectorStore instance.
 
     The provider is selected using the environment variable `VECTORSTORE_PROVIDER`.
     Currently supported:
         - "qdrant": Uses `QdrantStore`.
+        - "local": Uses `LocalStore`, an in-process NumPy index persisted to disk.
 
     Environment Variables:
         VECTORSTORE_PROVIDER (str): Vector store backend (e.g., "qdrant").
         COLLECTION (str): Name of the vector collection in the store.
+        QDRANT_QUANTIZATION (str, optional): "scalar" or "binary" quantization kept in RAM.
+        QDRANT_OVERSAMPLING (float): Candidate multiplier for quantized search. Defaults to 2.0.
+        QDRANT_RESCORE (bool): Rescore quantized candidates with full vectors. Defaults to true.
+        QDRANT_HNSW_M, QDRANT_HNSW_EF_CONSTRUCT, QDRANT_HNSW_EF (int, optional): HNSW graph and search parameters.
+        QDRANT_KEEP_VERSIONS (int): Previous collection versions kept after a rebuild. Defaults to 1.
+        QDRANT_PATH (str, optional): Directory of an embedded Qdrant, used when `QDRANT_URL` is not set.
+        DOCSTORE_PATH (str, optional): Directory of a `DocStore` for the chunk texts. When set, Qdrant
+            payloads only hold the metadata.
+        DOCSTORE_HOT_SIZE (int): Decompressed texts cached in memory by the docstore. Defaults to 2048.
+        LOCAL_STORE_PATH (str): Directory of the local store files. Defaults to "data/vectorstore".
+        LOCAL_STORE_INDEX (str): "exact" or "ivf" for the local store. Defaults to "exact".
+        LOCAL_STORE_NPROBE (int): IVF lists scanned per query by the local store. Defaults to 8.
+
+    The provider is built on first use (see `Lazy`), so calling the factory is cheap and
+    does not import the provider SDK nor connect to any service. Every call returns the
+    same instance.
 
     Raises:
-        ValueError: If the provider is not supported.
+        ValueError: If the provider is not supported (raised on first use).
 
     Returns:
         VectorStore: An instance of the selected vector store provider.
     """
+    return Lazy(_build_vectorstore, "vectorstore")
+
+def _build_vectorstore() -> VectorStore:
     provider = os.getenv("VECTORSTORE_PROVIDER").lower()
     if provider == "qdrant":
         from infra.vectorstores.qdrant import QdrantStore
         collection = os.getenv("COLLECTION")
-        return QdrantStore(collection_name=collection)
+        docstore = None
+        if os.getenv("DOCSTORE_PATH"):
+            from infra.vectorstores.docstore import DocStore
+            docstore = DocStore(os.getenv("DOCSTORE_PATH"), hot_size=int(os.getenv("DOCSTORE_HOT_SIZE", "2048")))
+        return QdrantStore(
+            collection_name=collection,
+            quantization=os.getenv("QDRANT_QUANTIZATION") or None,
+            oversampling=float(os.getenv("QDRANT_OVERSAMPLING", "2.0")),
+            rescore=os.getenv("QDRANT_RESCORE", "true").lower() == "true",
+            hnsw_m=_optional_int("QDRANT_HNSW_M"),
+            hnsw_ef_construct=_optional_int("QDRANT_HNSW_EF_CONSTRUCT"),
+            hnsw_ef=_optional_int("QDRANT_HNSW_EF"),
+            keep_versions=int(os.getenv("QDRANT_KEEP_VERSIONS", "1")),
+            docstore=docstore,
+        )
+    if provider == "local":
+        from infra.vectorstores.local import LocalStore
+        return LocalStore(
+            path=os.getenv("LOCAL_STORE_PATH", os.path.join("data", "vectorstore")),
+            index=os.getenv("LOCAL_STORE_INDEX", "exact"),
+            nprobe=int(os.getenv("LOCAL_STORE_NPROBE", "8")),
+        )
     raise ValueError(f"VectorStore provider not supported: {provider}") 
\ No newline at end of file
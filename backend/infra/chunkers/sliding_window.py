@@ -0,0 +1,47 @@
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from core.chunker import Chunker
+
+class SlidingWindowChunker(Chunker):
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 150, min_page_chars: int = 40):
+        """Fixed-size character windows, computed page by page.
+
+        Args:
+            chunk_size (int, optional): The maximum size of each text fragment. Defaults to 1000.
+            chunk_overlap (int, optional): Number of characters from the end of a fragment that are repeated
+                at the beginning of the next. Defaults to 150.
+            min_page_chars (int, optional): Pages with less text (e.g. blank or only a page number) are skipped.
+                Defaults to 40.
+        """
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.min_page_chars = min_page_chars
+
+    def _chunk_text(self, text: str) -> List[str]:
+        """
+        Takes a long block of text and splits it into a list of chunks based on the size and overlap defined in the constructor.
+        Uses a sliding window.
+
+        Args:
+            text (str): text for applies the split
+
+        Returns:
+            List[str]: chunks
+        """
+        if not text:
+            return []
+
+        chunks, start, n = [], 0, len(text)
+        while start < n:
+            end = min(start + self.chunk_size, n)
+            chunks.append(text[start:end])
+            if end == n:
+                break
+            start += self.chunk_size - self.chunk_overlap
+        return chunks
+
+    def chunk(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for page, text in pages:
+            if len(text.strip()) < self.min_page_chars:
+                continue
+            for j, chunk_text in enumerate(self._chunk_text(text)):
+                yield chunk_text, {"page": page, "chunk": j}
@@ -0,0 +1,155 @@
+import re
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from core.chunker import Chunker
+
+# Numbered titles ("3.2 Resultados", "IV. Discusión") and the usual section words. Numbered
+# titles must start with a capital letter, so a line starting with a number ("0.87 para...") is not one.
+HEADING = re.compile(
+    r"^((\d+(\.\d+)*\.?|[IVXLC]+\.)\s+[A-ZÁÉÍÓÚÑ]"
+    r"|(?i:cap[ií]tulo|chapter|secci[oó]n|section|anexo|ap[eé]ndice|appendix)\s+\S)"
+)
+# A sentence ends with . ! ? or … followed by whitespace and something that can start a sentence.
+SENTENCE_BREAK = re.compile(r"(?<=[.!?…])\s+(?=[\"'«(\[¿¡]?[A-ZÁÉÍÓÚÑÜ0-9])")
+SENTENCE_END = re.compile(r"[.!?…][\"'»)\]]?$")
+PAGE_NUMBER = re.compile(r"^\d{1,4}$")
+
+class StructureChunker(Chunker):
+    def __init__(self, max_tokens: int = 256, min_tokens: int = 64, chars_per_token: float = 4.0,
+                 max_heading_chars: int = 100, min_page_chars: int = 40):
+        """Sentence- and heading-aware chunks with a token budget, continued across pages.
+
+        Chunks are cut only between sentences, a heading starts a new chunk, and the text
+        is streamed across page boundaries, so a paragraph or a sentence split by a page
+        break stays in one chunk. A chunk shorter than `min_tokens` is never closed, so a
+        heading stays with the text that follows it (such a chunk may exceed `max_tokens`
+        by less than `min_tokens`). Sentences longer than `max_tokens` are split between
+        words. Chunks do not overlap.
+
+        Args:
+            max_tokens (int, optional): Maximum estimated tokens per chunk. Defaults to 256.
+            min_tokens (int, optional): Chunks smaller than this are not closed. Defaults to 64.
+            chars_per_token (float, optional): Characters per token used to estimate sizes. Defaults to 4.0.
+            max_heading_chars (int, optional): Longer lines are never taken as headings. Defaults to 100.
+            min_page_chars (int, optional): Pages with less text are skipped. Defaults to 40.
+        """
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.chars_per_token = chars_per_token
+        self.max_heading_chars = max_heading_chars
+        self.min_page_chars = min_page_chars
+
+    def _tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def _is_heading(self, line: str) -> bool:
+        if len(line) > self.max_heading_chars or line[-1] in ".,;:" or not any(c.isalpha() for c in line):
+            return False
+        return bool(HEADING.match(line)) or (line.isupper() and len(line.split()) <= 12)
+
+    def _blocks(self, text: str) -> Iterator[Tuple[str, str]]:
+        """Split a page into ("heading", line) and ("text", paragraph) blocks, undoing hyphenation."""
+        lines = [line.strip() for line in text.splitlines()]
+        lines = [line for line in lines if line and not PAGE_NUMBER.match(line)]
+        paragraph = ""
+        for line in lines:
+            if self._is_heading(line):
+                if paragraph:
+                    yield "text", paragraph
+                    paragraph = ""
+                yield "heading", line
+            elif paragraph.endswith("-") and line[:1].islower():
+                paragraph = paragraph[:-1] + line
+            else:
+                paragraph = f"{paragraph} {line}" if paragraph else line
+        if paragraph:
+            yield "text", paragraph
+
+    def _split_long(self, sentence: str, first_tokens: int) -> List[str]:
+        """Split a sentence longer than `max_tokens` between words; the first piece has at most `first_tokens`."""
+        limit = int(first_tokens * self.chars_per_token)
+        pieces, current = [], ""
+        for word in sentence.split():
+            if current and len(current) + 1 + len(word) > limit:
+                pieces.append(current)
+                current = ""
+                limit = int(self.max_tokens * self.chars_per_token)
+            current = f"{current} {word}" if current else word
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def chunk(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        counts: Dict[int, int] = {}
+        buffer = ""
+        first_page: Optional[int] = None
+        last_page: Optional[int] = None
+        # Unfinished sentence at the end of the previous page and the page it started on.
+        carry, carry_page = "", None
+
+        def flush() -> Optional[Tuple[str, Dict[str, Any]]]:
+            nonlocal buffer, first_page, last_page
+            text = buffer.strip()
+            if not text:
+                return None
+            meta = {"page": first_page, "chunk": counts.get(first_page, 0)}
+            if last_page != first_page:
+                meta["end_page"] = last_page
+            counts[first_page] = meta["chunk"] + 1
+            buffer, first_page, last_page = "", None, None
+            return text, meta
+
+        def add(piece: str, page: int, heading: bool = False) -> List[Tuple[str, Dict[str, Any]]]:
+            nonlocal buffer, first_page, last_page
+            out = []
+            # A chunk shorter than `min_tokens` (e.g. just a heading) is never closed.
+            if buffer and self._tokens(buffer) >= self.min_tokens:
+                if heading or self._tokens(buffer) + self._tokens(piece) > self.max_tokens:
+                    out.append(flush())
+            if first_page is None:
+                first_page = page
+            last_page = page
+            separator = "" if not buffer or buffer.endswith("\n") else ("\n" if heading else " ")
+            buffer += separator + piece + ("\n" if heading else "")
+            return [c for c in out if c is not None]
+
+        def add_sentences(text: str, page: int, start_page: int) -> List[Tuple[str, Dict[str, Any]]]:
+            out = []
+            for n, sentence in enumerate(SENTENCE_BREAK.split(text)):
+                # Only the first sentence can come from the previous page.
+                sentence_page = start_page if n == 0 else page
+                pieces = [sentence]
+                if self._tokens(sentence) > self.max_tokens:
+                    small = buffer and self._tokens(buffer) < self.min_tokens
+                    pieces = self._split_long(sentence, self.max_tokens - self._tokens(buffer) - 1 if small else self.max_tokens)
+                for piece in pieces:
+                    out.extend(add(piece, sentence_page))
+            return out
+
+        for page, text in pages:
+            if len(text.strip()) < self.min_page_chars:
+                continue
+            for kind, block in self._blocks(text):
+                if kind == "heading":
+                    if carry:
+                        yield from add_sentences(carry, carry_page, carry_page)
+                        carry, carry_page = "", None
+                    yield from add(block, page, heading=True)
+                    continue
+                start_page = page
+                if carry:
+                    block = carry[:-1] + block if carry.endswith("-") and block[:1].islower() else f"{carry} {block}"
+                    start_page = carry_page
+                    carry, carry_page = "", None
+                sentences = SENTENCE_BREAK.split(block)
+                if not SENTENCE_END.search(sentences[-1]):
+                    # The last sentence may continue on the next page; keep it until then.
+                    carry = sentences.pop()
+                    carry_page = page if sentences else start_page
+                if sentences:
+                    yield from add_sentences(" ".join(sentences), page, start_page)
+        if carry:
+            yield from add_sentences(carry, carry_page, carry_page)
+        last = flush()
+        if last is not None:
+            yield last
@@ -0,0 +1,159 @@
+import os
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+from core.embeddings import Embeddings
+
+# SQLite limits the number of bound parameters per statement.
+_SQL_BATCH = 500
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, inner: Embeddings, path: str, max_entries: int = 200_000):
+        """Disk-backed embedding cache that wraps any Embeddings implementation.
+
+        Vectors are stored as float32 blobs in a SQLite database keyed by the SHA256 of
+        (model name, text), so a text is only sent to the provider the first time it is
+        seen, across restarts and re-indexings. When the cache grows past `max_entries`
+        the least recently used vectors are evicted.
+
+        Args:
+            inner (Embeddings): Provider used on cache misses.
+            path (str): Path of the SQLite database file. Created if it does not exist.
+            max_entries (int, optional): Maximum number of cached vectors. Defaults to 200000.
+        """
+        self.inner = inner
+        self.model_name = inner.model_name
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        # Row count kept in memory, so inserts do not scan the table to enforce the cap.
+        (self._size,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Fetch cached vectors and refresh their LRU timestamp."""
+        found: Dict[str, List[float]] = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), _SQL_BATCH):
+                part = keys[i:i + _SQL_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+                self._conn.commit()
+        return found
+
+    def _store(self, vectors: Dict[str, List[float]]) -> None:
+        """Insert new vectors and evict the least recently used ones above the size cap."""
+        now = time.time()
+        with self._lock:
+            # A key stored meanwhile by a concurrent request already holds the same vector.
+            inserted = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(k, array("f", v).tobytes(), now) for k, v in vectors.items()],
+            ).rowcount
+            self._size += inserted
+            if self._size > self.max_entries:
+                self._size -= self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (self._size - self.max_entries,),
+                ).rowcount
+            self._conn.commit()
+
+    def _split(self, texts: List[str]) -> Tuple[List[str], Dict[str, List[float]], Dict[str, str]]:
+        """Resolve a request against the cache.
+
+        Returns:
+            Tuple[List[str], Dict[str, List[float]], Dict[str, str]]: The key of every text, the cached
+                vectors found and the distinct texts that still have to be embedded, by key.
+        """
+        keys = [self._key(t) for t in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+
+        # Each distinct missing text is sent to the provider once.
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        with self._lock:
+            self.hits += len(keys) - sum(1 for k in keys if k in missing)
+            self.misses += sum(1 for k in keys if k in missing)
+        return keys, found, missing
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a list of texts, using cached vectors when available.
+
+        Args:
+            texts (List[str]): List of strings to embed.
+
+        Returns:
+            List[List[float]]: Embedding vectors for each input text, in input order.
+        """
+        if not texts:
+            return []
+        keys, found, missing = self._split(texts)
+        if missing:
+            computed = dict(zip(missing.keys(), self.inner.embed(list(missing.values()))))
+            self._store(computed)
+            found.update(computed)
+        return [found[k] for k in keys]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of `embed`: cache misses go through the provider's `aembed`.
+
+        The SQLite reads and writes run in a worker thread, so the event loop never waits
+        on the cache lock an indexing batch may be holding.
+
+        Args:
+            texts (List[str]): List of strings to embed.
+
+        Returns:
+            List[List[float]]: Embedding vectors for each input text, in input order.
+        """
+        if not texts:
+            return []
+        keys, found, missing = await asyncio.to_thread(self._split, texts)
+        if missing:
+            computed = dict(zip(missing.keys(), await self.inner.aembed(list(missing.values()))))
+            await asyncio.to_thread(self._store, computed)
+            found.update(computed)
+        return [found[k] for k in keys]
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Hit/miss counters of the cache.
+
+        Returns:
+            Dict[str, Optional[float]]: hits, misses, hit rate and number of cached vectors.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else None,
+                "entries": self._size,
+            }
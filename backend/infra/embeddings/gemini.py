@@ -1,28 +1,166 @@
 import os
-from typing import List
+import time
+import asyncio
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 import google.generativeai as genai
 from core.embeddings import Embeddings
+from core.scheduling import PRIORITY_NAMES, current_priority, priority
+from infra.scheduler import RateLimitScheduler
+from services.loop_semaphore import LoopSemaphore
+
+# HTTP status codes that mean "slow down and try again" (quota exhausted / overloaded).
+RETRYABLE_STATUS = (429, 503)
 
 class GeminiEmbeddings(Embeddings):
-    def __init__(self, model_name: str = "text-embedding-004"):
+    def __init__(
+        self,
+        model_name: str = "text-embedding-004",
+        batch_size: int = 100,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        client: Optional[Any] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+    ):
         """Gemini implementation of the Embeddings interface.
 
         This class wraps the Google Gemini embedding model to provide
-        vector representations of text.
+        vector representations of text. Texts are sent in multi-text batch
+        requests and several batches are kept in flight at once.
 
         Args:
             model_name (str, optional): Name of the Gemini embedding model.
                 Defaults to "text-embedding-004".
+            batch_size (int, optional): Maximum number of texts per API request (the API allows up to 100).
+                Defaults to 100.
+            max_concurrency (int, optional): Maximum number of batch requests in flight without a scheduler, and
+                batches of one call sent in parallel. Defaults to 4.
+            max_retries (int, optional): Retries per batch on rate-limit or overload errors. Defaults to 5.
+            backoff_base (float, optional): Base delay in seconds for the exponential backoff between retries,
+                only without a scheduler. Defaults to 1.0.
+            client (Any, optional): Object exposing `embed_content(model=..., content=[...])` (and optionally
+                `embed_content_async`) with the same contract as `google.generativeai`. Useful to plug a
+                local fake client. Defaults to `genai`.
+            scheduler (RateLimitScheduler, optional): Admission control shared with the other providers of
+                the same API. It owns concurrency and throttling: every request (and retry) waits for it with
+                the caller's priority, and a throttled request is retried through it, after its cooldown,
+                without a backoff of its own. Requests are bounded by `max_concurrency` and retried with
+                exponential backoff if None.
 
         Raises:
             RuntimeError: If the environment variable `GEMINI_API_KEY` is missing.
         """
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise RuntimeError("GEMINI_API_KEY is missing")
-        genai.configure(api_key=api_key)
+        if client is None:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise RuntimeError("GEMINI_API_KEY is missing")
+            genai.configure(api_key=api_key)
+            client = genai
+        self.client = client
         self.model_name = model_name
-    
+        self.batch_size = max(1, min(batch_size, 100))
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.scheduler = scheduler
+        # Without a scheduler, bounds in-flight requests across all callers, including concurrent `embed` calls.
+        # With one it is not used: a permit held by a background batch queued in the scheduler would make an
+        # interactive request wait behind it.
+        self._in_flight = threading.BoundedSemaphore(self.max_concurrency)
+        self._async_in_flight = LoopSemaphore(self.max_concurrency)
+        self._pools: Dict[int, ThreadPoolExecutor] = {}
+        self._pools_lock = threading.Lock()
+
+    def _is_retryable(self, error: Exception) -> bool:
+        """Tell whether an API error is a rate-limit/overload error worth retrying.
+
+        `google.api_core` exceptions expose the HTTP status in `code`.
+
+        Args:
+            error (Exception): Error raised by the client.
+
+        Returns:
+            bool: True if the request should be retried.
+        """
+        code = getattr(error, "code", None)
+        code = getattr(code, "value", code)
+        return code in RETRYABLE_STATUS
+
+    def _pool(self, level: int) -> ThreadPoolExecutor:
+        """Threads running the batches of multi-batch calls of one priority, so background batches
+        waiting for the scheduler never hold the threads of an interactive call."""
+        with self._pools_lock:
+            pool = self._pools.get(level)
+            if pool is None:
+                name = PRIORITY_NAMES.get(level, str(level))
+                pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix=f"gemini-embed-{name}")
+                self._pools[level] = pool
+            return pool
+
+    def _embed_batch(self, texts: List[str], level: Optional[int] = None) -> List[List[float]]:
+        """Embed one batch with a single API request, retrying with exponential backoff and jitter.
+
+        Args:
+            texts (List[str]): Batch of at most `batch_size` texts.
+            level (int, optional): Scheduling priority, for batches running in the pool threads (which
+                do not inherit the caller's context). The current one if None.
+
+        Raises:
+            Exception: The last client error once retries are exhausted, or any non-retryable error.
+
+        Returns:
+            List[List[float]]: Embedding vectors in the same order as `texts`.
+        """
+        if level is not None:
+            with priority(level):
+                return self._embed_batch(texts)
+        attempt = 0
+        while True:
+            try:
+                with self.scheduler.slot() if self.scheduler is not None else self._in_flight:
+                    e = self.client.embed_content(model=self.model_name, content=texts)
+                return e["embedding"]
+            except Exception as error:
+                if attempt >= self.max_retries or not self._is_retryable(error):
+                    raise
+                # With a scheduler, the throttled request paused it: the retry waits out the cooldown there.
+                if self.scheduler is None:
+                    time.sleep(self._backoff(attempt))
+                attempt += 1
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of `_embed_batch`.
+
+        Args:
+            texts (List[str]): Batch of at most `batch_size` texts.
+
+        Raises:
+            Exception: The last client error once retries are exhausted, or any non-retryable error.
+
+        Returns:
+            List[List[float]]: Embedding vectors in the same order as `texts`.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self.scheduler.aslot() if self.scheduler is not None else self._async_in_flight:
+                    e = await self.client.embed_content_async(model=self.model_name, content=texts)
+                return e["embedding"]
+            except Exception as error:
+                if attempt >= self.max_retries or not self._is_retryable(error):
+                    raise
+                if self.scheduler is None:
+                    await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+
+    def _backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt`: exponential with full jitter."""
+        delay = self.backoff_base * (2 ** attempt)
+        return delay + random.uniform(0, delay)
+
     def embed(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for a list of texts.
 
@@ -30,10 +168,36 @@ class GeminiEmbeddings(Embeddings):
             texts (List[str]): List of strings to embed.
 
         Returns:
-            List[List[float]]: Embedding vectors for each input text.
+            List[List[float]]: Embedding vectors for each input text, in input order.
+        """
+        if not texts:
+            return []
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1:
+            return self._embed_batch(batches[0])
+
+        out = []
+        level = current_priority()
+        # `map` preserves the input order regardless of completion order.
+        for vectors in self._pool(level).map(lambda batch: self._embed_batch(batch, level), batches):
+            out.extend(vectors)
+        return out
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a list of texts without blocking the event loop.
+
+        Args:
+            texts (List[str]): List of strings to embed.
+
+        Returns:
+            List[List[float]]: Embedding vectors for each input text, in input order.
         """
+        if not hasattr(self.client, "embed_content_async"):
+            return await super().aembed(texts)
+        if not texts:
+            return []
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
         out = []
-        for t in texts:
-            e = genai.embed_content(model=self.model_name, content=t)
-            out.append(e["embedding"])
-        return out
\ No newline at end of file
+        for vectors in await asyncio.gather(*(self._aembed_batch(b) for b in batches)):
+            out.extend(vectors)
+        return out
@@ -1,9 +1,12 @@
 import os
+from contextlib import nullcontext
+from typing import Optional
 import google.generativeai as genai
 from core.llm import LLM
+from infra.scheduler import RateLimitScheduler
 
 class GeminiLLM(LLM):
-    def __init__(self, model_name: str = "gemini-1.5-pro"):
+    def __init__(self, model_name: str = "gemini-1.5-pro", scheduler: Optional[RateLimitScheduler] = None):
         """Gemini implementation of the LLM interface.
 
         This class wraps the Google Gemini Generative AI model to provide
@@ -12,6 +15,8 @@ class GeminiLLM(LLM):
         Args:
             model_name (str, optional): Name of the Gemini model to use. 
                 Defaults to "gemini-1.5-pro".
+            scheduler (RateLimitScheduler, optional): Admission control shared with the other providers of
+                the same API. A streamed generation holds its slot until the stream ends. Defaults to None.
 
         Raises:
             RuntimeError: If the environment variable `GEMINI_API_KEY` is missing.
@@ -21,6 +26,10 @@ class GeminiLLM(LLM):
             raise RuntimeError("GEMINI_API_KEY is missing")
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel(model_name)
+        self.scheduler = scheduler
+
+    def _slot(self):
+        return self.scheduler.slot() if self.scheduler is not None else nullcontext()
     
     def generate(self, prompt, **kwargs):
         """Generate text from the Gemini model given a prompt.
@@ -32,4 +41,39 @@ class GeminiLLM(LLM):
         Returns:
             str: Generated text response.
         """
-        return self.model.generate_content(prompt).text
\ No newline at end of file
+        with self._slot():
+            return self.model.generate_content(prompt).text
+
+    def generate_stream(self, prompt, **kwargs):
+        """Stream text from the Gemini model as it is generated.
+
+        Args:
+            prompt (str): Input prompt to guide the model's output.
+            **kwargs: Additional optional parameters to configure generation.
+
+        Yields:
+            str: Consecutive fragments of the generated text.
+        """
+        with self._slot():
+            for chunk in self.model.generate_content(prompt, stream=True):
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts (e.g. the final one carrying only the finish reason).
+                    continue
+                if text:
+                    yield text
+
+    async def agenerate(self, prompt, **kwargs):
+        """Generate text from the Gemini model without blocking the event loop.
+
+        Args:
+            prompt (str): Input prompt to guide the model's output.
+            **kwargs: Additional optional parameters to configure generation.
+
+        Returns:
+            str: Generated text response.
+        """
+        async with self.scheduler.aslot() if self.scheduler is not None else nullcontext():
+            response = await self.model.generate_content_async(prompt)
+        return response.text
@@ -0,0 +1,34 @@
+from typing import List
+from core.reranker import Reranker
+
+class CrossEncoderReranker(Reranker):
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", batch_size: int = 16,
+                 device: str = "cpu", max_length: int = 512):
+        """Reranker with a cross-encoder that reads the query and every passage together.
+
+        Much more accurate than the vector similarity of the retrieval, and much slower:
+        use it on a few dozen candidates. Requires the `sentence-transformers` package;
+        the model is downloaded on first use.
+
+        Args:
+            model_name (str, optional): Hugging Face cross-encoder. Defaults to "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                a small English model; use a multilingual one (e.g. "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+                for Spanish documents.
+            batch_size (int, optional): Pairs per forward pass. Defaults to 16.
+            device (str, optional): Torch device. Defaults to "cpu".
+            max_length (int, optional): Tokens per query-passage pair; longer pairs are truncated. Defaults to 512.
+        """
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError("El reranker cross-encoder requiere el paquete sentence-transformers") from e
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = CrossEncoder(model_name, device=device, max_length=max_length)
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        if not texts:
+            return []
+        scores = self.model.predict([(query, text) for text in texts], batch_size=self.batch_size,
+                                    show_progress_bar=False)
+        return [float(s) for s in scores]
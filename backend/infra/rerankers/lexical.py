@@ -0,0 +1,36 @@
+from typing import List, Set, Tuple
+from core.reranker import Reranker
+from services.lexical_index import tokenize
+
+class LexicalReranker(Reranker):
+    model_name = "lexical"
+
+    def __init__(self, bigram_weight: float = 0.5):
+        """Reranker by term overlap between the query and every passage.
+
+        A passage scores the fraction of the query terms it contains plus `bigram_weight`
+        times the fraction of consecutive query term pairs it contains in the same order,
+        so passages with the query's phrases rank above those with scattered words. It
+        needs no model and scores hundreds of passages in a millisecond.
+
+        Args:
+            bigram_weight (float, optional): Weight of the phrase overlap. Defaults to 0.5.
+        """
+        self.bigram_weight = bigram_weight
+
+    def _bigrams(self, tokens: List[str]) -> Set[Tuple[str, str]]:
+        return set(zip(tokens, tokens[1:]))
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        q_tokens = tokenize(query)
+        terms, bigrams = set(q_tokens), self._bigrams(q_tokens)
+        if not terms:
+            return [0.0] * len(texts)
+        scores = []
+        for text in texts:
+            tokens = tokenize(text)
+            score = len(terms & set(tokens)) / len(terms)
+            if bigrams:
+                score += self.bigram_weight * len(bigrams & self._bigrams(tokens)) / len(bigrams)
+            scores.append(score)
+        return scores
@@ -0,0 +1,253 @@
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+from core.scheduling import BACKGROUND, PRIORITY_NAMES, current_priority
+from services.metrics import (SCHEDULER_IN_FLIGHT, SCHEDULER_LIMIT, SCHEDULER_QUEUE_DEPTH, SCHEDULER_THROTTLED,
+                              SCHEDULER_WAIT_SECONDS)
+
+# HTTP status codes that mean "slow down" (quota exhausted / overloaded).
+THROTTLE_STATUS = (429, 503)
+
+def is_throttle(error: BaseException) -> bool:
+    """Whether a provider error is a rate-limit or overload response.
+
+    `google.api_core` exceptions expose the HTTP status in `code`.
+    """
+    code = getattr(error, "code", None)
+    code = getattr(code, "value", code)
+    return code in THROTTLE_STATUS
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "enqueued", "event", "loop", "future", "granted", "cancelled")
+
+    def __init__(self, priority: int, seq: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.seq = seq
+        self.enqueued = time.perf_counter()
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+        self.granted = False
+        self.cancelled = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class RateLimitScheduler:
+    def __init__(self, name: str = "gemini", requests_per_minute: float = 0, burst: Optional[int] = None,
+                 max_concurrency: int = 8, min_concurrency: int = 1, interactive_reserve: int = 1,
+                 cooldown_seconds: float = 2.0, is_throttle: Callable[[BaseException], bool] = is_throttle):
+        """Admission control for the calls to a rate-limited API, shared by every provider that uses it.
+
+        A call waits for a token of a token bucket (`requests_per_minute`, up to `burst`
+        tokens saved) and for a free slot of an adaptive concurrency limit. Waiting calls
+        are served by priority (`core.scheduling`), then in arrival order, and background
+        calls never take the last `interactive_reserve` slots, so an interactive query
+        only waits behind other interactive ones.
+
+        The concurrency limit follows AIMD: it grows by one slot per "limit" successful
+        calls, up to `max_concurrency`, and halves (down to `min_concurrency`) when a call
+        is throttled with 429/503, which also pauses every new call for `cooldown_seconds`.
+
+        Sync callers block in `slot`; coroutines await `aslot` without blocking the loop.
+
+        Args:
+            name (str, optional): Name in the metrics. Defaults to "gemini".
+            requests_per_minute (float, optional): Sustained request rate; 0 disables the token bucket. Defaults to 0.
+            burst (int, optional): Tokens that can be saved for a burst. Defaults to one second of requests (at least 1).
+            max_concurrency (int, optional): Upper bound of the concurrency limit. Defaults to 8.
+            min_concurrency (int, optional): Lower bound of the concurrency limit. Defaults to 1.
+            interactive_reserve (int, optional): Slots background calls cannot use. Defaults to 1.
+            cooldown_seconds (float, optional): Pause of new calls after a throttled one. Defaults to 2.0.
+            is_throttle (Callable[[BaseException], bool], optional): Tells rate-limit errors apart from the rest.
+                Defaults to checking for HTTP 429/503.
+        """
+        self.name = name
+        self.rate = requests_per_minute / 60.0
+        self.burst = burst if burst is not None else max(1, int(self.rate))
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.interactive_reserve = interactive_reserve
+        self.cooldown_seconds = cooldown_seconds
+        self.is_throttle = is_throttle
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.throttled = 0
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._wakeup: Optional[threading.Timer] = None
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._publish()
+
+    # State, always changed under the lock
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self._tokens = min(float(self.burst), self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _dispatch(self) -> None:
+        """Grant slots to waiters in priority order while tokens and slots last.
+
+        If the first waiter is blocked on time (the next token, the end of a cooldown), a
+        timer dispatches again then; when it waits for a slot, `release` does.
+        """
+        delay = self._grant()
+        if delay is not None and self._wakeup is None:
+            self._wakeup = threading.Timer(delay, self._wake)
+            self._wakeup.daemon = True
+            self._wakeup.start()
+
+    def _wake(self) -> None:
+        with self._lock:
+            self._wakeup = None
+            self._dispatch()
+            self._publish()
+
+    def _grant(self) -> Optional[float]:
+        self._refill(time.monotonic())
+        while self._waiters:
+            waiter = self._waiters[0]
+            if waiter.cancelled:
+                heapq.heappop(self._waiters)
+                continue
+            limit = int(self.limit)
+            if waiter.priority >= BACKGROUND:
+                # With a single slot left, background calls still get it: they must not starve.
+                limit = max(limit - self.interactive_reserve, 1)
+            if self.in_flight >= limit:
+                return None
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self.rate > 0 and self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            heapq.heappop(self._waiters)
+            if self.rate > 0:
+                self._tokens -= 1
+            self.in_flight += 1
+            waiter.granted = True
+            if waiter.loop is None:
+                waiter.event.set()
+            else:
+                waiter.loop.call_soon_threadsafe(self._resolve, waiter.future)
+        return None
+
+    @staticmethod
+    def _resolve(future: "asyncio.Future") -> None:
+        if not future.done():
+            future.set_result(None)
+
+    def _publish(self) -> None:
+        depth = {level: 0 for level in PRIORITY_NAMES}
+        for waiter in self._waiters:
+            if not waiter.cancelled:
+                depth[waiter.priority] = depth.get(waiter.priority, 0) + 1
+        for level, count in depth.items():
+            SCHEDULER_QUEUE_DEPTH.set(count, scheduler=self.name, priority=PRIORITY_NAMES.get(level, str(level)))
+        SCHEDULER_IN_FLIGHT.set(self.in_flight, scheduler=self.name)
+        SCHEDULER_LIMIT.set(int(self.limit), scheduler=self.name)
+
+    def _enqueue(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> _Waiter:
+        waiter = _Waiter(current_priority(), next(self._seq), loop)
+        with self._lock:
+            heapq.heappush(self._waiters, waiter)
+            self._dispatch()
+            self._publish()
+        return waiter
+
+    def _granted(self, waiter: _Waiter) -> None:
+        SCHEDULER_WAIT_SECONDS.observe(time.perf_counter() - waiter.enqueued, scheduler=self.name,
+                                       priority=PRIORITY_NAMES.get(waiter.priority, str(waiter.priority)))
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Give up waiting: leave the queue, or hand the slot back if it was granted meanwhile."""
+        with self._lock:
+            if waiter.granted:
+                self.in_flight -= 1
+            waiter.cancelled = True
+            self._dispatch()
+            self._publish()
+
+    def release(self, throttled: bool = False) -> None:
+        """Hand back the slot of a finished call and adapt the concurrency limit.
+
+        Args:
+            throttled (bool, optional): Whether the call was rejected with a rate-limit error. Defaults to False.
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                SCHEDULER_THROTTLED.inc(scheduler=self.name)
+                self.limit = max(float(self.min_concurrency), self.limit / 2)
+                self._paused_until = time.monotonic() + self.cooldown_seconds
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self._dispatch()
+            self._publish()
+
+    # Callers
+
+    def acquire(self) -> None:
+        """Block until the current context may make a call. Pair with `release`."""
+        waiter = self._enqueue()
+        try:
+            waiter.event.wait()
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        self._granted(waiter)
+
+    async def aacquire(self) -> None:
+        """Async variant of `acquire`."""
+        waiter = self._enqueue(asyncio.get_running_loop())
+        try:
+            await waiter.future
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        self._granted(waiter)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Run the enclosed provider call under the scheduler, reporting rate-limit errors."""
+        self.acquire()
+        try:
+            yield
+        except BaseException as e:
+            self.release(throttled=self.is_throttle(e))
+            raise
+        self.release()
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        """Async variant of `slot`."""
+        await self.aacquire()
+        try:
+            yield
+        except BaseException as e:
+            self.release(throttled=self.is_throttle(e))
+            raise
+        self.release()
+
+    def stats(self) -> dict:
+        """Current state of the scheduler.
+
+        Returns:
+            dict: concurrency limit, calls in flight, waiting calls and throttled calls so far.
+        """
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "waiting": sum(1 for w in self._waiters if not w.cancelled),
+                "throttled": self.throttled,
+            }
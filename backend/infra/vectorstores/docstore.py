@@ -0,0 +1,273 @@
+import os
+import json
+import mmap
+import zlib
+import atexit
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+class DocStore:
+    def __init__(self, path: str = os.path.join("data", "docstore"), hot_size: int = 2048,
+                 compression_level: int = 6, autosave_seconds: float = 1.0):
+        """On-disk store of chunk texts keyed by chunk ID, for vector stores that keep them out of their payloads.
+
+        Texts are zlib-compressed and appended to a data file, which is memory-mapped for
+        reading: a lookup decompresses straight from the mapped pages, with no read call
+        nor intermediate copy. The offsets live in `index.json`, saved shortly after the
+        last change and at interpreter exit. The `hot_size` most recently read texts are
+        also kept decompressed in a per-process LRU.
+
+        Deleted texts leave garbage in the data file; the live records are copied to a new
+        one when the garbage outgrows the live data.
+
+        During a build (`begin_build`) deletes are deferred: the live collection may still
+        serve those chunks. `commit_build` keeps only the texts written during the build,
+        `abort_build` drops the ones the build added.
+
+        Args:
+            path (str, optional): Directory of the store files. Defaults to "data/docstore".
+            hot_size (int, optional): Decompressed texts kept in memory. Defaults to 2048.
+            compression_level (int, optional): zlib level, 1 (fastest) to 9 (smallest). Defaults to 6.
+            autosave_seconds (float, optional): Delay after the last write before saving the index. Defaults to 1.0.
+        """
+        self.path = path
+        self.hot_size = hot_size
+        self.compression_level = compression_level
+        self.autosave_seconds = autosave_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self._hot: "OrderedDict[str, str]" = OrderedDict()
+        self._mm: Optional[mmap.mmap] = None
+        self._build_ids: Optional[Set[str]] = None
+        self._build_new: Set[str] = set()
+        os.makedirs(path, exist_ok=True)
+        self._load()
+        atexit.register(self.flush)
+
+    # Persistence
+
+    def _files(self) -> Tuple[str, str]:
+        return os.path.join(self.path, self._data_name), os.path.join(self.path, "index.json")
+
+    def _load(self) -> None:
+        # Generation 0 is `texts.bin`; every compaction writes the next generation under a new name.
+        self._generation = 0
+        self._data_name = "texts.bin"
+        self._index: Dict[str, Tuple[int, int]] = {}
+        index_path = os.path.join(self.path, "index.json")
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if isinstance(saved.get("records"), dict):
+                self._generation, self._data_name = saved["generation"], saved["data"]
+                saved = saved["records"]
+            self._index = {doc_id: (offset, length) for doc_id, (offset, length) in saved.items()}
+        data_path, _ = self._files()
+        self._end = max((offset + length for offset, length in self._index.values()), default=0)
+        self._live_bytes = sum(length for _, length in self._index.values())
+        if os.path.exists(data_path) and os.path.getsize(data_path) > self._end:
+            # Records appended after the last saved index (e.g. before a crash) are unreachable.
+            with open(data_path, "r+b") as f:
+                f.truncate(self._end)
+        self._remove_stale_data()
+
+    def _remove_stale_data(self) -> None:
+        """Delete data files of other generations: replaced by a compaction, or written by one
+        whose index was never saved."""
+        for name in os.listdir(self.path):
+            if name != self._data_name and name.startswith("texts.") and name.endswith(".bin"):
+                os.remove(os.path.join(self.path, name))
+
+    def flush(self) -> None:
+        """Save the index, compacting the data file first if it is mostly garbage.
+
+        A compaction writes a new data file; the saved index names the file its offsets refer
+        to, so a crash at any point leaves a consistent pair on disk.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            compacted = self._end - self._live_bytes > max(self._live_bytes, 1 << 20)
+            if compacted:
+                self._compact()
+            _, index_path = self._files()
+            with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"generation": self._generation, "data": self._data_name, "records": self._index}, f)
+            os.replace(index_path + ".tmp", index_path)
+            if compacted:
+                self._remove_stale_data()
+            self._dirty = False
+
+    def _changed(self) -> None:
+        """Mark the index as modified and (re)schedule the autosave."""
+        self._dirty = True
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.autosave_seconds, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _compact(self) -> None:
+        """Write the live records to the data file of the next generation and switch to it.
+        The previous file stays on disk until the index pointing to the new one is saved."""
+        view = self._view()
+        generation = self._generation + 1
+        data_name = f"texts.{generation}.bin"
+        index = {}
+        with open(os.path.join(self.path, data_name), "wb") as f:
+            offset = 0
+            for doc_id, (start, length) in sorted(self._index.items(), key=lambda item: item[1][0]):
+                f.write(view[start:start + length])
+                index[doc_id] = (offset, length)
+                offset += length
+        self._close_map()
+        self._generation, self._data_name = generation, data_name
+        self._index, self._end, self._live_bytes = index, offset, offset
+
+    def _close_map(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def _view(self) -> mmap.mmap:
+        """Memory map of the data file, remapped when it grew since the last one."""
+        if self._mm is None or len(self._mm) < self._end:
+            self._close_map()
+            data_path, _ = self._files()
+            with open(data_path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    # Texts
+
+    def put(self, ids: List[str], texts: List[str]) -> None:
+        """Store (or replace) the texts of some chunks.
+
+        Args:
+            ids (List[str]): Chunk IDs.
+            texts (List[str]): Text of every chunk.
+        """
+        if not ids:
+            return
+        records = [zlib.compress(text.encode("utf-8"), self.compression_level) for text in texts]
+        data_path, _ = self._files()
+        with self._lock:
+            with open(data_path, "ab") as f:
+                for doc_id, text, record in zip(ids, texts, records):
+                    if self._build_ids is not None:
+                        self._build_ids.add(doc_id)
+                        if doc_id not in self._index:
+                            self._build_new.add(doc_id)
+                    old = self._index.get(doc_id)
+                    if old is not None:
+                        self._live_bytes -= old[1]
+                    f.write(record)
+                    self._index[doc_id] = (self._end, len(record))
+                    self._end += len(record)
+                    self._live_bytes += len(record)
+                    if doc_id in self._hot:
+                        self._hot[doc_id] = text
+            self._changed()
+
+    def get(self, ids: Iterable[str]) -> List[Optional[str]]:
+        """Texts of some chunks.
+
+        Args:
+            ids (Iterable[str]): Chunk IDs.
+
+        Returns:
+            List[Optional[str]]: The text of every chunk, or None for unknown IDs.
+        """
+        out = []
+        with self._lock:
+            for doc_id in ids:
+                text = self._hot.get(doc_id)
+                if text is not None:
+                    self.hits += 1
+                    self._hot.move_to_end(doc_id)
+                    out.append(text)
+                    continue
+                self.misses += 1
+                location = self._index.get(doc_id)
+                if location is None:
+                    out.append(None)
+                    continue
+                offset, length = location
+                with memoryview(self._view()) as view:
+                    text = zlib.decompress(view[offset:offset + length]).decode("utf-8")
+                if self.hot_size > 0:
+                    self._hot[doc_id] = text
+                    while len(self._hot) > self.hot_size:
+                        self._hot.popitem(last=False)
+                out.append(text)
+        return out
+
+    def _drop(self, ids: Iterable[str]) -> None:
+        for doc_id in ids:
+            location = self._index.pop(doc_id, None)
+            if location is not None:
+                self._live_bytes -= location[1]
+            self._hot.pop(doc_id, None)
+
+    def delete(self, ids: List[str]) -> None:
+        """Forget the texts of some chunks. Deferred to `commit_build` during a build, except for chunks
+        the build added."""
+        with self._lock:
+            if self._build_ids is not None:
+                ids = [doc_id for doc_id in ids if doc_id in self._build_new]
+                self._build_ids.difference_update(ids)
+                self._build_new.difference_update(ids)
+            if ids:
+                self._drop(ids)
+                self._changed()
+
+    def begin_build(self) -> None:
+        """Start tracking the texts written by a build."""
+        with self._lock:
+            self._build_ids, self._build_new = set(), set()
+
+    def commit_build(self) -> None:
+        """Keep only the texts written since `begin_build`."""
+        with self._lock:
+            if self._build_ids is None:
+                return
+            self._drop([doc_id for doc_id in self._index if doc_id not in self._build_ids])
+            self._build_ids, self._build_new = None, set()
+            self._changed()
+        self.flush()
+
+    def abort_build(self) -> None:
+        """Drop the texts a build added; texts it rewrote keep their new (identical) content."""
+        with self._lock:
+            if self._build_ids is None:
+                return
+            self._drop(self._build_new)
+            self._build_ids, self._build_new = None, set()
+            self._changed()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
+
+    def stats(self) -> Dict[str, object]:
+        """Counters of the store.
+
+        Returns:
+            Dict[str, object]: texts stored, compressed bytes (live and on disk), and hot cache hits,
+                misses and hit rate.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "live_bytes": self._live_bytes,
+                "file_bytes": self._end,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else None,
+            }
@@ -0,0 +1,398 @@
+import os
+import json
+import shutil
+import uuid
+import atexit
+import threading
+from typing import List, Dict, Any, Optional
+import numpy as np
+from core.vectorstore import VectorStore
+
+class LocalStore(VectorStore):
+    def __init__(self, path: str = os.path.join("data", "vectorstore"), index: str = "exact",
+                 nlist: Optional[int] = None, nprobe: int = 8, ivf_min_size: int = 4096,
+                 autosave_seconds: float = 1.0):
+        """In-process VectorStore backed by a NumPy float32 matrix.
+
+        Vectors are L2-normalized on insertion, so cosine similarity is a plain dot
+        product and a query is one matrix-vector product plus an `argpartition` top-k.
+        The matrix is persisted to `vectors.npy` (memory-mapped on load) and texts and
+        metadata to `payloads.jsonl` in `path`. Writes are saved shortly after the last
+        change and at interpreter exit.
+
+        A build (`begin_build`) collects writes in a separate store under `<path>.build`;
+        `commit_build` swaps it in under the lock, so queries see either the old or the
+        new content, never a partial one.
+
+        With `index="ivf"` and more than `ivf_min_size` vectors, the rows are clustered
+        with spherical k-means into `nlist` lists and a query only scans the `nprobe`
+        lists closest to it. Smaller collections are always searched exactly.
+
+        Args:
+            path (str, optional): Directory holding the persisted files. Defaults to "data/vectorstore".
+            index (str, optional): "exact" or "ivf". Defaults to "exact".
+            nlist (int, optional): Number of IVF lists. Defaults to sqrt(n).
+            nprobe (int, optional): IVF lists scanned per query. Defaults to 8.
+            ivf_min_size (int, optional): Minimum number of vectors to use the IVF index. Defaults to 4096.
+            autosave_seconds (float, optional): Delay after the last write before saving to disk. Defaults to 1.0.
+
+        Raises:
+            ValueError: If `index` is not supported.
+        """
+        if index not in ("exact", "ivf"):
+            raise ValueError(f"LocalStore index not supported: {index}")
+        self.path = path
+        self.index = index
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.ivf_min_size = ivf_min_size
+        self.autosave_seconds = autosave_seconds
+
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self._ivf = None
+        self._by_source: Dict[str, np.ndarray] = {}
+        self._build: Optional["LocalStore"] = None
+        self._load()
+        atexit.register(self.flush)
+
+    # Persistence
+
+    def _files(self):
+        return os.path.join(self.path, "vectors.npy"), os.path.join(self.path, "payloads.jsonl")
+
+    def _load(self) -> None:
+        vectors_path, payloads_path = self._files()
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metas: List[Dict[str, Any]] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        if os.path.exists(vectors_path) and os.path.exists(payloads_path):
+            # Read-only memory map; it is copied to RAM on the first write.
+            self._matrix = np.load(vectors_path, mmap_mode="r")
+            with open(payloads_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    row = json.loads(line)
+                    self._ids.append(row["id"])
+                    self._texts.append(row["text"])
+                    self._metas.append(row["metadata"])
+        self._rows = {pid: i for i, pid in enumerate(self._ids)}
+
+    def flush(self) -> None:
+        """Write pending changes to disk."""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            vectors_path, payloads_path = self._files()
+            n = len(self._ids)
+            with open(vectors_path + ".tmp", "wb") as f:
+                np.save(f, np.ascontiguousarray(self._matrix[:n]))
+            with open(payloads_path + ".tmp", "w", encoding="utf-8") as f:
+                for pid, text, meta in zip(self._ids, self._texts, self._metas):
+                    f.write(json.dumps({"id": pid, "text": text, "metadata": meta}, ensure_ascii=False) + "\n")
+            os.replace(vectors_path + ".tmp", vectors_path)
+            os.replace(payloads_path + ".tmp", payloads_path)
+            self._dirty = False
+
+    def _changed(self) -> None:
+        """Mark the store as modified and (re)schedule the autosave."""
+        self._dirty = True
+        self._ivf = None
+        self._by_source = {}
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.autosave_seconds, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _writable(self, dim: int, needed: int) -> None:
+        """Make sure the matrix is an in-RAM array with room for `needed` rows."""
+        n = len(self._ids)
+        if self._matrix.shape[1] == 0:
+            self._matrix = np.zeros((0, dim), dtype=np.float32)
+        if self._matrix.shape[1] != dim:
+            raise ValueError(f"Embedding size {dim} does not match the store ({self._matrix.shape[1]})")
+        if isinstance(self._matrix, np.memmap) or self._matrix.shape[0] < needed:
+            # Capacity doubles so appending batches is amortized O(1) per row.
+            capacity = max(needed, 2 * self._matrix.shape[0], 64)
+            grown = np.zeros((capacity, dim), dtype=np.float32)
+            grown[:n] = self._matrix[:n]
+            self._matrix = grown
+
+    # VectorStore
+
+    def add_texts(self, texts: List[str], metadatas: List[Dict[str, Any]], embeddings: List[List[float]],
+                  ids: Optional[List[str]] = None) -> List[str]:
+        """Add a batch of texts, metadata, and embeddings. Existing IDs are replaced.
+
+        Args:
+            texts (List[str]): List of documents to store.
+            metadatas (List[Dict[str, Any]]): Metadata dictionaries corresponding to each text.
+            embeddings (List[List[float]]): Embedding vectors corresponding to each text.
+            ids (List[str], optional): IDs to store the documents under. Random UUIDs are generated if omitted.
+
+        Returns:
+            List[str]: A list of unique IDs assigned to the stored documents.
+        """
+        if self._build is not None:
+            return self._build.add_texts(texts, metadatas, embeddings, ids)
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        if not ids:
+            return ids
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1.0)
+
+        with self._lock:
+            self._writable(vectors.shape[1], len(self._ids) + len(ids))
+            for pid, text, meta, vec in zip(ids, texts, metadatas, vectors):
+                row = self._rows.get(pid)
+                if row is None:
+                    row = len(self._ids)
+                    self._rows[pid] = row
+                    self._ids.append(pid)
+                    self._texts.append(text)
+                    self._metas.append(dict(meta))
+                else:
+                    self._texts[row] = text
+                    self._metas[row] = dict(meta)
+                self._matrix[row] = vec
+            self._changed()
+        return ids
+
+    def query(self, query_embedding: List[float], k: int = 4, source: Optional[str] = None) -> Dict[str, Any]:
+        """Search for the most similar documents.
+
+        Args:
+            query_embedding (List[float]): Embedding vector of the query.
+            k (int, optional): Number of top results to return. Defaults to 4.
+            source (str, optional): Only search documents whose "source" metadata equals this value.
+
+        Returns:
+            Dict[str, Any]: Dictionary with search results containing:
+                - "ids" (List[str]): IDs of the retrieved documents.
+                - "documents" (List[str]): Retrieved texts.
+                - "metadatas" (List[Dict[str, Any]]): Associated metadata for each result.
+                - "distances" (List[float]): Cosine similarities (higher is more similar).
+        """
+        with self._lock:
+            n = len(self._ids)
+            if n == 0 or k <= 0:
+                return {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            q = np.asarray(query_embedding, dtype=np.float32)
+            q = q / (np.linalg.norm(q) or 1.0)
+
+            # A source filter already narrows the search to one document: score its rows
+            # exactly rather than losing those outside the probed IVF lists.
+            if source is not None:
+                candidates = self._source_rows(source)
+            elif self.index == "ivf" and n >= self.ivf_min_size:
+                candidates = self._ivf_candidates(q)
+            else:
+                candidates = None
+            if candidates is not None and len(candidates) == 0:
+                return {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            if candidates is None:
+                rows, scores = self._top_k(self._matrix[:n] @ q, k)
+            else:
+                local, scores = self._top_k(self._matrix[candidates] @ q, k)
+                rows = candidates[local]
+            return self._result(rows, scores)
+
+    def query_batch(self, query_embeddings: List[List[float]], k: int = 4,
+                    source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Search for several query embeddings with a single matrix-matrix product.
+
+        Args:
+            query_embeddings (List[List[float]]): Embedding vectors of the queries.
+            k (int, optional): Number of top results to return per query. Defaults to 4.
+            source (str, optional): Only search documents whose "source" metadata equals this value.
+
+        Returns:
+            List[Dict[str, Any]]: One result, with the structure of `query`, per embedding.
+        """
+        with self._lock:
+            n = len(self._ids)
+            if n == 0 or k <= 0 or not query_embeddings or source is not None or \
+                    (self.index == "ivf" and n >= self.ivf_min_size):
+                return [self.query(q, k=k, source=source) for q in query_embeddings]
+            queries = np.asarray(query_embeddings, dtype=np.float32)
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            queries /= np.where(norms > 0, norms, 1.0)
+            scores = queries @ self._matrix[:n].T
+            return [self._result(*self._top_k(row, k)) for row in scores]
+
+    def _result(self, rows: np.ndarray, scores: np.ndarray) -> Dict[str, Any]:
+        return {
+            "ids": [self._ids[i] for i in rows],
+            "documents": [self._texts[i] for i in rows],
+            "metadatas": [dict(self._metas[i]) for i in rows],
+            "distances": [float(s) for s in scores],
+        }
+
+    def _source_rows(self, source: str) -> np.ndarray:
+        """Rows whose "source" metadata is `source`, cached until the next write."""
+        rows = self._by_source.get(source)
+        if rows is None:
+            rows = np.flatnonzero([meta.get("source") == source for meta in self._metas])
+            self._by_source[source] = rows
+        return rows
+
+    def _top_k(self, scores: np.ndarray, k: int):
+        """Indices and values of the `k` largest scores, best first."""
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top, scores[top]
+
+    def _ivf_candidates(self, q: np.ndarray) -> np.ndarray:
+        """Rows stored in the `nprobe` IVF lists closest to the query."""
+        if self._ivf is None:
+            self._ivf = self._build_ivf()
+        centroids, lists = self._ivf
+        probe = np.argsort(-(centroids @ q))[:self.nprobe]
+        return np.concatenate([lists[c] for c in probe])
+
+    def _build_ivf(self, iterations: int = 10):
+        """Cluster the rows with spherical k-means.
+
+        Returns:
+            Tuple[np.ndarray, List[np.ndarray]]: Centroids and the rows of every list.
+        """
+        n = len(self._ids)
+        data = self._matrix[:n]
+        nlist = self.nlist or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(0)
+        centroids = data[rng.choice(n, size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = data[assign == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+        assign = np.argmax(data @ centroids.T, axis=1)
+        lists = [np.flatnonzero(assign == c) for c in range(nlist)]
+        return centroids, lists
+
+    def get_texts(self, ids: List[str]) -> List[Optional[str]]:
+        """Texts of stored documents, or None for unknown IDs.
+
+        Args:
+            ids (List[str]): IDs of the documents.
+
+        Returns:
+            List[Optional[str]]: The text of every document.
+        """
+        with self._lock:
+            return [self._texts[self._rows[pid]] if pid in self._rows else None for pid in ids]
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete documents by ID. The last row is moved into every freed slot.
+
+        Args:
+            ids (List[str]): IDs of the documents to delete.
+        """
+        if self._build is not None:
+            return self._build.delete(ids)
+        with self._lock:
+            targets = list(dict.fromkeys(pid for pid in ids if pid in self._rows))
+            if not targets:
+                return
+            self._writable(self._matrix.shape[1], len(self._ids))
+            for pid in targets:
+                row = self._rows.pop(pid)
+                last = len(self._ids) - 1
+                if row != last:
+                    moved = self._ids[last]
+                    self._ids[row], self._texts[row], self._metas[row] = moved, self._texts[last], self._metas[last]
+                    self._matrix[row] = self._matrix[last]
+                    self._rows[moved] = row
+                self._ids.pop()
+                self._texts.pop()
+                self._metas.pop()
+            self._changed()
+
+    def delete_source(self, source: str) -> None:
+        """Delete every document whose "source" metadata is `source`.
+
+        Args:
+            source (str): Source of the documents to delete.
+        """
+        if self._build is not None:
+            return self._build.delete_source(source)
+        with self._lock:
+            self.delete([self._ids[row] for row in self._source_rows(source)])
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Replace the metadata of stored documents.
+
+        Args:
+            ids (List[str]): IDs of the documents to update.
+            metadatas (List[Dict[str, Any]]): New metadata for each document.
+        """
+        if self._build is not None:
+            return self._build.update_metadata(ids, metadatas)
+        with self._lock:
+            for pid, meta in zip(ids, metadatas):
+                row = self._rows.get(pid)
+                if row is not None:
+                    self._metas[row] = dict(meta)
+            self._changed()
+
+    def begin_build(self) -> None:
+        """Send every write to a new, empty store until `commit_build`.
+
+        Raises:
+            RuntimeError: If a build is already in progress.
+        """
+        if self._build is not None:
+            raise RuntimeError(f"A build of '{self.path}' is already in progress")
+        build_path = self.path + ".build"
+        shutil.rmtree(build_path, ignore_errors=True)
+        self._build = LocalStore(build_path, self.index, self.nlist, self.nprobe, self.ivf_min_size, self.autosave_seconds)
+
+    def commit_build(self) -> None:
+        """Replace the content of the store with the one built, in memory and on disk."""
+        build = self._build
+        if build is None:
+            return
+        with self._lock, build._lock:
+            if build._timer is not None:
+                build._timer.cancel()
+            build._dirty = False
+            self._ids, self._texts, self._metas = build._ids, build._texts, build._metas
+            self._matrix, self._rows = build._matrix, build._rows
+            self._build = None
+            self._changed()
+        self.flush()
+        shutil.rmtree(build.path, ignore_errors=True)
+
+    def abort_build(self) -> None:
+        """Discard the store being built."""
+        build = self._build
+        if build is None:
+            return
+        with build._lock:
+            if build._timer is not None:
+                build._timer.cancel()
+            build._dirty = False
+        self._build = None
+        shutil.rmtree(build.path, ignore_errors=True)
+
+    def reset(self) -> None:
+        """Remove every document, in memory and on disk."""
+        self.abort_build()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            for file in self._files():
+                if os.path.exists(file):
+                    os.remove(file)
+            self._dirty = False
+            self._ivf = None
+            self._by_source = {}
+            self._load()
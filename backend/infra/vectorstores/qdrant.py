@@ -1,107 +1,475 @@
 import uuid, os
-from typing import List, Dict, Any
-from qdrant_client import QdrantClient, models
+from typing import List, Dict, Any, Optional
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
 from core.vectorstore import VectorStore # Asumo que esta es tu clase base
+from infra.vectorstores.docstore import DocStore
 
 class QdrantStore(VectorStore):
-    def __init__(self, collection_name: str = "thesis", vector_size: int = 768):
+    def __init__(self, collection_name: str = "thesis", vector_size: int = 768,
+                 quantization: Optional[str] = None, oversampling: float = 2.0, rescore: bool = True,
+                 hnsw_m: Optional[int] = None, hnsw_ef_construct: Optional[int] = None, hnsw_ef: Optional[int] = None,
+                 keep_versions: int = 1, docstore: Optional[DocStore] = None):
         """Qdrant-based implementation of a VectorStore.
 
         This class wraps the Qdrant client to provide storage, search, and reset 
         functionality for embeddings and their associated metadata.
 
+        Full-precision vectors are kept on disk. With `quantization`, a compressed copy
+        is kept in RAM and searched first; `oversampling * k` candidates are then
+        rescored with the original vectors.
+
+        `collection_name` is an alias of a versioned collection (`<name>_v<n>`). A
+        build (`begin_build`) writes into a new version, waiting for every write, and
+        `commit_build` switches the alias to it in a single atomic operation, then drops
+        old versions. A collection created before versioning, named `collection_name`
+        itself, keeps working and is replaced by the alias on the first commit; that one
+        switch is not atomic for other clients (see `_switch_alias`).
+
+        With a `docstore`, point payloads only hold the chunk metadata and the texts are
+        kept in the docstore, keyed by point ID; search responses are smaller and the
+        texts are read back from its memory map. Points written before the docstore was
+        configured keep their text in the payload and are still read from it. Texts of
+        previous versions are not kept after a commit.
+
+        The client connects to `QDRANT_URL`; without it, to an embedded Qdrant stored under
+        `QDRANT_PATH`, for development without a server.
+
         Args:
             collection_name (str, optional): Name of the Qdrant collection. Defaults to "thesis".
             vector_size (int, optional): Dimension of the embedding vectors. Defaults to 768.
+            quantization (str, optional): "scalar" (int8) or "binary". No quantization if None.
+            oversampling (float, optional): Candidate multiplier for quantized search. Defaults to 2.0.
+            rescore (bool, optional): Rescore quantized candidates with full-precision vectors. Defaults to True.
+            hnsw_m (int, optional): Edges per node of the HNSW graph. Qdrant default if None.
+            hnsw_ef_construct (int, optional): Candidate list size while building the graph. Qdrant default if None.
+            hnsw_ef (int, optional): Candidate list size at search time. Qdrant default if None.
+            keep_versions (int, optional): Previous versions kept after a commit, e.g. for queries still
+                running against them or a manual rollback. Defaults to 1.
+            docstore (DocStore, optional): Store of the chunk texts. Texts go into the payloads if None.
+
+        Raises:
+            ValueError: If `quantization` is not supported.
         """
+        if quantization not in (None, "scalar", "binary"):
+            raise ValueError(f"Quantization not supported: {quantization}")
         self.collection_name = collection_name
         self.vector_size = vector_size
+        self.quantization = quantization
+        self.oversampling = oversampling
+        self.rescore = rescore
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+        self.hnsw_ef = hnsw_ef
+        self.keep_versions = keep_versions
+        self.docstore = docstore
+        self._build_collection: Optional[str] = None
+        # Collection searched instead of the alias while a pre-versioning collection is replaced.
+        self._read_collection: Optional[str] = None
 
         url = os.getenv("QDRANT_URL")
-        self.client = QdrantClient(url=url)
-
-        existing_collections = [c.name for c in self.client.get_collections().collections]
-
-        if self.collection_name not in existing_collections:
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=models.VectorParams(
-                    size=self.vector_size,
-                    distance=models.Distance.COSINE,
-                    on_disk=True
-                )
+        # The embedded mode locks its directory: the async API runs the sync client in a thread instead.
+        self._path = os.getenv("QDRANT_PATH") if not url else None
+        self.client = QdrantClient(url=url) if self._path is None else QdrantClient(path=self._path)
+        # The async client is only created when the async API is first used.
+        self._url = url
+        self._aclient: Optional[AsyncQdrantClient] = None
+
+        live = self._live_collection()
+        if live is None:
+            version = self._next_version()
+            self._create_collection(version)
+            self._switch_alias(version)
+            return
+        self._create_payload_indexes(live)
+        if self.quantization or self.hnsw_m or self.hnsw_ef_construct:
+            # Apply the configured index settings to a collection created before they were set.
+            self.client.update_collection(
+                collection_name=live,
+                hnsw_config=self._hnsw_config(),
+                quantization_config=self._quantization_config(),
+            )
+
+    def _aliases(self) -> Dict[str, str]:
+        return {a.alias_name: a.collection_name for a in self.client.get_aliases().aliases}
+
+    def _collections(self) -> List[str]:
+        return [c.name for c in self.client.get_collections().collections]
+
+    def _live_collection(self) -> Optional[str]:
+        """Name of the collection queries currently hit, or None if there is none yet."""
+        aliases = self._aliases()
+        if self.collection_name in aliases:
+            return aliases[self.collection_name]
+        if self.collection_name in self._collections():
+            return self.collection_name
+        return None
+
+    def _versions(self) -> List[str]:
+        """Versioned collections of this store, oldest first."""
+        prefix = f"{self.collection_name}_v"
+        versions = [name for name in self._collections() if name.startswith(prefix) and name[len(prefix):].isdigit()]
+        return sorted(versions, key=lambda name: int(name[len(prefix):]))
+
+    def _next_version(self) -> str:
+        versions = self._versions()
+        last = int(versions[-1].rsplit("_v", 1)[1]) if versions else 0
+        return f"{self.collection_name}_v{last + 1}"
+
+    def _switch_alias(self, collection: str) -> None:
+        """Point the alias to `collection`.
+
+        Moving an existing alias is a single atomic operation. A collection created before
+        versioning has to be deleted before an alias can take its name: this store searches
+        `collection` directly until the alias exists, but other clients of the collection
+        find nothing in between.
+        """
+        operations = []
+        legacy = False
+        if self.collection_name in self._aliases():
+            operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=self.collection_name)))
+        elif self.collection_name in self._collections():
+            legacy = True
+        operations.append(models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=collection, alias_name=self.collection_name)
+        ))
+        if not legacy:
+            self.client.update_collection_aliases(change_aliases_operations=operations)
+            return
+        print(f"[Qdrant] reemplazando la colección '{self.collection_name}' (sin versiones) por un alias a '{collection}'")
+        self._read_collection = collection
+        try:
+            self.client.delete_collection(collection_name=self.collection_name)
+            self.client.update_collection_aliases(change_aliases_operations=operations)
+        finally:
+            self._read_collection = None
+
+    @property
+    def _search_collection(self) -> str:
+        """Collection searched: the alias, or the new version while it replaces a pre-versioning collection."""
+        return self._read_collection or self.collection_name
+
+    @property
+    def _write_collection(self) -> str:
+        """Collection written to: the version being built, if any, otherwise the live one (through the alias)."""
+        return self._build_collection or self.collection_name
+
+    @property
+    def _building(self) -> bool:
+        """Whether a build is in progress. Its writes are waited for, so `commit_build` never exposes a
+        version with writes still pending; other writes are applied in the background."""
+        return self._build_collection is not None
+
+    def begin_build(self) -> None:
+        """Create a new version of the collection and send every write to it until `commit_build`.
+
+        Raises:
+            RuntimeError: If a build is already in progress.
+        """
+        if self._build_collection is not None:
+            raise RuntimeError(f"A build of '{self.collection_name}' is already in progress")
+        version = self._next_version()
+        self._create_collection(version)
+        self._build_collection = version
+        if self.docstore is not None:
+            self.docstore.begin_build()
+
+    def commit_build(self) -> None:
+        """Switch the alias to the version being built and drop versions older than `keep_versions`.
+
+        Every write of the build was waited for, so the version is complete when the alias moves.
+        """
+        version = self._build_collection
+        if version is None:
+            return
+        # The texts of the build are on disk before the alias makes it live.
+        self.flush()
+        self._switch_alias(version)
+        self._build_collection = None
+        if self.docstore is not None:
+            self.docstore.commit_build()
+
+        previous = [name for name in self._versions() if name != version]
+        for name in previous[:max(len(previous) - self.keep_versions, 0)]:
+            self.client.delete_collection(collection_name=name)
+
+    def abort_build(self) -> None:
+        """Delete the version being built."""
+        if self._build_collection is not None:
+            self.client.delete_collection(collection_name=self._build_collection)
+            self._build_collection = None
+            if self.docstore is not None:
+                self.docstore.abort_build()
+
+    def _quantization_config(self) -> Optional[models.QuantizationConfig]:
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
             )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    def _hnsw_config(self) -> Optional[models.HnswConfigDiff]:
+        if self.hnsw_m is None and self.hnsw_ef_construct is None:
+            return None
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def _search_params(self) -> Optional[models.SearchParams]:
+        if self.quantization is None and self.hnsw_ef is None:
+            return None
+        quantization = None
+        if self.quantization is not None:
+            quantization = models.QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+        return models.SearchParams(hnsw_ef=self.hnsw_ef, quantization=quantization)
 
-    def add_texts(self, texts: List[str], metadatas: List[Dict[str, Any]], embeddings: List[List[float]]) -> List[str]:
+    def _create_collection(self, collection: str) -> None:
+        """Create a collection with the configured vector size, HNSW and quantization settings."""
+        self.client.create_collection(
+            collection_name=collection,
+            vectors_config=models.VectorParams(
+                size=self.vector_size,
+                distance=models.Distance.COSINE,
+                on_disk=True
+            ),
+            hnsw_config=self._hnsw_config(),
+            quantization_config=self._quantization_config(),
+        )
+        self._create_payload_indexes(collection)
+
+    def _create_payload_indexes(self, collection: str) -> None:
+        """Index the "source" payload field, so searches filtered by document stay fast on large corpora."""
+        self.client.create_payload_index(
+            collection_name=collection,
+            field_name="source",
+            field_schema=models.PayloadSchemaType.KEYWORD,
+        )
+
+    def _filter(self, source: Optional[str]) -> Optional[models.Filter]:
+        if source is None:
+            return None
+        return models.Filter(must=[models.FieldCondition(key="source", match=models.MatchValue(value=source))])
+
+    def add_texts(self, texts: List[str], metadatas: List[Dict[str, Any]], embeddings: List[List[float]],
+                  ids: Optional[List[str]] = None) -> List[str]:
         """Add a batch of texts, metadata, and embeddings to the collection.
 
         Args:
             texts (List[str]): List of documents to store.
             metadatas (List[Dict[str, Any]]): Metadata dictionaries corresponding to each text.
             embeddings (List[List[float]]): Embedding vectors corresponding to each text.
+            ids (List[str], optional): UUID strings to store the points under. Random UUIDs are generated if omitted.
 
         Returns:
             List[str]: A list of unique IDs assigned to the stored documents.
         """
-        ids = [str(uuid.uuid4()) for _ in texts]
-        
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+
+        if self.docstore is not None:
+            # Texts first: a point must never be searchable without its text.
+            self.docstore.put(ids, texts)
+            payloads = [dict(meta) for meta in metadatas]
+        else:
+            payloads = [{**meta, "text": txt} for meta, txt in zip(metadatas, texts)]
         self.client.upsert(
-            collection_name=self.collection_name,
+            collection_name=self._write_collection,
             points=models.Batch(
                 ids=ids,
                 vectors=embeddings,
-                payloads=[{**meta, "text": txt} for meta, txt in zip(metadatas, texts)]
+                payloads=payloads
             ),
-            wait=False
+            wait=self._building
         )
         return ids
     
-    def query(self, query_embedding: List[float], k: int = 4) -> Dict[str, Any]:
+    def query(self, query_embedding: List[float], k: int = 4, source: Optional[str] = None) -> Dict[str, Any]:
         """Search for the most similar documents in the collection.
 
         Args:
             query_embedding (List[float]): Embedding vector of the query.
             k (int, optional): Number of top results to return. Defaults to 4.
+            source (str, optional): Only search points whose "source" payload equals this value.
 
         Returns:
             Dict[str, Any]: Dictionary with search results containing:
+                - "ids" (List[str]): IDs of the retrieved points.
                 - "documents" (List[str]): Retrieved texts.
                 - "metadatas" (List[Dict[str, Any]]): Associated metadata for each result.
                 - "distances" (List[float]): Similarity scores (higher is more similar).
         """
         search_result = self.client.search(
-            collection_name=self.collection_name,
+            collection_name=self._search_collection,
+            query_vector=query_embedding,
+            query_filter=self._filter(source),
+            limit=k,
+            search_params=self._search_params(),
+            with_payload=True,
+            with_vectors=False
+        )
+        return self._to_result(search_result)
+
+    def query_batch(self, query_embeddings: List[List[float]], k: int = 4,
+                    source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Search for several query embeddings in a single `search_batch` request.
+
+        Args:
+            query_embeddings (List[List[float]]): Embedding vectors of the queries.
+            k (int, optional): Number of top results to return per query. Defaults to 4.
+            source (str, optional): Only search points whose "source" payload equals this value.
+
+        Returns:
+            List[Dict[str, Any]]: One result, with the structure of `query`, per embedding.
+        """
+        if not query_embeddings:
+            return []
+        results = self.client.search_batch(
+            collection_name=self._search_collection,
+            requests=[
+                models.SearchRequest(vector=q, filter=self._filter(source), limit=k, params=self._search_params(),
+                                     with_payload=True, with_vector=False)
+                for q in query_embeddings
+            ]
+        )
+        return [self._to_result(hits) for hits in results]
+
+    async def aquery(self, query_embedding: List[float], k: int = 4, source: Optional[str] = None) -> Dict[str, Any]:
+        """Search for the most similar documents using the async Qdrant client.
+
+        Args:
+            query_embedding (List[float]): Embedding vector of the query.
+            k (int, optional): Number of top results to return. Defaults to 4.
+            source (str, optional): Only search points whose "source" payload equals this value.
+
+        Returns:
+            Dict[str, Any]: Same structure as `query`.
+        """
+        if self._path is not None:
+            return await super().aquery(query_embedding, k, source)
+        if self._aclient is None:
+            self._aclient = AsyncQdrantClient(url=self._url)
+        search_result = await self._aclient.search(
+            collection_name=self._search_collection,
             query_vector=query_embedding,
+            query_filter=self._filter(source),
             limit=k,
+            search_params=self._search_params(),
             with_payload=True,
             with_vectors=False
         )
-        
-        documents, metadatas, distances = [], [], []
+        return self._to_result(search_result)
+
+    def _to_result(self, search_result: List[models.ScoredPoint]) -> Dict[str, Any]:
+        """Convert Qdrant hits into the result dictionary of the VectorStore interface."""
+        ids, documents, metadatas, distances = [], [], [], []
         for hit in search_result:
             payload = hit.payload or {}
-            documents.append(payload.pop("text", ""))
+            ids.append(str(hit.id))
+            documents.append(payload.pop("text", None))
             metadatas.append(payload)
             distances.append(hit.score)
-            
+
+        missing = [i for i, text in enumerate(documents) if text is None]
+        if missing and self.docstore is not None:
+            for i, text in zip(missing, self.docstore.get([ids[i] for i in missing])):
+                documents[i] = text
+        documents = [text if text is not None else "" for text in documents]
+
         return {
+            "ids": ids,
             "documents": documents,
             "metadatas": metadatas,
             "distances": distances,
         }
     
-    def reset(self) -> None:
-        """Delete and recreate the collection.
+    def get_texts(self, ids: List[str]) -> List[Optional[str]]:
+        """Texts of points of the live collection, from the docstore or else from their payloads.
+
+        Args:
+            ids (List[str]): IDs of the points.
 
-        This removes all stored data and reinitializes the collection 
-        with the configured vector size and cosine similarity.
+        Returns:
+            List[Optional[str]]: The text of every point, or None for unknown IDs.
         """
-        self.client.delete_collection(collection_name=self.collection_name)
-        self.client.create_collection(
-            collection_name=self.collection_name,
-            vectors_config=models.VectorParams(
-                size=self.vector_size,
-                distance=models.Distance.COSINE,
-                on_disk=True
+        if not ids:
+            return []
+        texts = self.docstore.get(ids) if self.docstore is not None else [None] * len(ids)
+        missing = [i for i, text in enumerate(texts) if text is None]
+        if missing:
+            points = self.client.retrieve(collection_name=self._search_collection, ids=[ids[i] for i in missing],
+                                          with_payload=["text"], with_vectors=False)
+            found = {str(point.id): (point.payload or {}).get("text") for point in points}
+            for i in missing:
+                texts[i] = found.get(ids[i])
+        return texts
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete points from the collection by ID.
+
+        Args:
+            ids (List[str]): IDs of the points to delete.
+        """
+        if not ids:
+            return
+        self.client.delete(
+            collection_name=self._write_collection,
+            points_selector=models.PointIdsList(points=ids),
+            wait=self._building
+        )
+        if self.docstore is not None:
+            self.docstore.delete(ids)
+
+    def flush(self) -> None:
+        """Save the docstore index; points are already persisted by Qdrant."""
+        if self.docstore is not None:
+            self.docstore.flush()
+
+    def delete_source(self, source: str) -> None:
+        """Delete every point of a document, found by scrolling its "source" payload.
+
+        Args:
+            source (str): Source of the points to delete.
+        """
+        ids: List[str] = []
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self._write_collection,
+                scroll_filter=self._filter(source),
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
             )
-        )
\ No newline at end of file
+            ids.extend(str(point.id) for point in points)
+            if offset is None:
+                break
+        self.delete(ids)
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Update the payload of existing points, keeping their stored text and vector.
+
+        Args:
+            ids (List[str]): IDs of the points to update.
+            metadatas (List[Dict[str, Any]]): New metadata for each point.
+        """
+        if not ids:
+            return
+        self.client.batch_update_points(
+            collection_name=self._write_collection,
+            update_operations=[
+                models.SetPayloadOperation(set_payload=models.SetPayload(payload=meta, points=[pid]))
+                for pid, meta in zip(ids, metadatas)
+            ],
+            wait=self._building
+        )
+
+    def reset(self) -> None:
+        """Replace the collection with an empty one.
+
+        The alias is switched to a new, empty version with the configured vector size,
+        cosine similarity and index settings, and the previous versions are dropped
+        according to `keep_versions`.
+        """
+        self.abort_build()
+        self.begin_build()
+        self.commit_build()
\ No newline at end of file
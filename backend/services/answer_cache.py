@@ -0,0 +1,121 @@
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+@dataclass
+class CachedAnswer:
+    """An answer stored in the cache together with what produced it."""
+    question: str
+    embedding: np.ndarray
+    context_ids: Tuple[str, ...]
+    answer: str
+    created_at: float
+    history: Tuple[Tuple[str, str], ...] = ()
+
+class SemanticAnswerCache:
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600, max_entries: int = 256):
+        """Cache of generated answers keyed by question meaning instead of exact text.
+
+        A stored answer is reused when a new question retrieves exactly the same contexts
+        with the same chat history and its embedding has a cosine similarity of at least `threshold` with the cached
+        question. Entries expire after `ttl_seconds` and the least recently used ones are
+        evicted when the cache holds more than `max_entries`.
+
+        Args:
+            threshold (float, optional): Minimum cosine similarity between questions. Defaults to 0.95.
+            ttl_seconds (float, optional): Lifetime of an entry in seconds. Defaults to 3600.
+            max_entries (int, optional): Maximum number of cached answers. Defaults to 256.
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _normalize(self, embedding: List[float]) -> np.ndarray:
+        v = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm > 0 else v
+
+    def _expire(self, now: float) -> None:
+        expired = [key for key, e in self._entries.items() if now - e.created_at > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, embedding: List[float], context_ids: List[str],
+            history: Tuple[Tuple[str, str], ...] = ()) -> Optional[CachedAnswer]:
+        """Look up an answer for a question.
+
+        Args:
+            embedding (List[float]): Embedding of the new question.
+            context_ids (List[str]): IDs of the contexts retrieved for it, in rank order.
+            history (Tuple[Tuple[str, str], ...], optional): Role and content of the chat messages in its
+                prompt (see `conversation.history_key`). Defaults to none.
+
+        Returns:
+            Optional[CachedAnswer]: The most similar cached answer above the threshold, or None.
+        """
+        q = self._normalize(embedding)
+        ids = tuple(context_ids)
+        with self._lock:
+            self._expire(time.time())
+            best_key, best_sim = None, self.threshold
+            for key, entry in self._entries.items():
+                if entry.context_ids != ids or entry.history != history:
+                    continue
+                sim = float(np.dot(q, entry.embedding))
+                if sim >= best_sim:
+                    best_key, best_sim = key, sim
+            if best_key is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key]
+
+    def put(self, question: str, embedding: List[float], context_ids: List[str], answer: str,
+            history: Tuple[Tuple[str, str], ...] = ()) -> None:
+        """Store a generated answer.
+
+        Args:
+            question (str): The question that was answered.
+            embedding (List[float]): Embedding of the question.
+            context_ids (List[str]): IDs of the contexts used to answer it, in rank order.
+            answer (str): Generated answer.
+            history (Tuple[Tuple[str, str], ...], optional): Role and content of the chat messages in the
+                prompt. Defaults to none.
+        """
+        now = time.time()
+        entry = CachedAnswer(question, self._normalize(embedding), tuple(context_ids), answer, now, tuple(history))
+        with self._lock:
+            self._expire(now)
+            self._entries[self._next_id] = entry
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached answer, e.g. after the collection was re-indexed."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the cache.
+
+        Returns:
+            Dict[str, Any]: hits, misses, hit rate and number of cached answers.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else None,
+                "entries": len(self._entries),
+            }
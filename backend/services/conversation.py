@@ -0,0 +1,87 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from services.lexical_index import tokenize
+
+Message = Dict[str, str]
+
+# Words that only make sense with a previous turn ("¿y eso cómo se entrenó?", "what about its loss?").
+_REFERENCES = {
+    "eso", "esto", "ese", "esa", "esos", "esas", "este", "esta", "estos", "estas", "ello", "aquello",
+    "anterior", "mismo", "misma", "it", "its", "that", "this", "those", "these", "they", "them",
+}
+_CONNECTORS = ("y ", "¿y ", "pero ", "entonces ", "también ", "and ", "but ", "what about ", "how about ")
+_WORD = re.compile(r"\w+", re.UNICODE)
+# Interrogatives and references left out when checking whether a question's terms are in some contexts.
+_FUNCTION_TERMS = frozenset(
+    "cuales cuanto cuanta cuantos cuantas quien quienes porque explica explicame dime mas "
+    "what how which who why does did do can about more tell explain".split()
+) | frozenset(tokenize(" ".join(_REFERENCES)))
+
+def recent_turns(history: Optional[List[Message]], max_messages: int = 6) -> List[Message]:
+    """The last `max_messages` user and assistant messages with content, oldest first."""
+    if not history:
+        return []
+    turns = [m for m in history if m.get("role") in ("user", "assistant") and (m.get("content") or "").strip()]
+    return turns[-max_messages:]
+
+def history_key(history: Optional[List[Message]], max_messages: int = 6) -> Tuple[Tuple[str, str], ...]:
+    """Hashable identity of the part of a history that is used, for request coalescing."""
+    return tuple((m["role"], m["content"]) for m in recent_turns(history, max_messages))
+
+def is_follow_up(question: str) -> bool:
+    """Heuristic: a question is a follow-up if it starts with a connector or refers back.
+    Length alone says nothing: "What is BM25?" is short and standalone."""
+    text = question.strip().lower()
+    if text.startswith(_CONNECTORS):
+        return True
+    return any(word in _REFERENCES for word in _WORD.findall(text))
+
+def condense_question(question: str, history: Optional[List[Message]]) -> str:
+    """Standalone version of a question for retrieval.
+
+    A follow-up is prefixed with the previous user question, so its embedding and BM25
+    terms carry the topic of the conversation. Other questions are returned unchanged.
+
+    Args:
+        question (str): The new question.
+        history (List[Message], optional): Previous messages, oldest first, with "role" and "content".
+
+    Returns:
+        str: The query to retrieve contexts with.
+    """
+    previous = [m["content"] for m in recent_turns(history) if m["role"] == "user"]
+    if not previous or not is_follow_up(question):
+        return question
+    return f"{previous[-1].strip()} {question.strip()}"
+
+def format_history(history: Optional[List[Message]], max_messages: int = 6, max_chars: int = 500) -> str:
+    """The recent turns as prompt text, every message cut to `max_chars` characters."""
+    names = {"user": "Usuario", "assistant": "Asistente"}
+    lines = []
+    for m in recent_turns(history, max_messages):
+        content = m["content"].strip()
+        if len(content) > max_chars:
+            content = content[:max_chars].rstrip() + "…"
+        lines.append(f"{names[m['role']]}: {content}")
+    return "\n".join(lines)
+
+def covered_by(question: str, contexts: List[Dict[str, Any]], min_coverage: float = 0.8) -> bool:
+    """Whether some contexts already hold the terms of a question.
+
+    Interrogatives and references are ignored and terms are compared by their first five
+    letters, a crude stemmer: "¿y eso cómo se evaluó?" is covered by contexts that talk
+    about "evaluación". A question without content terms is covered.
+
+    Args:
+        question (str): The question.
+        contexts (List[Dict[str, Any]]): Contexts with "text".
+        min_coverage (float, optional): Fraction of the question terms that must appear. Defaults to 0.8.
+
+    Returns:
+        bool: True if at least `min_coverage` of the question terms appear in the contexts.
+    """
+    terms = {t[:5] for t in tokenize(question) if t not in _FUNCTION_TERMS}
+    if not terms:
+        return True
+    vocabulary = {t[:5] for t in tokenize(" ".join(c["text"] for c in contexts))}
+    return len(terms & vocabulary) / len(terms) >= min_coverage
@@ -0,0 +1,212 @@
+import os
+import queue
+import threading
+from typing import Any, Dict, Optional, Tuple
+from services.indexing_service import IndexingService
+
+class CorpusIndexer:
+    # Queue key of a full rebuild; it cannot clash with a source, which always ends in ".pdf".
+    REBUILD = "*"
+
+    def __init__(self, index: IndexingService, corpus_dir: str, poll_seconds: float = 5.0):
+        """Keeps every PDF under a directory indexed.
+
+        A watcher thread polls the directory every `poll_seconds` and schedules work
+        for a single background worker: added or changed files are (incrementally)
+        indexed and removed files have their chunks deleted. A file is only scheduled
+        once its size and modification time are the same in two consecutive scans, so
+        files still being copied are not indexed half-written. Polling needs no extra
+        dependency and works on bind-mounted volumes, where inotify events are unreliable.
+
+        Every document is identified by its path relative to `corpus_dir` (its "source").
+
+        `start` returns at once: the first scan runs in the watcher thread, so the
+        application serves requests while the corpus is (re)indexed. `synced` is set
+        once every document found by the first scan has been processed.
+
+        Args:
+            index (IndexingService): Service that indexes and removes single documents.
+            corpus_dir (str): Directory scanned recursively for `.pdf` files.
+            poll_seconds (float, optional): Seconds between two scans. Defaults to 5.0.
+        """
+        self.index = index
+        self.corpus_dir = corpus_dir
+        self.poll_seconds = poll_seconds
+
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._pending: Dict[str, str] = {}
+        self._seen: Dict[str, Tuple[float, int]] = {}
+        self._scheduled: Dict[str, Tuple[float, int]] = {}
+        self._first_scan = True
+        self._stop = threading.Event()
+        self.synced = threading.Event()
+        self._threads = []
+        self.current: Optional[str] = None
+        self.documents: Dict[str, int] = {}
+        self.errors: Dict[str, str] = {}
+
+    def _list_pdfs(self) -> Dict[str, Tuple[float, int]]:
+        """Modification time and size of every PDF in the corpus, by source."""
+        files = {}
+        for root, _, names in os.walk(self.corpus_dir):
+            for name in names:
+                if not name.lower().endswith(".pdf"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue  # Removed between the listing and the stat.
+                source = os.path.relpath(path, self.corpus_dir).replace(os.sep, "/")
+                files[source] = (st.st_mtime, st.st_size)
+        return files
+
+    def schedule(self, source: str, action: str = "index") -> None:
+        """Queue a document for the worker. A document already waiting is not queued twice;
+        its pending action is replaced by the latest one.
+
+        Args:
+            source (str): Path of the document relative to `corpus_dir`.
+            action (str, optional): "index", "remove" or "rebuild". Defaults to "index".
+        """
+        with self._lock:
+            queued = source in self._pending
+            self._pending[source] = action
+        if not queued:
+            self._queue.put(source)
+
+    def scan(self, full: bool = False) -> int:
+        """Compare the directory with the previous scan and schedule the differences.
+
+        The first scan, and every `full` scan, schedules every file (unchanged ones
+        are skipped cheaply by `index_pdf`) and the removal of indexed documents that
+        are no longer present.
+
+        Args:
+            full (bool, optional): Schedule every file, changed or not. Defaults to False.
+
+        Returns:
+            int: Number of documents scheduled.
+        """
+        with self._scan_lock:
+            return self._scan(full or self._first_scan)
+
+    def _scan(self, full: bool) -> int:
+        files = self._list_pdfs()
+        scheduled = 0
+        for source, signature in files.items():
+            if not full and self._scheduled.get(source) == signature:
+                continue
+            if full or self._seen.get(source) == signature:
+                self._scheduled[source] = signature
+                self.schedule(source, "index")
+                scheduled += 1
+
+        removed = {source for source in self._scheduled if source not in files}
+        if full:
+            removed.update(source for source in self.index.indexed_sources() if source not in files)
+        for source in removed:
+            self._scheduled.pop(source, None)
+            self.schedule(source, "remove")
+            scheduled += 1
+
+        self._seen = files
+        self._first_scan = False
+        return scheduled
+
+    def rebuild(self) -> int:
+        """Schedule a full rebuild of the index from every PDF in the corpus (see `IndexingService.rebuild`).
+
+        Returns:
+            int: Number of documents in the corpus.
+        """
+        self.schedule(self.REBUILD, "rebuild")
+        return len(self._list_pdfs())
+
+    def _check_synced(self) -> None:
+        """Set `synced` once the first scan is done and nothing is pending or in progress."""
+        with self._lock:
+            if not self._first_scan and not self._pending and self.current is None:
+                self.synced.set()
+
+    def _work(self) -> None:
+        while True:
+            source = self._queue.get()
+            try:
+                if source is None:
+                    return
+                with self._lock:
+                    action = self._pending.pop(source)
+                    self.current = source
+                path = os.path.join(self.corpus_dir, *source.split("/"))
+                try:
+                    if action == "rebuild":
+                        files = self._list_pdfs()
+                        documents = [(os.path.join(self.corpus_dir, *name.split("/")), name) for name in sorted(files)]
+                        self.documents = self.index.rebuild(documents)
+                    elif action == "remove":
+                        self.index.remove_pdf(path, source=source)
+                        self.documents.pop(source, None)
+                    else:
+                        self.documents[source] = self.index.index_pdf(path, source=source)
+                    self.errors.pop(source, None)
+                except Exception as e:
+                    print(f"[corpus] error procesando '{source}': {e}")
+                    # Not retried until the file changes again.
+                    self.errors[source] = str(e)
+                finally:
+                    with self._lock:
+                        self.current = None
+                self._check_synced()
+            finally:
+                self._queue.task_done()
+
+    def _watch(self) -> None:
+        try:
+            self.documents = self.index.indexed_sources()
+            self.scan()
+        except Exception as e:
+            print(f"[corpus] error al escanear {self.corpus_dir}: {e}")
+        self._check_synced()
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"[corpus] error al escanear {self.corpus_dir}: {e}")
+
+    def start(self) -> None:
+        """Start the worker and watcher threads. Returns immediately; the first scan runs in the watcher."""
+        os.makedirs(self.corpus_dir, exist_ok=True)
+        self._threads = [
+            threading.Thread(target=self._work, name="corpus-worker", daemon=True),
+            threading.Thread(target=self._watch, name="corpus-watcher", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stop the watcher and the worker once the document in progress is done."""
+        self._stop.set()
+        self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def wait(self) -> None:
+        """Block until every scheduled document has been processed."""
+        self._queue.join()
+
+    def status(self) -> Dict[str, Any]:
+        """Indexed documents, the document in progress and its progress, pending work and the last error of every failed document."""
+        with self._lock:
+            pending = dict(self._pending)
+        return {
+            "corpus_dir": self.corpus_dir,
+            "synced": self.synced.is_set(),
+            "documents": dict(self.documents),
+            "current": self.current,
+            "progress": self.index.progress,
+            "pending": pending,
+            "errors": dict(self.errors),
+        }
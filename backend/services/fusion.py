@@ -0,0 +1,37 @@
+from typing import Any, Dict, List, Optional
+
+def reciprocal_rank_fusion(results: List[Dict[str, Any]], k: int, rrf_k: int = 60) -> Dict[str, Any]:
+    """Merge several ranked result lists with Reciprocal Rank Fusion.
+
+    Every document scores `sum(1 / (rrf_k + rank))` over the lists it appears in, so
+    only ranks matter and scores of different retrievers need not be comparable.
+
+    Args:
+        results (List[Dict[str, Any]]): Results with the structure of `VectorStore.query`; only the first
+            one needs "distances". A retriever that does not store texts gives None "documents".
+        k (int): Number of fused results to return.
+        rrf_k (int, optional): Rank smoothing constant. Defaults to 60.
+
+    Returns:
+        Dict[str, Any]: Fused results with the structure of `VectorStore.query`, plus the fused scores in
+            "scores". "distances" keeps the distance of a document in the first list (None if it only
+            appears in the others), and a text is None if no list had it.
+    """
+    scores: Dict[str, float] = {}
+    texts: Dict[str, Optional[str]] = {}
+    metas: Dict[str, Dict[str, Any]] = {}
+    distances = dict(zip(results[0]["ids"], results[0]["distances"])) if results else {}
+    for res in results:
+        for rank, (doc_id, text, meta) in enumerate(zip(res["ids"], res["documents"], res["metadatas"])):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+            metas.setdefault(doc_id, meta)
+            if texts.get(doc_id) is None:
+                texts[doc_id] = text
+    top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+    return {
+        "ids": [doc_id for doc_id, _ in top],
+        "documents": [texts[doc_id] for doc_id, _ in top],
+        "metadatas": [metas[doc_id] for doc_id, _ in top],
+        "distances": [distances.get(doc_id) for doc_id, _ in top],
+        "scores": [score for _, score in top],
+    }
@@ -1,14 +1,43 @@
 import os
+import time
 import hashlib
 import json
-import gc
-from typing import List, Dict, Any, Generator, Tuple
+import uuid
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Callable, Generator, Iterable, Optional, Tuple
 from pypdf import PdfReader
 from core.vectorstore import VectorStore
 from core.embeddings import Embeddings
+from core.chunker import Chunker
+from core.scheduling import BACKGROUND, priority
+from infra.chunkers.sliding_window import SlidingWindowChunker
+from services.pipeline import Pipeline, Stage
+from services.lexical_index import BM25Index
+from services.metrics import Trace, INDEX_STAGE_SECONDS, INDEXED_CHUNKS
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[str]:
+    """
+    Extracts the text of the pages in `[start, end)`. Runs inside a worker process,
+    so it opens its own reader instead of receiving page objects.
+
+    Args:
+        pdf_path (str): PDF file path
+        start (int): index of the first page
+        end (int): index after the last page
+
+    Returns:
+        List[str]: text of every page in the range, in page order
+    """
+    reader = PdfReader(pdf_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
 
 class IndexingService:
-    def __init__(self, vs: VectorStore, emb: Embeddings, chunk_size: int = 1000, chunk_overlap: int = 150):
+    def __init__(self, vs: VectorStore, emb: Embeddings, chunk_size: int = 1000, chunk_overlap: int = 150,
+                 embed_workers: int = 2, queue_size: int = 4, extract_workers: int = 1, pages_per_task: int = 8,
+                 lexical: Optional[BM25Index] = None, chunker: Optional[Chunker] = None, state_dir: Optional[str] = None):
         """
         This class aims to read PDF files, process their content efficiently and save it to a vector database.
         
@@ -17,35 +46,43 @@ class IndexingService:
             emb (Embeddings): Embedder
             chunk_size (int, optional): The maximum size of each text fragment. Defaults to 1000.
             chunk_overlap (int, optional): number of characters from the end of a fragment that are repeated at the beginning of the next. Defaults to 150.
+            embed_workers (int, optional): Number of batches embedded concurrently by the indexing pipeline. Defaults to 2.
+            queue_size (int, optional): Maximum number of batches waiting between two pipeline stages. Defaults to 4.
+            extract_workers (int, optional): Processes used to extract page text. 1 extracts serially in-process. Defaults to 1.
+            pages_per_task (int, optional): Pages extracted by a worker process per task. Defaults to 8.
+            lexical (BM25Index, optional): Sparse lexical index kept in sync with the vector store, for hybrid retrieval. Defaults to None.
+            chunker (Chunker, optional): Splits the extracted pages into chunks. Defaults to a `SlidingWindowChunker` with `chunk_size` and `chunk_overlap`.
+            state_dir (str, optional): Directory holding the state file of every indexed document. If None, the state of a PDF is stored next to it as `<pdf>.index.json`.
         """
         self.vs = vs
         self.emb = emb
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        
-    def _chunk_text(self, text: str) -> List[str]:
+        self.embed_workers = embed_workers
+        self.queue_size = queue_size
+        self.extract_workers = extract_workers
+        self.pages_per_task = pages_per_task
+        self.lexical = lexical
+        self.chunker = chunker or SlidingWindowChunker(chunk_size, chunk_overlap)
+        self.state_dir = state_dir
+        # Documents are indexed one at a time: they share the vector store and the lexical index.
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[], None]] = []
+        # Document being indexed: {"source", "pages", "pages_done", "chunks_done"}, None when idle.
+        self.progress: Optional[Dict[str, Any]] = None
+        # States written during a `rebuild`, by (state path, legacy path); saved once the build is committed.
+        self._build_states: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
         """
-        Takes a long block of text and splits it into a list of chunks based on the size and overlap defined in the constructor.
-        Uses a sliding window.
+        Registers a function that is called every time the indexed content changes,
+        e.g. to invalidate caches built on top of the vector store.
 
         Args:
-            text (str): text for applies the split
-
-        Returns:
-            List[str]: chunks
+            callback (Callable[[], None]): function without arguments
         """
-        if not text:
-            return []
+        self._listeners.append(callback)
         
-        chunks, start, n = [], 0, len(text)
-        while start < n:
-            end = min(start + self.chunk_size, n)
-            chunks.append(text[start:end])
-            if end == n:
-                break
-            start += self.chunk_size - self.chunk_overlap
-        return chunks
-
     def _sha256(self, path: str) -> str:
         """
         Calculates a unique "fingerprint" (a SHA256 hash) for the PDF file
@@ -62,34 +99,197 @@ class IndexingService:
                 h.update(chunk)
         return h.hexdigest()
     
-    def _iter_pdf_chunks(self, pdf_path: str) -> Generator[Tuple[str, Dict], None, None]:
+    def _iter_pdf_pages(self, pdf_path: str) -> Generator[Tuple[int, str], None, None]:
+        """
+        Extracts the text of the PDF page by page, in page order.
+
+        With `extract_workers > 1` the page range is split into tasks of `pages_per_task`
+        pages that run in a process pool. Only `2 * extract_workers` tasks are in flight
+        at a time, so memory stays bounded no matter the size of the document.
+
+        Args:
+            pdf_path (str): PDF file path
+
+        Yields:
+            Generator[Tuple[int, str], None, None]: Tuple with the page index (0-based) and its text
+        """
+        reader = PdfReader(pdf_path)
+        n_pages = len(reader.pages)
+        if self.progress is not None:
+            self.progress["pages"] = n_pages
+        if self.extract_workers <= 1:
+            for i, page in enumerate(reader.pages):
+                yield i, page.extract_text() or ""
+            return
+
+        del reader
+        ranges = iter([(s, min(s + self.pages_per_task, n_pages)) for s in range(0, n_pages, self.pages_per_task)])
+        # "spawn" avoids forking while the indexing pipeline threads hold locks.
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.extract_workers, mp_context=ctx) as pool:
+            pending = deque()
+            for start, end in ranges:
+                pending.append((start, pool.submit(_extract_page_range, pdf_path, start, end)))
+                if len(pending) >= 2 * self.extract_workers:
+                    break
+            while pending:
+                start, future = pending.popleft()
+                texts = future.result()
+                next_range = next(ranges, None)
+                if next_range is not None:
+                    pending.append((next_range[0], pool.submit(_extract_page_range, pdf_path, *next_range)))
+                for offset, text in enumerate(texts):
+                    yield start + offset, text
+
+    def _iter_pdf_chunks(self, pdf_path: str, source: Optional[str] = None,
+                         trace: Optional[Trace] = None) -> Generator[Tuple[str, Dict], None, None]:
         """       
-        It reads the PDF page by page, extracts the text, divides it into chunks, and "produces" them one by one.
+        It streams the pages of the PDF through the chunker and "produces" the chunks one by one.
 
         Args:
             pdf_path (str): PDF file path
+            source (str, optional): name of the document stored in the chunk metadata. Defaults to the file name.
+            trace (Trace, optional): receives the time spent extracting text ("extract") and chunking it ("chunk")
 
         Yields:
             Generator[Tuple[str, Dict], None, None]: Tuple with chunk and its metadata
         """
-        basename = os.path.basename(pdf_path)
+        source = source or os.path.basename(pdf_path)
+        # Extraction runs inside the chunker's iteration: its time is measured apart and subtracted.
+        extract_seconds = 0.0
+        busy_seconds = 0.0
+
+        def pages() -> Generator[Tuple[int, str], None, None]:
+            nonlocal extract_seconds
+            start = time.perf_counter()
+            for i, text in self._iter_pdf_pages(pdf_path):
+                extract_seconds += time.perf_counter() - start
+                if self.progress is not None:
+                    self.progress["pages_done"] = i + 1
+                yield i + 1, text
+                start = time.perf_counter()
+            extract_seconds += time.perf_counter() - start
+
         try:
-            reader = PdfReader(pdf_path)
-            for i, page in enumerate(reader.pages):
-                text = page.extract_text() or ""
-                # It filter the empty pages or with little content
-                if len(text.strip()) < 40:
-                    continue
-                
-                chunks = self._chunk_text(text)
-                for j, chunk_text in enumerate(chunks):
-                    metadata = {"source": basename, "page": i + 1, "chunk": j}
-                    yield chunk_text, metadata
+            start = time.perf_counter()
+            for chunk_text, metadata in self.chunker.chunk(pages()):
+                busy_seconds += time.perf_counter() - start
+                yield chunk_text, {"source": source, **metadata}
+                start = time.perf_counter()
+            busy_seconds += time.perf_counter() - start
         except Exception as e:
             print(f"Error al procesar el PDF {pdf_path}: {e}")
             return
+        finally:
+            if trace is not None:
+                trace.record("extract", extract_seconds)
+                trace.record("chunk", max(busy_seconds - extract_seconds, 0.0))
+
+    def _chunk_id(self, text: str, metadata: Dict[str, Any]) -> str:
+        """
+        Content-addressed ID of a chunk: a UUID derived from the SHA256 of the embedding
+        model, the source file and the chunk text. The same chunk always gets the same ID,
+        so unchanged chunks can be recognized across re-indexings.
+
+        Args:
+            text (str): chunk text
+            metadata (Dict[str, Any]): chunk metadata (only `source` is used)
+
+        Returns:
+            str: UUID string
+        """
+        h = hashlib.sha256()
+        for part in (self.emb.model_name, metadata.get("source", ""), text):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return str(uuid.UUID(hex=h.hexdigest()[:32]))
+
+    def _state_path(self, pdf_path: str, source: str) -> str:
+        """
+        Path of the state file of a document: `<state_dir>/<sha1 of source>.json`, or `<pdf>.index.json` without `state_dir`.
+
+        Args:
+            pdf_path (str): PDF file path
+            source (str): name of the document
+
+        Returns:
+            str: state file path
+        """
+        if self.state_dir is None:
+            return pdf_path + ".index.json"
+        return os.path.join(self.state_dir, hashlib.sha1(source.encode("utf-8")).hexdigest() + ".json")
+
+    def indexed_sources(self) -> Dict[str, int]:
+        """
+        Documents with a state file in `state_dir`.
+
+        Returns:
+            Dict[str, int]: number of chunks of every indexed document, by source
+        """
+        if self.state_dir is None or not os.path.isdir(self.state_dir):
+            return {}
+        out = {}
+        for name in os.listdir(self.state_dir):
+            if name.endswith(".json"):
+                state = self._load_state(os.path.join(self.state_dir, name))
+                if "source" in state:
+                    out[state["source"]] = int(state.get("chunks", 0))
+        return out
+
+    def _load_state(self, state_path: str) -> Dict[str, Any]:
+        """
+        Reads the `.index.json` state file of a PDF.
+
+        Args:
+            state_path (str): state file path
+
+        Returns:
+            Dict[str, Any]: the stored state, or an empty dict if it does not exist or cannot be read
+        """
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_state(self, state_path: str, state: Dict[str, Any]) -> None:
+        """
+        Writes the state file of a PDF.
+
+        Args:
+            state_path (str): state file path
+            state (Dict[str, Any]): state to store
+        """
+        if self.state_dir is not None:
+            os.makedirs(self.state_dir, exist_ok=True)
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+    def _iter_batches(self, chunks: Iterable[Tuple[str, str, Dict[str, Any]]], batch_size: int) -> Generator[Tuple[List[str], List[str], List[Dict[str, Any]]], None, None]:
+        """
+        Groups `(id, text, metadata)` chunks into batches.
+
+        Args:
+            chunks (Iterable[Tuple[str, str, Dict[str, Any]]]): chunks to group
+            batch_size (int): maximum number of chunks per batch
+
+        Yields:
+            Generator[Tuple[List[str], List[str], List[Dict[str, Any]]], None, None]: Tuple with the ids, texts and metadatas of a batch
+        """
+        ids_batch: List[str] = []
+        texts_batch: List[str] = []
+        metas_batch: List[Dict[str, Any]] = []
+        for chunk_id, text, meta in chunks:
+            ids_batch.append(chunk_id)
+            texts_batch.append(text)
+            metas_batch.append(meta)
+            if len(texts_batch) >= batch_size:
+                yield ids_batch, texts_batch, metas_batch
+                ids_batch, texts_batch, metas_batch = [], [], []
+        if texts_batch:
+            yield ids_batch, texts_batch, metas_batch
 
-    def index_pdf(self, pdf_path: str, force: bool = False, batch_size: int = 16) -> int:
+    def index_pdf(self, pdf_path: str, force: bool = False, batch_size: int = 16, source: Optional[str] = None) -> int:
         """
         Indexes the content of a PDF file by processing it in memory-efficient batches.
 
@@ -98,74 +298,274 @@ class IndexingService:
         large files by processing the document page by page and using batches to
         avoid high memory consumption.
 
+        Extraction, embedding and upserts run as concurrent stages of a pipeline with
+        bounded queues, so the CPU-bound PDF parsing overlaps the network-bound calls.
+        The throughput of every stage is reported at the end, and the time spent extracting,
+        chunking, embedding and upserting is recorded in the `rag_index_stage_seconds` metric.
+
         The method also implements a caching mechanism. It calculates the SHA256 hash
-        of the file and saves it to a `.index.json` state file upon successful
-        indexing. If the method is called again on the same file and the hash has not
-        changed, the indexing process is skipped unless the `force` parameter is set
-        to True.
+        of the file and saves it, together with a per-chunk manifest, to a `.index.json`
+        state file upon successful indexing. If the method is called again on the same
+        file and the hash has not changed, the indexing process is skipped unless the
+        `force` parameter is set to True. The size and modification time are stored too:
+        when both still match, the file is not even hashed.
+
+        While a document is being indexed, `progress` holds its source, number of pages,
+        pages extracted and chunks stored.
+
+        Re-indexing a changed file is incremental: chunks have content-addressed IDs
+        (see `_chunk_id`), so only chunks missing from the manifest are embedded and
+        upserted, chunks that only moved get their metadata updated, and chunks no
+        longer present are deleted. With `force`, or when the embedding model or the
+        chunker settings changed, the previous chunks of the document are deleted and every chunk is embedded
+        again. A state written before manifests existed cannot be diffed: the document's
+        points are deleted by source and it is fully re-indexed. Other documents in the
+        collection are never touched.
 
         Args:
             pdf_path (str): The absolute or relative path to the PDF file.
-            force (bool, optional): If True, forces re-indexing even if the file has not changed. Defaults to False.
+            force (bool, optional): If True, forces a full re-indexing even if the file has not changed. Defaults to False.
             batch_size (int, optional): The number of text chunks to process in a single batch. Defaults to 16.
+            source (str, optional): Name of the document in the chunk metadata and the key of its state. Defaults to the file name.
 
         Raises:
             FileNotFoundError: If the PDF file specified in `pdf_path` does not exist.
+            RuntimeError: If no text could be extracted from a file that was previously indexed.
 
         Returns:
             int: The total number of chunks indexed and stored in the vector store.
         """
+        source = source or os.path.basename(pdf_path)
+        with self._lock:
+            self.progress = {"source": source, "pages": None, "pages_done": 0, "chunks_done": 0}
+            try:
+                return self._index_pdf(pdf_path, force, batch_size, source)
+            finally:
+                self.progress = None
+
+    def _index_pdf(self, pdf_path: str, force: bool, batch_size: int, source: str) -> int:
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"No existe el PDF en {pdf_path}")
 
-        state_path = pdf_path + ".index.json"
+        state_path = self._state_path(pdf_path, source)
+        legacy_path = pdf_path + ".index.json"
+        file_stat = os.stat(pdf_path)
+        # A state written next to the PDF before `state_dir` was configured is still honored.
+        state = self._load_state(state_path) or self._load_state(legacy_path)
+
+        # Chunks are only reusable if they were built with the same embedding model and chunker settings.
+        outdated = state.get("model") != self.emb.model_name or state.get("chunker") != self.chunker.settings()
+        # A lexical index missing chunks of the manifest (e.g. enabled after the first indexing) is filled in below.
+        lexical_complete = self.lexical is None or all(cid in self.lexical for cid in state.get("manifest") or {})
+        # A state from before manifests existed (only the hash) does not know the IDs of its
+        # chunks: it is never skipped, and its points are found by source below.
+        legacy = bool(state) and "manifest" not in state
+        unchanged = not force and not outdated and not legacy and lexical_complete
+        if unchanged and state.get("size") == file_stat.st_size and state.get("mtime") == file_stat.st_mtime:
+            print(f"El archivo '{os.path.basename(pdf_path)}' ya está indexado y no ha cambiado. Omitiendo.")
+            return int(state.get("chunks", 0))
+
         current_hash = self._sha256(pdf_path)
+        if unchanged and state.get("sha256") == current_hash:
+            # Touched but not modified: only the stored modification time is refreshed.
+            self._save_state(state_path, {**state, "source": source, "size": file_stat.st_size, "mtime": file_stat.st_mtime})
+            if state_path != legacy_path and os.path.exists(legacy_path):
+                os.remove(legacy_path)
+            print(f"El archivo '{os.path.basename(pdf_path)}' ya está indexado y no ha cambiado. Omitiendo.")
+            return int(state.get("chunks", 0))
+
+        old_manifest: Dict[str, Dict[str, Any]] = state.get("manifest") or {}
+        if force or not old_manifest or outdated:
+            print(f"Iniciando indexación completa para '{os.path.basename(pdf_path)}'...")
+            self.vs.delete(list(old_manifest))
+            if legacy:
+                # Older versions stored the file name as the source of every chunk.
+                for old_source in {source, state.get("source") or os.path.basename(pdf_path)}:
+                    self.vs.delete_source(old_source)
+            if self.lexical is not None:
+                self.lexical.delete(list(old_manifest))
+            old_manifest = {}
+        else:
+            print(f"Iniciando indexación incremental para '{os.path.basename(pdf_path)}'...")
+
+        new_manifest: Dict[str, Dict[str, Any]] = {}
+        moved_ids: List[str] = []
+        moved_metas: List[Dict[str, Any]] = []
+        trace = Trace("index.pdf", INDEX_STAGE_SECONDS)
+
+        # Diff against the previous manifest while extracting: only new chunks reach the pipeline.
+        def new_chunks() -> Generator[Tuple[str, str, Dict[str, Any]], None, None]:
+            for text, meta in self._iter_pdf_chunks(pdf_path, source, trace):
+                chunk_id = self._chunk_id(text, meta)
+                if chunk_id in new_manifest:
+                    continue  # Same text twice in the document: stored once.
+                entry = {"page": meta["page"], "chunk": meta["chunk"]}
+                new_manifest[chunk_id] = entry
+                previous = old_manifest.get(chunk_id)
+                if previous is None:
+                    yield chunk_id, text, meta
+                    continue
+                if previous != entry:
+                    moved_ids.append(chunk_id)
+                    moved_metas.append(meta)
+                if self.lexical is not None and chunk_id not in self.lexical:
+                    self.lexical.add([chunk_id], [text], [meta])
+
+        # Stages of the pipeline: extraction (the generator), embedding and upsert run
+        # concurrently, connected by bounded queues.
+        def embed_stage(batch: Tuple[List[str], List[str], List[Dict[str, Any]]]):
+            ids, texts, metas = batch
+            # Indexing yields the provider quota to interactive queries.
+            with priority(BACKGROUND), trace.span("embed"):
+                return ids, texts, metas, self.emb.embed(texts)
+
+        def upsert_stage(batch: Tuple[List[str], List[str], List[Dict[str, Any]], List[List[float]]]):
+            ids, texts, metas, embs = batch
+            with trace.span("upsert"):
+                self.vs.add_texts(texts=texts, metadatas=metas, embeddings=embs, ids=ids)
+                if self.lexical is not None:
+                    self.lexical.add(ids, texts, metas)
+            INDEXED_CHUNKS.inc(len(ids))
+            if self.progress is not None:
+                self.progress["chunks_done"] += len(ids)
 
-        if not force:
+        pipeline = Pipeline(queue_size=self.queue_size, size=lambda batch: len(batch[0]))
+        stats = pipeline.run(
+            self._iter_batches(new_chunks(), batch_size),
+            [Stage("embed", embed_stage, workers=self.embed_workers), Stage("upsert", upsert_stage)],
+        )
+
+        if not new_manifest and old_manifest:
+            raise RuntimeError(f"No se pudo extraer texto de {pdf_path}; se conserva el índice existente")
+
+        stale_ids = [chunk_id for chunk_id in old_manifest if chunk_id not in new_manifest]
+        self.vs.update_metadata(moved_ids, moved_metas)
+        self.vs.delete(stale_ids)
+        if self.lexical is not None:
+            self.lexical.update_metadata(moved_ids, moved_metas)
+            self.lexical.delete(stale_ids)
+            self.lexical.save()
+
+        for name in ("extract", "embed", "upsert"):
+            st = stats[name]
+            print(f"[{name}] {st['units']} chunks en {st['busy_seconds']}s ({st['units_per_second']} chunks/s)")
+        print(f"Tiempos por etapa (ms): {trace.finish()}")
+        total_chunks = len(new_manifest)
+        print(f"Nuevos: {stats['upsert']['units']}, movidos: {len(moved_ids)}, "
+              f"eliminados: {len(stale_ids)}, sin cambios: {total_chunks - stats['upsert']['units'] - len(moved_ids)}")
+
+        state = {
+            "source": source,
+            "sha256": current_hash,
+            "size": file_stat.st_size,
+            "mtime": file_stat.st_mtime,
+            "model": self.emb.model_name,
+            "chunker": self.chunker.settings(),
+            "chunks": total_chunks,
+            "manifest": new_manifest,
+        }
+        if self._build_states is not None:
+            self._build_states[(state_path, legacy_path)] = state
+        else:
+            # The state must never describe chunks the store could still lose in a crash.
+            self.vs.flush()
+            self._save_state(state_path, state)
+            if state_path != legacy_path and os.path.exists(legacy_path):
+                os.remove(legacy_path)
+
+        for callback in self._listeners:
+            callback()
+
+        print(f"\n✅ Indexación completa. Total de {total_chunks} chunks guardados en {stats['total']['seconds']}s.")
+        return total_chunks
+
+    def rebuild(self, documents: List[Tuple[str, str]], batch_size: int = 16) -> Dict[str, int]:
+        """
+        Re-indexes every document from scratch into a new version of the vector store
+        (see `VectorStore.begin_build`) and of the lexical index, and switches to them
+        once all documents are done. Queries keep being answered by the current versions
+        in the meantime.
+
+        Documents with a state in `state_dir` that are not part of `documents` are
+        dropped: they are not copied to the new version and their state is deleted.
+        If any document fails, the new version is discarded and nothing changes.
+
+        Args:
+            documents (List[Tuple[str, str]]): path and source of every document of the corpus
+            batch_size (int, optional): The number of text chunks to process in a single batch. Defaults to 16.
+
+        Returns:
+            Dict[str, int]: number of chunks of every document, by source
+        """
+        counts: Dict[str, int] = {}
+        with self._lock:
+            print(f"Reconstruyendo el índice con {len(documents)} documentos...")
+            self.vs.begin_build()
+            if self.lexical is not None:
+                self.lexical.begin_build()
+            self._build_states = {}
             try:
-                with open(state_path, "r", encoding="utf-8") as f:
-                    state = json.load(f)
-                if state.get("sha256") == current_hash:
-                    print(f"El archivo '{os.path.basename(pdf_path)}' ya está indexado y no ha cambiado. Omitiendo.")
-                    return int(state.get("chunks", 0))
+                for pdf_path, source in documents:
+                    self.progress = {"source": source, "pages": None, "pages_done": 0, "chunks_done": 0}
+                    counts[source] = self._index_pdf(pdf_path, True, batch_size, source)
+                self.vs.flush()
+                self.vs.commit_build()
+                if self.lexical is not None:
+                    self.lexical.commit_build()
             except Exception:
-                pass
+                self.vs.abort_build()
+                if self.lexical is not None:
+                    self.lexical.abort_build()
+                raise
+            finally:
+                states, self._build_states = self._build_states, None
+                self.progress = None
 
-        print(f"Iniciando indexación para '{os.path.basename(pdf_path)}'...")
-        self.vs.reset()
+            for (state_path, legacy_path), state in states.items():
+                self._save_state(state_path, state)
+                if state_path != legacy_path and os.path.exists(legacy_path):
+                    os.remove(legacy_path)
+            # Documents left out of the rebuild are no longer in the vector store nor in the lexical index.
+            if self.state_dir is not None and os.path.isdir(self.state_dir):
+                for name in os.listdir(self.state_dir):
+                    state_path = os.path.join(self.state_dir, name)
+                    state = self._load_state(state_path)
+                    if name.endswith(".json") and state.get("source") not in counts:
+                        os.remove(state_path)
 
-        texts_batch: List[str] = []
-        metas_batch: List[Dict[str, Any]] = []
-        total_chunks = 0
-
-        # Auxiliary function for procecss and clean a batch.
-        def flush_batch():
-            nonlocal total_chunks
-            if not texts_batch:
-                return
-
-            print(f"Procesando lote de {len(texts_batch)} chunks...")
-            embs = self.emb.embed(texts_batch)
-            self.vs.add_texts(texts=texts_batch, metadatas=metas_batch, embeddings=embs)
-            
-            total_chunks += len(texts_batch)
-            texts_batch.clear()
-            metas_batch.clear()
-            gc.collect()
-
-        # Main loop that consumes from the generator.
-        for text, meta in self._iter_pdf_chunks(pdf_path):
-            texts_batch.append(text)
-            metas_batch.append(meta)
+        for callback in self._listeners:
+            callback()
+        print(f"\n✅ Índice reconstruido: {len(counts)} documentos, {sum(counts.values())} chunks.")
+        return counts
 
-            if len(texts_batch) >= batch_size:
-                flush_batch()
-        
-        # Process the last batch.
-        flush_batch()
+    def remove_pdf(self, pdf_path: str, source: Optional[str] = None) -> int:
+        """
+        Removes every chunk of a document from the vector store and the lexical index, using the
+        manifest of its state file, and deletes the state. The PDF itself may no longer exist.
 
-        with open(state_path, "w", encoding="utf-8") as f:
-            json.dump({"sha256": current_hash, "chunks": total_chunks}, f)
+        Args:
+            pdf_path (str): The absolute or relative path to the PDF file.
+            source (str, optional): Name of the document, as given to `index_pdf`. Defaults to the file name.
+
+        Returns:
+            int: The number of chunks removed.
+        """
+        source = source or os.path.basename(pdf_path)
+        with self._lock:
+            state_path = self._state_path(pdf_path, source)
+            legacy_path = pdf_path + ".index.json"
+            state = self._load_state(state_path) or self._load_state(legacy_path)
+            ids = list(state.get("manifest") or {})
+            self.vs.delete(ids)
+            if self.lexical is not None:
+                self.lexical.delete(ids)
+                self.lexical.save()
+            self.vs.flush()
+            for path in (state_path, legacy_path):
+                if os.path.exists(path):
+                    os.remove(path)
 
-        print(f"\n✅ Indexación completa. Total de {total_chunks} chunks guardados.")
-        return total_chunks
\ No newline at end of file
+        for callback in self._listeners:
+            callback()
+        print(f"Eliminados {len(ids)} chunks de '{source}'.")
+        return len(ids)
@@ -0,0 +1,282 @@
+import os
+import re
+import json
+import math
+import threading
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+
+# Frequent Spanish and English words that carry no lexical signal.
+STOPWORDS = frozenset(
+    "a al algo ante como con cual cuando de del desde donde el ella ellos en entre era es esa ese eso esta este "
+    "esto fue ha han hay la las le les lo los mas me mi muy no nos o para pero por que se segun ser si sin sobre "
+    "son su sus tambien te tiene un una uno unos y ya the of and to in is are was for on with as by an be this "
+    "that it at from or".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, strip accents and split into word tokens, dropping stopwords.
+
+    Args:
+        text (str): text to tokenize
+
+    Returns:
+        List[str]: tokens
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [t for t in re.findall(r"\w+", text) if t not in STOPWORDS and (len(t) > 1 or t.isdigit())]
+
+class BM25Index:
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        """Inverted index with BM25 scoring, used as the sparse side of hybrid retrieval.
+
+        Exact terms such as acronyms, equation or author names are matched literally,
+        which dense embeddings often miss. Documents are keyed by the same chunk IDs as
+        the vector store, so both retrievers can be fused and kept in sync.
+
+        Only term statistics, IDs and metadata are kept, in memory and on disk: texts
+        live in the vector store, and search results have to be filled from it.
+
+        `path` is an append-only JSON-lines log: `save` appends the documents changed
+        since the last save, so indexing one document never rewrites the whole corpus.
+        The log is rewritten compacted when superseded records outnumber live ones.
+
+        A build (`begin_build`) collects writes in a separate in-memory index while
+        searches keep using the current one; `commit_build` swaps it in and saves it,
+        `abort_build` discards it. This mirrors `VectorStore.begin_build`, so a full
+        re-index never makes lexical hits disappear.
+
+        Args:
+            path (str, optional): File the index is loaded from and saved to. In-memory only if None.
+            k1 (float, optional): BM25 term-frequency saturation. Defaults to 1.5.
+            b (float, optional): BM25 length normalization. Defaults to 0.75.
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        # Documents added, changed or removed since the last save.
+        self._pending: Set[str] = set()
+        # Whether the next save has to rewrite the whole file (after a reset or an old-format load).
+        self._rewrite = False
+        self._log_records = 0
+        self._build: Optional["BM25Index"] = None
+        # The file is read on first use, not at construction, so building the index never slows startup.
+        self._loaded = False
+
+    def _load(self) -> None:
+        """Replay the log at `path` the first time the index is used. Callers hold the lock."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    # Record cut short by a crash while appending: the rest of the log is unusable.
+                    self._rewrite = True
+                    break
+                if "id" not in row:
+                    # Index saved by an earlier version: a single object with the text of every document.
+                    for doc_id, doc in row.items():
+                        self._insert(doc_id, Counter(tokenize(doc["text"])), doc["metadata"])
+                    self._rewrite = True
+                    continue
+                self._log_records += 1
+                if row.get("deleted"):
+                    if row["id"] in self._docs:
+                        self._remove(row["id"])
+                else:
+                    self._insert(row["id"], row["tf"], row["metadata"])
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self._lock:
+            self._load()
+            return doc_id in self._docs
+
+    def _insert(self, doc_id: str, tf: Dict[str, int], metadata: Dict[str, Any]) -> None:
+        if doc_id in self._docs:
+            self._remove(doc_id)
+        length = sum(tf.values())
+        self._docs[doc_id] = {"metadata": dict(metadata), "length": length, "terms": list(tf)}
+        for term, count in tf.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        self._total_length += length
+
+    def _remove(self, doc_id: str) -> None:
+        doc = self._docs.pop(doc_id)
+        for term in doc["terms"]:
+            posting = self._postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self._postings[term]
+        self._total_length -= doc["length"]
+
+    def _record(self, doc_id: str) -> Dict[str, Any]:
+        """Log record with the current state of a document."""
+        doc = self._docs.get(doc_id)
+        if doc is None:
+            return {"id": doc_id, "deleted": True}
+        tf = {term: self._postings[term][doc_id] for term in doc["terms"]}
+        return {"id": doc_id, "tf": tf, "metadata": doc["metadata"]}
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Index (or re-index) documents. Only their term frequencies are kept, not the texts.
+
+        Args:
+            ids (List[str]): document IDs
+            texts (List[str]): document texts
+            metadatas (List[Dict[str, Any]]): document metadata
+        """
+        if self._build is not None:
+            return self._build.add(ids, texts, metadatas)
+        with self._lock:
+            self._load()
+            for doc_id, text, meta in zip(ids, texts, metadatas):
+                self._insert(doc_id, Counter(tokenize(text)), meta)
+                self._pending.add(doc_id)
+
+    def delete(self, ids: List[str]) -> None:
+        """Remove documents. Unknown IDs are ignored.
+
+        Args:
+            ids (List[str]): document IDs
+        """
+        if self._build is not None:
+            return self._build.delete(ids)
+        with self._lock:
+            self._load()
+            for doc_id in ids:
+                if doc_id in self._docs:
+                    self._remove(doc_id)
+                    self._pending.add(doc_id)
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Replace the metadata of indexed documents.
+
+        Args:
+            ids (List[str]): document IDs
+            metadatas (List[Dict[str, Any]]): new metadata
+        """
+        if self._build is not None:
+            return self._build.update_metadata(ids, metadatas)
+        with self._lock:
+            self._load()
+            for doc_id, meta in zip(ids, metadatas):
+                if doc_id in self._docs:
+                    self._docs[doc_id]["metadata"] = dict(meta)
+                    self._pending.add(doc_id)
+
+    def reset(self) -> None:
+        """Remove every document."""
+        with self._lock:
+            self._loaded = True
+            self._docs.clear()
+            self._postings.clear()
+            self._total_length = 0
+            self._pending.clear()
+            self._rewrite = True
+
+    def begin_build(self) -> None:
+        """Send every write to a new, empty index until `commit_build`. Searches keep using the current one.
+
+        Raises:
+            RuntimeError: If a build is already in progress.
+        """
+        with self._lock:
+            if self._build is not None:
+                raise RuntimeError("A build of the BM25 index is already in progress")
+            self._build = BM25Index(k1=self.k1, b=self.b)
+
+    def commit_build(self) -> None:
+        """Replace the current index with the one being built and save it."""
+        with self._lock:
+            build, self._build = self._build, None
+            if build is None:
+                return
+            self._loaded = True
+            self._docs, self._postings, self._total_length = build._docs, build._postings, build._total_length
+            self._pending.clear()
+            self._rewrite = True
+        self.save()
+
+    def abort_build(self) -> None:
+        """Discard the index being built."""
+        with self._lock:
+            self._build = None
+
+    def save(self) -> None:
+        """Append the documents changed since the last save to `path`, compacting the file when it is mostly
+        superseded records."""
+        with self._lock:
+            self._load()
+            if not self.path or not (self._pending or self._rewrite):
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            compact = self._rewrite or self._log_records + len(self._pending) > 2 * len(self._docs) + 1000
+            ids = list(self._docs) if compact else list(self._pending)
+            lines = "".join(json.dumps(self._record(doc_id), ensure_ascii=False) + "\n" for doc_id in ids)
+            if compact:
+                with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                    f.write(lines)
+                os.replace(self.path + ".tmp", self.path)
+                self._log_records = len(ids)
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+                self._log_records += len(ids)
+            self._pending.clear()
+            self._rewrite = False
+
+    def search(self, query: str, k: int = 4, source: Optional[str] = None) -> Dict[str, Any]:
+        """Rank documents by BM25 score against the query.
+
+        Args:
+            query (str): query text
+            k (int, optional): number of results. Defaults to 4.
+            source (str, optional): only rank documents whose "source" metadata equals this value
+
+        Returns:
+            Dict[str, Any]: "ids", "metadatas" and "scores" (BM25, higher is more relevant) of the best
+                documents, and "documents" with None for every one: texts are not stored. Documents
+                without any query term are not returned.
+        """
+        with self._lock:
+            self._load()
+            n = len(self._docs)
+            if n == 0:
+                return {"ids": [], "documents": [], "metadatas": [], "scores": []}
+            avg_length = self._total_length / n
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    if source is not None and self._docs[doc_id]["metadata"].get("source") != source:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._docs[doc_id]["length"] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return {
+                "ids": [doc_id for doc_id, _ in top],
+                "documents": [None] * len(top),
+                "metadatas": [dict(self._docs[doc_id]["metadata"]) for doc_id, _ in top],
+                "scores": [score for _, score in top],
+            }
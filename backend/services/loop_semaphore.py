@@ -0,0 +1,44 @@
+import asyncio
+import threading
+import weakref
+from typing import Optional
+
+class LoopSemaphore:
+    def __init__(self, value: int):
+        """An `asyncio.Semaphore` per running event loop, for objects that outlive a loop.
+
+        An asyncio semaphore binds to the first loop that waits on it, so a process-wide
+        singleton holding one breaks as soon as another loop uses it (a second
+        `asyncio.run`, a test, a benchmark). This wrapper creates the semaphore of each
+        loop on first use; the limit applies per loop.
+
+        Args:
+            value (int): Permits of every loop's semaphore.
+        """
+        self.value = value
+        self._lock = threading.Lock()
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+
+    def _get(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore: Optional[asyncio.Semaphore] = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.value)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+    async def acquire(self) -> bool:
+        """Wait for a permit of the running loop's semaphore."""
+        return await self._get().acquire()
+
+    def release(self) -> None:
+        """Give back a permit; must run on the loop that acquired it."""
+        self._get().release()
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
@@ -0,0 +1,247 @@
+import os
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+# Latency buckets in seconds, from a cache hit to a slow generation.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Registry:
+    def __init__(self):
+        """Set of metrics rendered together in the Prometheus text exposition format."""
+        self._metrics: List["_Metric"] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """All the metrics in the Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """Monotonically increasing value, per combination of labels."""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(v)}" for key, v in values.items()]
+
+class Gauge(_Metric):
+    """Value that can go up and down, per combination of labels."""
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(v)}" for key, v in values.items()]
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, per combination of labels."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: Registry = REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: count of every bucket (non-cumulative, last one is +Inf), sum.
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        lines = []
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+# Metrics of the application.
+QUERY_STAGE_SECONDS = Histogram("rag_query_stage_seconds", "Time spent in each stage of a query.", ["stage"])
+QUERY_SECONDS = Histogram("rag_query_seconds", "End-to-end time of a query, by entry point.", ["kind"])
+INDEX_STAGE_SECONDS = Histogram("rag_index_stage_seconds", "Time spent in each stage of indexing a document.", ["stage"],
+                                buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0))
+INDEXED_CHUNKS = Counter("rag_indexed_chunks_total", "Chunks embedded and stored by the indexer.")
+PROMPT_TOKENS = Histogram("rag_prompt_tokens", "Estimated tokens of every prompt sent to the LLM.", buckets=TOKEN_BUCKETS)
+ANSWER_TOKENS = Histogram("rag_answer_tokens", "Estimated tokens of every generated answer.", buckets=TOKEN_BUCKETS)
+ANSWER_CACHE_REQUESTS = Counter("rag_answer_cache_requests_total", "Answer cache lookups, by result.", ["result"])
+RERANK_REQUESTS = Counter("rag_rerank_requests_total", "Reranked questions, by whether scoring finished within the budget.", ["result"])
+SESSION_RETRIEVALS = Counter("rag_session_retrievals_total", "Follow-ups of a session, by whether the previous contexts were reused.", ["result"])
+CACHE_STATS = Gauge("rag_cache", "Counters of the answer and embedding caches, sampled at scrape time.", ["cache", "stat"])
+SCHEDULER_QUEUE_DEPTH = Gauge("rag_scheduler_queue_depth", "Provider calls waiting for the scheduler, by priority.", ["scheduler", "priority"])
+SCHEDULER_IN_FLIGHT = Gauge("rag_scheduler_in_flight", "Provider calls in progress.", ["scheduler"])
+SCHEDULER_LIMIT = Gauge("rag_scheduler_concurrency_limit", "Current adaptive concurrency limit of the scheduler.", ["scheduler"])
+SCHEDULER_WAIT_SECONDS = Histogram("rag_scheduler_wait_seconds", "Time a provider call waited for the scheduler, by priority.",
+                                   ["scheduler", "priority"])
+SCHEDULER_THROTTLED = Counter("rag_scheduler_throttled_total", "Provider calls rejected with 429/503.", ["scheduler"])
+HTTP_REQUEST_SECONDS = Histogram("rag_http_request_seconds", "Time to answer an HTTP request.", ["method", "path", "status"])
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """Rough token count of a text, with the characters-per-token ratio of `PromptAssembler`."""
+    return int(len(text) / chars_per_token) + 1 if text else 0
+
+# OpenTelemetry tracer, set by `enable_tracing`. Spans are only created when it is set.
+_tracer = None
+
+def enable_tracing(service_name: str = "rag-backend") -> bool:
+    """Also report every `Trace` span to OpenTelemetry.
+
+    Requires the `opentelemetry-api` package. If `opentelemetry-sdk` and the OTLP
+    exporter are installed too and `OTEL_EXPORTER_OTLP_ENDPOINT` is set, spans are
+    exported there; otherwise they go to whatever tracer provider is configured
+    (e.g. by `opentelemetry-instrument`).
+
+    Args:
+        service_name (str, optional): Name of the tracer and of the exported service. Defaults to "rag-backend".
+
+    Returns:
+        bool: Whether tracing could be enabled.
+    """
+    global _tracer
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        print("[metrics] opentelemetry-api no está instalado; trazas deshabilitadas")
+        return False
+    if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+            trace.set_tracer_provider(provider)
+        except ImportError:
+            print("[metrics] opentelemetry-sdk u OTLP exporter no instalados; se usa el proveedor configurado")
+    _tracer = trace.get_tracer(service_name)
+    return True
+
+class Trace:
+    def __init__(self, name: str, histogram: Histogram = QUERY_STAGE_SECONDS):
+        """Timings of the stages of one operation (a query, the indexing of a document).
+
+        Every `span` adds its duration to the total of its stage and, with `enable_tracing`,
+        creates an OpenTelemetry span named `<name>.<stage>`. Spans may run concurrently in
+        different threads. `finish` records the total of every stage in `histogram`.
+
+        Args:
+            name (str): Name of the operation.
+            histogram (Histogram, optional): Histogram with a "stage" label. Defaults to `QUERY_STAGE_SECONDS`.
+        """
+        self.name = name
+        self.histogram = histogram
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as `stage`."""
+        otel = _tracer.start_as_current_span(f"{self.name}.{stage}") if _tracer is not None else nullcontext()
+        start = time.perf_counter()
+        with otel:
+            try:
+                yield
+            finally:
+                self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Add a duration measured elsewhere to `stage`."""
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def operation(self) -> Any:
+        """OpenTelemetry span covering the whole operation, parent of the stage spans (a no-op without tracing)."""
+        return _tracer.start_as_current_span(self.name) if _tracer is not None else nullcontext()
+
+    def timings(self) -> Dict[str, float]:
+        """Milliseconds spent in every stage, plus "total" since the trace was created."""
+        with self._lock:
+            out = {stage: round(seconds * 1000, 2) for stage, seconds in self.stages.items()}
+        out["total"] = round((time.perf_counter() - self.started) * 1000, 2)
+        return out
+
+    def finish(self) -> Dict[str, float]:
+        """Record every stage in the histogram and return `timings`."""
+        with self._lock:
+            stages = dict(self.stages)
+        for stage, seconds in stages.items():
+            self.histogram.observe(seconds, stage=stage)
+        return self.timings()
@@ -0,0 +1,174 @@
+import time
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Marks the end of the stream on a queue.
+_DONE = object()
+
+@dataclass
+class Stage:
+    """A step of the pipeline.
+
+    Args:
+        name (str): Name used in the throughput report.
+        fn (Callable[[Any], Any]): Function applied to every item. Its return value is passed to the
+            next stage; the return value of the last stage is discarded.
+        workers (int, optional): Number of threads running this stage. Defaults to 1.
+    """
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+
+@dataclass
+class StageStats:
+    """Throughput counters of a single stage."""
+    name: str
+    items: int = 0
+    units: int = 0
+    busy_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, units: int, seconds: float) -> None:
+        with self._lock:
+            self.items += 1
+            self.units += units
+            self.busy_seconds += seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        rate = self.units / self.busy_seconds if self.busy_seconds > 0 else 0.0
+        return {
+            "items": self.items,
+            "units": self.units,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "units_per_second": round(rate, 2),
+        }
+
+class Pipeline:
+    def __init__(self, queue_size: int = 4, size: Callable[[Any], int] = len):
+        """Producer/consumer pipeline with bounded queues between stages.
+
+        The source iterable is consumed in its own thread ("extract" stage) and every
+        stage runs in its own thread(s). Queues are bounded so a slow stage applies
+        backpressure to the previous ones instead of letting items pile up in memory.
+
+        Args:
+            queue_size (int, optional): Maximum number of items waiting between two stages. Defaults to 4.
+            size (Callable[[Any], int], optional): Counts the units inside an item (e.g. chunks in a batch)
+                for the throughput report. Defaults to `len`.
+        """
+        self.queue_size = queue_size
+        self.size = size
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def _put(self, q: "queue.Queue", item: Any) -> bool:
+        """Put an item on a queue, giving up if the pipeline is being stopped."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: "queue.Queue") -> Any:
+        """Get an item from a queue, returning `_DONE` if the pipeline is being stopped."""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, error: BaseException) -> None:
+        self._errors.append(error)
+        self._stop.set()
+
+    def _produce(self, source: Iterable, out_q: "queue.Queue", stats: StageStats, consumers: int) -> None:
+        try:
+            it = iter(source)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    break
+                stats.record(self.size(item), time.perf_counter() - start)
+                if not self._put(out_q, item):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for _ in range(consumers):
+                self._put(out_q, _DONE)
+
+    def _consume(self, stage: Stage, in_q: "queue.Queue", out_q: Optional["queue.Queue"], stats: StageStats,
+                 remaining: List[int], lock: threading.Lock, consumers: int) -> None:
+        try:
+            while True:
+                item = self._get(in_q)
+                if item is _DONE:
+                    break
+                units = self.size(item)
+                start = time.perf_counter()
+                result = stage.fn(item)
+                stats.record(units, time.perf_counter() - start)
+                if out_q is not None and not self._put(out_q, result):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # The last worker of a stage closes the stream for the next one.
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and out_q is not None:
+                for _ in range(consumers):
+                    self._put(out_q, _DONE)
+
+    def run(self, source: Iterable, stages: List[Stage]) -> Dict[str, Dict[str, Any]]:
+        """Run the pipeline until the source is exhausted and every item went through all stages.
+
+        Args:
+            source (Iterable): Items to process, e.g. a generator of batches.
+            stages (List[Stage]): Stages applied in order to every item.
+
+        Raises:
+            BaseException: The first error raised by the source or any stage. The rest of the
+                pipeline is stopped before it is re-raised.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Throughput counters per stage, keyed by stage name.
+        """
+        stats = [StageStats("extract")] + [StageStats(s.name) for s in stages]
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in stages]
+        threads = [threading.Thread(
+            target=self._produce, args=(source, queues[0], stats[0], stages[0].workers),
+            name="pipeline-extract", daemon=True,
+        )]
+        for i, stage in enumerate(stages):
+            out_q = queues[i + 1] if i + 1 < len(stages) else None
+            consumers = stages[i + 1].workers if i + 1 < len(stages) else 0
+            remaining, lock = [stage.workers], threading.Lock()
+            for w in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._consume,
+                    args=(stage, queues[i], out_q, stats[i + 1], remaining, lock, consumers),
+                    name=f"pipeline-{stage.name}-{w}", daemon=True,
+                ))
+
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        if self._errors:
+            raise self._errors[0]
+
+        report = {s.name: s.as_dict() for s in stats}
+        report["total"] = {"seconds": round(elapsed, 3), "units": stats[-1].units}
+        return report
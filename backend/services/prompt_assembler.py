@@ -0,0 +1,119 @@
+import re
+import math
+from typing import Any, Dict, List, Optional, Set
+
+class PromptAssembler:
+    def __init__(self, max_tokens: int = 3000, dedup_threshold: float = 0.8, max_overlap: int = 150,
+                 chars_per_token: float = 4.0, shingle_size: int = 3):
+        """Turn retrieved chunks into the context passages of the prompt.
+
+        Chunks are produced with a sliding window, so neighbouring hits of the same page
+        repeat `max_overlap` characters. The assembler:
+            1. Merges chunks of the same source and page with consecutive chunk numbers into one
+               passage, removing the repeated overlap.
+            2. Drops passages whose word shingles are mostly contained in a better ranked passage.
+            3. Packs passages, best ranked first, while the estimated token count fits `max_tokens`.
+
+        Args:
+            max_tokens (int, optional): Token budget of the context block. Defaults to 3000.
+            dedup_threshold (float, optional): Fraction of a passage's shingles already present in a kept
+                passage above which it is considered a duplicate. Defaults to 0.8.
+            max_overlap (int, optional): Longest overlap, in characters, searched between adjacent chunks.
+                Defaults to 150.
+            chars_per_token (float, optional): Characters per token used to estimate prompt size. Defaults to 4.0.
+            shingle_size (int, optional): Words per shingle. Defaults to 3.
+        """
+        self.max_tokens = max_tokens
+        self.dedup_threshold = dedup_threshold
+        self.max_overlap = max_overlap
+        self.chars_per_token = chars_per_token
+        self.shingle_size = shingle_size
+
+    def estimate_tokens(self, text: str) -> int:
+        """Approximate number of tokens of a text."""
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def _merge_text(self, left: str, right: str) -> str:
+        """Concatenate two consecutive chunks, keeping their shared overlap once."""
+        for size in range(min(self.max_overlap, len(left), len(right)), 0, -1):
+            if left.endswith(right[:size]):
+                return left + right[size:]
+        return left + "\n" + right
+
+    def _merge_adjacent(self, contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Group consecutive chunks of the same page. Every passage keeps the best rank of its chunks.
+
+        Returns:
+            List[Dict[str, Any]]: Passages with "text" and "rank", ordered by rank.
+        """
+        passages, loose = [], []
+        pages: Dict[tuple, List[tuple]] = {}
+        for rank, ctx in enumerate(contexts):
+            meta = ctx.get("metadata") or {}
+            if "chunk" in meta:
+                pages.setdefault((meta.get("source"), meta.get("page")), []).append((meta["chunk"], rank, ctx["text"]))
+            else:
+                loose.append({"text": ctx["text"], "rank": rank})
+
+        for chunks in pages.values():
+            chunks.sort()
+            run = None
+            for chunk, rank, text in chunks:
+                if run is not None and chunk == run["last"]:
+                    continue
+                if run is not None and chunk == run["last"] + 1:
+                    run["text"] = self._merge_text(run["text"], text)
+                    run["rank"] = min(run["rank"], rank)
+                    run["last"] = chunk
+                    continue
+                if run is not None:
+                    passages.append(run)
+                run = {"text": text, "rank": rank, "last": chunk}
+            passages.append(run)
+
+        passages = [{"text": p["text"], "rank": p["rank"]} for p in passages] + loose
+        return sorted(passages, key=lambda p: p["rank"])
+
+    def _shingles(self, text: str) -> Set[str]:
+        words = re.findall(r"\w+", text.lower())
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def _is_duplicate(self, shingles: Set[str], kept: List[Set[str]]) -> bool:
+        # Containment rather than Jaccard, so a chunk already included in a longer merged passage is dropped too.
+        for other in kept:
+            if shingles and len(shingles & other) / len(shingles) >= self.dedup_threshold:
+                return True
+        return False
+
+    def assemble(self, contexts: List[Dict[str, Any]], max_tokens: Optional[int] = None) -> List[str]:
+        """Build the context passages of a prompt.
+
+        Args:
+            contexts (List[Dict[str, Any]]): Retrieved contexts with "text" and "metadata", best first.
+            max_tokens (int, optional): Overrides the token budget of the assembler.
+
+        Returns:
+            List[str]: Passages, best ranked first, whose estimated size fits the budget. If not even the
+                best passage fits, it is truncated to the budget.
+        """
+        budget = self.max_tokens if max_tokens is None else max_tokens
+        selected: List[str] = []
+        kept: List[Set[str]] = []
+        used = 0
+        for passage in self._merge_adjacent(contexts):
+            text = passage["text"]
+            shingles = self._shingles(text)
+            if self._is_duplicate(shingles, kept):
+                continue
+            tokens = self.estimate_tokens(text)
+            if used + tokens > budget:
+                if selected:
+                    continue
+                text = text[:int(budget * self.chars_per_token)]
+                tokens = self.estimate_tokens(text)
+            selected.append(text)
+            kept.append(shingles)
+            used += tokens
+        return selected
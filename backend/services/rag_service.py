@@ -1,10 +1,27 @@
-from typing import List, Dict, Any
+import re
+import time
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from core.embeddings import Embeddings
 from core.llm import LLM
 from core.vectorstore import VectorStore
+from services.answer_cache import SemanticAnswerCache
+from services.singleflight import SingleFlight
+from services.loop_semaphore import LoopSemaphore
+from services.lexical_index import BM25Index
+from services.fusion import reciprocal_rank_fusion
+from services.prompt_assembler import PromptAssembler
+from services.reranking import RerankStage
+from services.conversation import Message, condense_question, covered_by, format_history, history_key, is_follow_up
+from services.session_store import ChatSession, SessionStore
+from services.metrics import Trace, QUERY_SECONDS, PROMPT_TOKENS, ANSWER_TOKENS, ANSWER_CACHE_REQUESTS, SESSION_RETRIEVALS, estimate_tokens
 
 class RAGService:
-    def __init__(self, vs: VectorStore, emb: Embeddings, llm: LLM):
+    def __init__(self, vs: VectorStore, emb: Embeddings, llm: LLM, answer_cache: Optional[SemanticAnswerCache] = None,
+                 max_llm_concurrency: int = 8, lexical: Optional[BM25Index] = None, hybrid_fetch: int = 3,
+                 assembler: Optional[PromptAssembler] = None, sessions: Optional[SessionStore] = None,
+                 reuse_coverage: float = 0.8, reranker: Optional[RerankStage] = None, rerank_fetch: int = 4):
         """Retrieval-Augmented Generation (RAG) service.
 
         This class provides an interface that connects a vector store, 
@@ -14,56 +31,491 @@ class RAGService:
             vs (VectorStore): Vector store instance used for similarity search.
             emb (Embeddings): Embedding model for encoding queries.
             llm (LLM): Language model used to generate answers.
+            answer_cache (SemanticAnswerCache, optional): Cache of generated answers. Disabled if None.
+            max_llm_concurrency (int, optional): Maximum number of LLM calls in flight on the async path,
+                shared by every request. Defaults to 8.
+            lexical (BM25Index, optional): Sparse lexical index. When given, retrieval is hybrid: BM25 and
+                vector search run in parallel and are merged with reciprocal rank fusion. Defaults to None.
+            hybrid_fetch (int, optional): Each retriever fetches `hybrid_fetch * k` candidates before fusion.
+                Defaults to 3.
+            assembler (PromptAssembler, optional): Merges, deduplicates and packs the retrieved contexts under
+                a token budget before they go into the prompt. Contexts are joined as retrieved if None.
+            sessions (SessionStore, optional): Store of chat sessions. Queries with a `session_id` take their
+                history from it, and a follow-up reuses the contexts of the previous turn instead of embedding
+                and searching again when they hold its terms. Sessions are not supported if None.
+            reuse_coverage (float, optional): Fraction of the terms of a follow-up that the previous contexts
+                must hold to be reused. Defaults to 0.8.
+            reranker (RerankStage, optional): Reorders the retrieved candidates; `rerank_fetch * k` candidates
+                are retrieved and only the best `k` are kept. Contexts keep retrieval order if None.
+            rerank_fetch (int, optional): Candidates retrieved per context kept when reranking. Defaults to 4.
         """
         self.vs = vs
         self.emb = emb
         self.llm = llm
+        self.answer_cache = answer_cache
+        self._llm_slots = LoopSemaphore(max_llm_concurrency)
+        self.inflight = SingleFlight()
+        self.lexical = lexical
+        self.hybrid_fetch = hybrid_fetch
+        self._lexical_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bm25") if lexical is not None else None
+        self.assembler = assembler
+        self.sessions = sessions
+        self.reuse_coverage = reuse_coverage
+        self.reranker = reranker
+        self.rerank_fetch = rerank_fetch
+
+    def _flight_key(self, question: str, k: int, source: Optional[str] = None,
+                    history: Optional[List[Message]] = None, session_id: Optional[str] = None) -> Tuple[Any, ...]:
+        """Key identifying identical queries: the question lowercased with collapsed whitespace, `k`, `source`,
+        the recent chat history and the session."""
+        return re.sub(r"\s+", " ", question).strip().lower(), k, source, history_key(history), session_id
         
-    def _build_prompt(self, question: str, contexts: List[str]) -> str:
+    def _build_prompt(self, question: str, contexts: List[str], history: Optional[List[Message]] = None) -> str:
         """Build the prompt for the LLM using the retrieved contexts.
 
         Args:
             question (str): The user question.
             contexts (List[str]): List of text passages retrieved from the vector store.
+            history (List[Message], optional): Previous messages of the conversation, oldest first.
+                Only the last few turns go into the prompt.
 
         Returns:
-            str: A formatted prompt containing the context and the user question.
+            str: A formatted prompt containing the context, the conversation and the user question.
         """
         context_block = "\n\n---\n\n".join(contexts)
+        conversation = format_history(history)
+        conversation_block = f"Conversación previa:\n{conversation}\n\n" if conversation else ""
         return (
             "Eres un asistente que responde basándote EXCLUSIVAMENTE en el contexto de la tesis. "
             "Si la respuesta no está en el contexto, di que no aparece en el documento. "
             "Cita página(s) cuando sea posible.\n\n"
             f"Contexto:\n{context_block}\n\n"
+            f"{conversation_block}"
             f"Pregunta: {question}\n\n"
             "Respuesta concisa y bien estructurada:"
         )
 
-    def query(self, question: str, k: int = 4) -> Dict[str, Any]:
+    def _prompt(self, question: str, contexts: List[Dict[str, Any]], trace: Trace,
+                history: Optional[List[Message]] = None) -> str:
+        """Build the prompt from retrieved contexts, through the assembler if there is one."""
+        with trace.span("prompt"):
+            if self.assembler is None:
+                prompt = self._build_prompt(question, [c["text"] for c in contexts], history)
+            else:
+                prompt = self._build_prompt(question, self.assembler.assemble(contexts), history)
+        PROMPT_TOKENS.observe(estimate_tokens(prompt))
+        return prompt
+
+    def _cached(self, q_emb: Optional[List[float]], context_ids: List[str], trace: Trace,
+                history: Optional[List[Message]] = None) -> Optional[Any]:
+        """Look up the answer cache, counting hits and misses. Reused contexts have no question embedding.
+        The history is part of the key: it is in the prompt, so it shapes the answer."""
+        if self.answer_cache is None or q_emb is None:
+            return None
+        with trace.span("cache"):
+            hit = self.answer_cache.get(q_emb, context_ids, history_key(history))
+        ANSWER_CACHE_REQUESTS.inc(result="hit" if hit is not None else "miss")
+        return hit
+
+    def _store(self, question: str, q_emb: Optional[List[float]], context_ids: List[str], answer: str,
+               history: Optional[List[Message]] = None) -> None:
+        """Count the tokens of a generated answer and put it in the answer cache."""
+        ANSWER_TOKENS.observe(estimate_tokens(answer))
+        if self.answer_cache is not None and q_emb is not None:
+            self.answer_cache.put(question, q_emb, context_ids, answer, history_key(history))
+
+    def _lexical_search(self, question: str, fetch: int, source: Optional[str], trace: Trace) -> Dict[str, Any]:
+        with trace.span("lexical"):
+            return self.lexical.search(question, fetch, source)
+
+    def _fuse(self, dense: Dict[str, Any], sparse: Dict[str, Any], n: int) -> Dict[str, Any]:
+        """Fuse the vector and BM25 rankings into the top `n`. BM25 keeps no texts: those of chunks only it
+        found are read from the vector store, and chunks the store no longer has are skipped."""
+        res = reciprocal_rank_fusion([dense, sparse], len(dense["ids"]) + len(sparse["ids"]))
+        keep: List[int] = []
+        start = 0
+        while len(keep) < n and start < len(res["ids"]):
+            window = range(start, min(start + n - len(keep), len(res["ids"])))
+            missing = [i for i in window if res["documents"][i] is None]
+            if missing:
+                for i, text in zip(missing, self.vs.get_texts([res["ids"][i] for i in missing])):
+                    res["documents"][i] = text
+            keep.extend(i for i in window if res["documents"][i] is not None)
+            start = window.stop
+        return {key: [values[i] for i in keep] for key, values in res.items()}
+
+    def _to_contexts(self, res: Dict[str, Any]) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Turn a search result into context IDs and context dictionaries."""
+        contexts = []
+        scores = res.get("scores")
+        for i, (txt, meta, dist) in enumerate(zip(res["documents"], res["metadatas"], res["distances"])):
+            context = {"text": txt, "metadata": meta, "distance": float(dist) if dist is not None else None}
+            if scores is not None:
+                context["score"] = float(scores[i])
+            contexts.append(context)
+        return res.get("ids", []), contexts
+
+    def _candidates(self, k: int) -> int:
+        """Number of contexts retrieved for `k` contexts in the prompt."""
+        return k * self.rerank_fetch if self.reranker is not None else k
+
+    def _rerank(self, question: str, context_ids: List[str], contexts: List[Dict[str, Any]], k: int,
+                trace: Trace) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """The best `k` candidates according to the reranker, or the first `k` without one."""
+        if self.reranker is None:
+            return context_ids[:k], contexts[:k]
+        return self.reranker.rerank(question, context_ids, contexts, k, trace)
+
+    def _retrieve(self, question: str, k: int, source: Optional[str],
+                  trace: Trace) -> Tuple[List[float], List[str], List[Dict[str, Any]]]:
+        """Embed the question and retrieve its top-k contexts.
+
+        In hybrid mode the BM25 search runs in a worker thread while the question is
+        embedded and searched in the vector store, and the two rankings are fused: each
+        context gets its fused "score", and keeps its vector "distance" (None if only BM25
+        found it). With a reranker, more
+        candidates are retrieved and the reranker keeps the best `k`.
+
+        Args:
+            question (str): The input question.
+            k (int): Number of contexts to retrieve.
+            source (str): Only retrieve chunks of this document. Every document if None.
+            trace (Trace): Receives the "embed", "search", "lexical" and "rerank" timings.
+
+        Returns:
+            Tuple[List[float], List[str], List[Dict[str, Any]]]: The question embedding, the IDs of the
+                retrieved contexts and the contexts with text, metadata, and distance.
+        """
+        n = self._candidates(k)
+        if self.lexical is None:
+            with trace.span("embed"):
+                q_emb = self.emb.embed([question])[0]
+            with trace.span("search"):
+                res = self.vs.query(q_emb, k=n, source=source)
+            context_ids, contexts = self._to_contexts(res)
+            return (q_emb, *self._rerank(question, context_ids, contexts, k, trace))
+
+        fetch = max(n, k * self.hybrid_fetch)
+        sparse = self._lexical_pool.submit(self._lexical_search, question, fetch, source, trace)
+        with trace.span("embed"):
+            q_emb = self.emb.embed([question])[0]
+        with trace.span("search"):
+            dense = self.vs.query(q_emb, k=fetch, source=source)
+        res = self._fuse(dense, sparse.result(), n)
+        context_ids, contexts = self._to_contexts(res)
+        return (q_emb, *self._rerank(question, context_ids, contexts, k, trace))
+
+    async def _aretrieve(self, question: str, k: int, source: Optional[str],
+                         trace: Trace) -> Tuple[List[float], List[str], List[Dict[str, Any]]]:
+        """Async variant of `_retrieve`."""
+        async def dense(fetch: int) -> Tuple[List[float], Dict[str, Any]]:
+            with trace.span("embed"):
+                q_emb = (await self.emb.aembed([question]))[0]
+            with trace.span("search"):
+                return q_emb, await self.vs.aquery(q_emb, k=fetch, source=source)
+
+        n = self._candidates(k)
+        if self.lexical is None:
+            q_emb, res = await dense(n)
+        else:
+            fetch = max(n, k * self.hybrid_fetch)
+            (q_emb, dense_res), sparse_res = await asyncio.gather(
+                dense(fetch),
+                asyncio.get_running_loop().run_in_executor(self._lexical_pool, self._lexical_search, question, fetch, source, trace),
+            )
+            res = await asyncio.to_thread(self._fuse, dense_res, sparse_res, n)
+        context_ids, contexts = self._to_contexts(res)
+        if self.reranker is None:
+            return q_emb, context_ids[:k], contexts[:k]
+        # Scoring is CPU-bound (a cross-encoder takes tens of milliseconds): keep it off the event loop.
+        return (q_emb, *await asyncio.to_thread(self._rerank, question, context_ids, contexts, k, trace))
+
+    def _session(self, session_id: Optional[str],
+                 history: Optional[List[Message]]) -> Tuple[Optional[ChatSession], Optional[List[Message]]]:
+        """The session of a query and the history to use: the session's turns, or `history` for a new session."""
+        if session_id is None or self.sessions is None:
+            return None, history
+        session = self.sessions.get(session_id)
+        return session, session.turns or history
+
+    def _reusable(self, question: str, k: int, source: Optional[str], session: Optional[ChatSession]) -> bool:
+        """Whether a follow-up can be answered with the contexts of the previous turn of its session."""
+        if session is None or not session.contexts or session.source != source or session.k < k:
+            return False
+        reuse = is_follow_up(question) and covered_by(question, session.contexts, self.reuse_coverage)
+        SESSION_RETRIEVALS.inc(result="reused" if reuse else "searched")
+        return reuse
+
+    def _contexts(self, question: str, k: int, source: Optional[str], history: Optional[List[Message]],
+                  session: Optional[ChatSession], trace: Trace) -> Tuple[Optional[List[float]], List[str], List[Dict[str, Any]]]:
+        """Like `_retrieve` for the condensed question, or the previous contexts of the session (without embedding)."""
+        if self._reusable(question, k, source, session):
+            return None, session.context_ids[:k], session.contexts[:k]
+        return self._retrieve(condense_question(question, history), k, source, trace)
+
+    async def _acontexts(self, question: str, k: int, source: Optional[str], history: Optional[List[Message]],
+                         session: Optional[ChatSession], trace: Trace) -> Tuple[Optional[List[float]], List[str], List[Dict[str, Any]]]:
+        """Async variant of `_contexts`."""
+        if self._reusable(question, k, source, session):
+            return None, session.context_ids[:k], session.contexts[:k]
+        return await self._aretrieve(condense_question(question, history), k, source, trace)
+
+    def _finish_turn(self, question: str, k: int, source: Optional[str], session: Optional[ChatSession],
+                     context_ids: List[str], out: Dict[str, Any]) -> Dict[str, Any]:
+        """Record an answered question in its session and mark the result with the session."""
+        if session is not None:
+            self.sessions.record(session.session_id, question, out["answer"], context_ids, out["contexts"], source, k)
+            out["session_id"] = session.session_id
+        return out
+
+    def query(self, question: str, k: int = 4, source: Optional[str] = None,
+              history: Optional[List[Message]] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
         """Query the RAG pipeline to answer a question based on the thesis.
 
+        Identical questions (same normalized text, `k`, `source` and history) arriving while one is being
+        answered wait for it and share its result instead of running the pipeline again.
+
+        With a chat `history`, a follow-up question ("¿y eso cómo se evaluó?") is retrieved together
+        with the previous user question, and the last turns of the conversation go into the prompt.
+        With a `session_id` the history is kept by the service, and a follow-up whose terms are in the
+        contexts of the previous turn is answered with them, skipping embedding and search.
+
         Steps:
             1. Embed the input question.
-            2. Retrieve the top-k most relevant contexts from the vector store.
-            3. Build a prompt with the retrieved contexts and the question.
-            4. Generate an answer using the language model.
+            2. Retrieve the top-k most relevant contexts from the vector store (over-fetched and
+               reranked when there is a reranker).
+            3. Return a cached answer if a similar question retrieved the same contexts.
+            4. Build a prompt with the retrieved contexts and the question.
+            5. Generate an answer using the language model.
 
         Args:
             question (str): The input question to be answered.
             k (int, optional): Number of contexts to retrieve. Defaults to 4.
+            source (str, optional): Only retrieve chunks of this document (its "source" metadata).
+            history (List[Message], optional): Previous messages of the chat, oldest first, each with
+                "role" ("user" or "assistant") and "content". Ignored if the session already has turns.
+            session_id (str, optional): Chat session of the question. It is created if it does not exist
+                (or expired). Needs a session store.
 
         Returns:
             Dict[str, Any]: A dictionary containing:
                 - "answer" (str): Generated answer from the LLM.
-                - "contexts" (List[Dict[str, Any]]): Retrieved contexts with text, metadata, and distance.
+                - "contexts" (List[Dict[str, Any]]): Retrieved contexts with text, metadata, and distance
+                  (plus the fused "score" in hybrid mode).
+                - "cached" (bool): Whether the answer comes from the answer cache.
+                - "reused" (bool): Whether the contexts of the previous turn of the session were reused.
+                - "session_id" (str): The session, only if one was given.
+                - "timings" (Dict[str, float]): Milliseconds spent in every stage (embed, search, lexical,
+                  cache, prompt, generate) and in total.
         """
-        q_emb = self.emb.embed([question])[0]
-        res = self.vs.query(q_emb, k=k)
+        return self.inflight.do(self._flight_key(question, k, source, history, session_id),
+                                lambda: self._query(question, k, source, history, session_id))
 
-        contexts = []
-        for txt, meta, dist in zip(res["documents"], res["metadatas"], res["distances"]):
-            contexts.append({"text": txt, "metadata": meta, "distance": float(dist)})
-        prompt = self._build_prompt(question, [c["text"] for c in contexts])
-        
-        answer = self.llm.generate(prompt)
-        return {"answer": answer, "contexts": contexts}
\ No newline at end of file
+    def _query(self, question: str, k: int, source: Optional[str] = None,
+               history: Optional[List[Message]] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
+        trace = Trace("rag.query")
+        session, history = self._session(session_id, history)
+        with trace.operation():
+            q_emb, context_ids, contexts = self._contexts(question, k, source, history, session, trace)
+            out = self._answer(question, q_emb, context_ids, contexts, trace, history)
+            out["reused"] = q_emb is None
+            self._finish_turn(question, k, source, session, context_ids, out)
+        QUERY_SECONDS.observe(out["timings"]["total"] / 1000, kind="query")
+        return out
+
+    def _answer(self, question: str, q_emb: Optional[List[float]], context_ids: List[str],
+                contexts: List[Dict[str, Any]], trace: Trace, history: Optional[List[Message]] = None) -> Dict[str, Any]:
+        """Answer a question from already retrieved contexts, going through the answer cache."""
+        hit = self._cached(q_emb, context_ids, trace, history)
+        if hit is not None:
+            return {"answer": hit.answer, "contexts": contexts, "cached": True, "timings": trace.finish()}
+
+        prompt = self._prompt(question, contexts, trace, history)
+
+        with trace.span("generate"):
+            answer = self.llm.generate(prompt)
+        self._store(question, q_emb, context_ids, answer, history)
+        return {"answer": answer, "contexts": contexts, "cached": False, "timings": trace.finish()}
+
+    async def aquery(self, question: str, k: int = 4, source: Optional[str] = None,
+                     history: Optional[List[Message]] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of `query`: embedding, search and generation are awaited, and
+        generation waits for a free slot of the shared LLM semaphore. Identical in-flight
+        questions are coalesced as in `query`.
+
+        Args:
+            question (str): The input question to be answered.
+            k (int, optional): Number of contexts to retrieve. Defaults to 4.
+            source (str, optional): Only retrieve chunks of this document.
+            history (List[Message], optional): Previous messages of the chat, oldest first.
+            session_id (str, optional): Chat session of the question.
+
+        Returns:
+            Dict[str, Any]: Same structure as `query`.
+        """
+        return await self.inflight.ado(self._flight_key(question, k, source, history, session_id),
+                                       lambda: self._aquery(question, k, source, history, session_id))
+
+    async def _aquery(self, question: str, k: int, source: Optional[str] = None,
+                      history: Optional[List[Message]] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
+        trace = Trace("rag.query")
+        session, history = self._session(session_id, history)
+        with trace.operation():
+            q_emb, context_ids, contexts = await self._acontexts(question, k, source, history, session, trace)
+
+            hit = self._cached(q_emb, context_ids, trace, history)
+            if hit is not None:
+                out = {"answer": hit.answer, "contexts": contexts, "cached": True, "timings": trace.finish()}
+            else:
+                prompt = self._prompt(question, contexts, trace, history)
+
+                # "queue" is the wait for a free LLM slot, "generate" the call itself.
+                with trace.span("queue"):
+                    await self._llm_slots.acquire()
+                try:
+                    with trace.span("generate"):
+                        answer = await self.llm.agenerate(prompt)
+                finally:
+                    self._llm_slots.release()
+                self._store(question, q_emb, context_ids, answer, history)
+                out = {"answer": answer, "contexts": contexts, "cached": False, "timings": trace.finish()}
+            out["reused"] = q_emb is None
+            self._finish_turn(question, k, source, session, context_ids, out)
+        QUERY_SECONDS.observe(out["timings"]["total"] / 1000, kind="query")
+        return out
+
+    def query_batch(self, questions: List[str], k: int = 4, max_concurrency: int = 4,
+                    source: Optional[str] = None, retrieval_batch: int = 32) -> Iterator[Dict[str, Any]]:
+        """Answer many questions at once, yielding each result as soon as it is ready.
+
+        Questions are retrieved in groups of `retrieval_batch`: every group is embedded with
+        a single batched call and searched with one batched vector-store request (BM25
+        searches run in parallel in hybrid mode). Generations run on up to
+        `max_concurrency` threads while the next group is retrieved. Closing the generator
+        (e.g. the client disconnected) cancels the generations not yet started.
+
+        Args:
+            questions (List[str]): Questions to answer.
+            k (int, optional): Number of contexts to retrieve per question. Defaults to 4.
+            max_concurrency (int, optional): Maximum number of generations in flight. Defaults to 4.
+            source (str, optional): Only retrieve chunks of this document.
+            retrieval_batch (int, optional): Questions embedded and searched per request. Defaults to 32.
+
+        Yields:
+            Iterator[Dict[str, Any]]: For every question, in completion order, the result of `query` plus
+                "index" (position in `questions`) and "question"; or "index", "question" and "error" if it
+                failed, including when the retrieval of its group failed.
+                The "timings" of a result only cover its own stages; the batched embedding and search are
+                shared by every question of a group and recorded once in the metrics.
+        """
+        if not questions:
+            return
+        n = self._candidates(k)
+        fetch = n if self.lexical is None else max(n, k * self.hybrid_fetch)
+
+        def answer(question: str, q_emb: List[float], res: Dict[str, Any], sparse: Optional[Future]) -> Dict[str, Any]:
+            trace = Trace("rag.batch")
+            if sparse is not None:
+                res = self._fuse(res, sparse.result(), n)
+            context_ids, contexts = self._rerank(question, *self._to_contexts(res), k, trace)
+            return self._answer(question, q_emb, context_ids, contexts, trace)
+
+        def drain(futures: Dict[Future, int]) -> Iterator[Dict[str, Any]]:
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    yield {"index": i, "question": questions[i], **future.result()}
+                except Exception as e:
+                    yield {"index": i, "question": questions[i], "error": str(e)}
+
+        pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="rag-batch")
+        sparse: List[Future] = []
+        try:
+            previous: Dict[Future, int] = {}
+            for offset in range(0, len(questions), retrieval_batch):
+                group = questions[offset:offset + retrieval_batch]
+                batch = Trace("rag.batch")
+                sparse = []
+                try:
+                    with batch.span("embed"):
+                        embeddings = self.emb.embed(group)
+                    sparse = ([self._lexical_pool.submit(self._lexical_search, q, fetch, source, batch) for q in group]
+                              if self.lexical else [])
+                    with batch.span("search"):
+                        dense = self.vs.query_batch(embeddings, k=fetch, source=source)
+                except Exception as e:
+                    for future in sparse:
+                        future.cancel()
+                    yield from ({"index": offset + j, "question": q, "error": str(e)} for j, q in enumerate(group))
+                    continue
+                finally:
+                    batch.finish()
+
+                futures = {pool.submit(answer, question, q_emb, res, sparse[j] if sparse else None): offset + j
+                           for j, (question, q_emb, res) in enumerate(zip(group, embeddings, dense))}
+                # The previous group generates while this one was retrieved; wait for it before retrieving the next.
+                yield from drain(previous)
+                previous = futures
+            yield from drain(previous)
+        finally:
+            for future in sparse:
+                future.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def query_stream(self, question: str, k: int = 4, source: Optional[str] = None,
+                     history: Optional[List[Message]] = None, session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Streaming variant of `query`: the answer is yielded fragment by fragment.
+
+        Events, in order:
+            - {"type": "contexts", "contexts": [...], "cached": bool, "reused": bool}: retrieved contexts, plus
+              "session_id" with a session.
+            - {"type": "token", "text": str}: a fragment of the answer (one or more).
+            - {"type": "done", "timings": {...}}: the answer is complete; milliseconds spent in every stage,
+              with "first_token" the time from the start of the query to the first fragment.
+
+        Args:
+            question (str): The input question to be answered.
+            k (int, optional): Number of contexts to retrieve. Defaults to 4.
+            source (str, optional): Only retrieve chunks of this document.
+            history (List[Message], optional): Previous messages of the chat, oldest first.
+            session_id (str, optional): Chat session of the question. The turn is recorded once the
+                answer is complete.
+
+        Yields:
+            Iterator[Dict[str, Any]]: Stream events.
+        """
+        trace = Trace("rag.stream")
+        session, history = self._session(session_id, history)
+        q_emb, context_ids, contexts = self._contexts(question, k, source, history, session, trace)
+
+        hit = self._cached(q_emb, context_ids, trace, history)
+        event = {"type": "contexts", "contexts": contexts, "cached": hit is not None, "reused": q_emb is None}
+        if session is not None:
+            event["session_id"] = session.session_id
+        yield event
+        if hit is not None:
+            yield {"type": "token", "text": hit.answer}
+            self._finish_turn(question, k, source, session, context_ids, {"answer": hit.answer, "contexts": contexts})
+            yield {"type": "done", "timings": trace.finish()}
+            return
+
+        prompt = self._prompt(question, contexts, trace, history)
+        parts = []
+        # Only the time spent producing fragments counts as "generate", not the time the client takes to read them.
+        stream = self.llm.generate_stream(prompt)
+        while True:
+            with trace.span("generate"):
+                text = next(stream, None)
+            if text is None:
+                break
+            if not parts:
+                trace.record("first_token", time.perf_counter() - trace.started)
+            parts.append(text)
+            yield {"type": "token", "text": text}
+
+        answer = "".join(parts)
+        self._store(question, q_emb, context_ids, answer, history)
+        self._finish_turn(question, k, source, session, context_ids, {"answer": answer, "contexts": contexts})
+        timings = trace.finish()
+        QUERY_SECONDS.observe(timings["total"] / 1000, kind="stream")
+        yield {"type": "done", "timings": timings}
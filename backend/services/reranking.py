@@ -0,0 +1,138 @@
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from core.reranker import Reranker
+from services.metrics import Trace, RERANK_REQUESTS
+
+class RerankStage:
+    def __init__(self, reranker: Reranker, batch_size: int = 16, budget_ms: float = 300,
+                 cache_size: int = 20000, workers: int = 4):
+        """Reorders retrieved candidates with a reranker, under a latency budget.
+
+        Scores are cached per (question, chunk ID), so a repeated or re-asked question only
+        scores the candidates it has not seen. Uncached candidates are scored in batches of
+        `batch_size` on a pool of `workers` threads; if the budget runs out before all of them
+        are scored, even in the middle of a batch, the candidates keep their retrieval order.
+        A late batch still finishes in the background and its scores are cached, so the next
+        attempt gets further.
+
+        Args:
+            reranker (Reranker): Scoring model.
+            batch_size (int, optional): Candidates per `Reranker.score` call. Defaults to 16.
+            budget_ms (float, optional): Maximum milliseconds spent scoring one question; 0 disables it.
+                Defaults to 300.
+            cache_size (int, optional): Maximum number of cached scores. Defaults to 20000.
+            workers (int, optional): Threads scoring batches, including late ones still running. Defaults to 4.
+        """
+        self.reranker = reranker
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self._scores: "OrderedDict[Tuple[str, str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rerank")
+
+    def _question_hash(self, question: str) -> str:
+        normalized = re.sub(r"\s+", " ", question).strip().lower()
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+    def _cached(self, keys: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], float]:
+        with self._lock:
+            found = {}
+            for key in keys:
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    found[key] = self._scores[key]
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            return found
+
+    def _put(self, scores: Dict[Tuple[str, str, str], float]) -> None:
+        with self._lock:
+            self._scores.update(scores)
+            while len(self._scores) > self.cache_size:
+                self._scores.popitem(last=False)
+
+    def _put_scored(self, keys: List[Tuple[str, str, str]], future: Future) -> None:
+        """Cache the scores of a finished batch, also when its question already fell back."""
+        if not future.cancelled() and future.exception() is None:
+            self._put(dict(zip(keys, future.result())))
+
+    def rerank(self, question: str, ids: List[str], contexts: List[Dict[str, Any]], k: int,
+               trace: Optional[Trace] = None) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Keep the `k` best candidates for a question.
+
+        Args:
+            question (str): The question the candidates were retrieved for.
+            ids (List[str]): Chunk IDs of the candidates, in retrieval order.
+            contexts (List[Dict[str, Any]]): The candidates, with "text".
+            k (int): Number of candidates to keep.
+            trace (Trace, optional): Receives the "rerank" timing.
+
+        Returns:
+            Tuple[List[str], List[Dict[str, Any]]]: IDs and contexts of the `k` best candidates. Every
+                context gets its "rerank_score", unless the budget ran out and retrieval order was kept.
+        """
+        if len(ids) <= 1:
+            return ids[:k], contexts[:k]
+        start = time.perf_counter()
+        q_hash = self._question_hash(question)
+        keys = [(self.reranker.model_name, q_hash, chunk_id) for chunk_id in ids]
+        scores = self._cached(keys)
+        missing = [i for i, key in enumerate(keys) if key not in scores]
+
+        complete = True
+        for b in range(0, len(missing), self.batch_size):
+            remaining = self.budget_ms / 1000 - (time.perf_counter() - start) if self.budget_ms else None
+            if remaining is not None and remaining <= 0:
+                complete = False
+                break
+            batch = missing[b:b + self.batch_size]
+            batch_keys = [keys[i] for i in batch]
+            future = self._pool.submit(self.reranker.score, question, [contexts[i]["text"] for i in batch])
+            future.add_done_callback(lambda f, batch_keys=batch_keys: self._put_scored(batch_keys, f))
+            try:
+                scores.update(zip(batch_keys, future.result(timeout=remaining)))
+            except TimeoutError:
+                complete = False
+                break
+        if trace is not None:
+            trace.record("rerank", time.perf_counter() - start)
+
+        if not complete:
+            with self._lock:
+                self.fallbacks += 1
+            RERANK_REQUESTS.inc(result="fallback")
+            return ids[:k], contexts[:k]
+        RERANK_REQUESTS.inc(result="reranked")
+        # Stable sort: equal scores keep retrieval order.
+        order = sorted(range(len(ids)), key=lambda i: scores[keys[i]], reverse=True)[:k]
+        return [ids[i] for i in order], [{**contexts[i], "rerank_score": scores[keys[i]]} for i in order]
+
+    def clear(self) -> None:
+        """Drop every cached score, e.g. after the collection was re-indexed."""
+        with self._lock:
+            self._scores.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters of the score cache and of the budget.
+
+        Returns:
+            Dict[str, Any]: score cache hits, misses, hit rate and entries, and budget fallbacks.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else None,
+                "entries": len(self._scores),
+                "fallbacks": self.fallbacks,
+            }
@@ -0,0 +1,120 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from services.conversation import Message
+
+@dataclass
+class ChatSession:
+    """State of one conversation: its recent turns and the contexts of its last retrieval."""
+    session_id: str
+    turns: List[Message] = field(default_factory=list)
+    context_ids: List[str] = field(default_factory=list)
+    contexts: List[Dict[str, Any]] = field(default_factory=list)
+    # Filter and number of contexts of the last retrieval; contexts are only reused for the same ones.
+    source: Optional[str] = None
+    k: int = 0
+    updated_at: float = 0.0
+
+class SessionStore:
+    def __init__(self, ttl_seconds: float = 1800, max_sessions: int = 1000, max_messages: int = 12):
+        """In-memory store of chat sessions.
+
+        Sessions expire `ttl_seconds` after their last turn and the least recently used
+        ones are evicted when there are more than `max_sessions`. Only the last
+        `max_messages` messages of every session are kept.
+
+        Args:
+            ttl_seconds (float, optional): Idle lifetime of a session in seconds. Defaults to 1800.
+            max_sessions (int, optional): Maximum number of sessions. Defaults to 1000.
+            max_messages (int, optional): Messages kept per session. Defaults to 12.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        expired = [sid for sid, s in self._sessions.items() if now - s.updated_at > self.ttl_seconds]
+        for sid in expired:
+            del self._sessions[sid]
+        self.expired += len(expired)
+
+    def get(self, session_id: Optional[str] = None) -> ChatSession:
+        """A snapshot of a session, created empty if it does not exist or expired.
+
+        Args:
+            session_id (str, optional): Session to look up. A new ID is generated if None.
+
+        Returns:
+            ChatSession: A copy of the session; changes go through `record`.
+        """
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = ChatSession(session_id or uuid.uuid4().hex, updated_at=now)
+                self._sessions[session.session_id] = session
+                self.created += 1
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            self._sessions.move_to_end(session.session_id)
+            return ChatSession(session.session_id, list(session.turns), list(session.context_ids),
+                               list(session.contexts), session.source, session.k, session.updated_at)
+
+    def record(self, session_id: str, question: str, answer: str, context_ids: List[str],
+               contexts: List[Dict[str, Any]], source: Optional[str], k: int) -> None:
+        """Append a turn to a session and remember the contexts it was answered with.
+
+        Args:
+            session_id (str): The session.
+            question (str): The user question.
+            answer (str): The generated answer.
+            context_ids (List[str]): IDs of the contexts used for the answer.
+            contexts (List[Dict[str, Any]]): The contexts used for the answer.
+            source (str): Document filter the contexts were retrieved with.
+            k (int): Number of contexts requested.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                # Expired or evicted while the answer was being generated.
+                session = self._sessions[session_id] = ChatSession(session_id)
+            session.turns.extend([{"role": "user", "content": question}, {"role": "assistant", "content": answer}])
+            del session.turns[:-self.max_messages]
+            session.context_ids, session.contexts = list(context_ids), list(contexts)
+            session.source, session.k = source, k
+            session.updated_at = time.time()
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+
+    def delete(self, session_id: str) -> bool:
+        """Forget a session. Returns whether it existed."""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def clear_contexts(self) -> None:
+        """Drop the remembered contexts of every session, e.g. after the collection was re-indexed."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.context_ids, session.contexts = [], []
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters of the store.
+
+        Returns:
+            Dict[str, Any]: live sessions and sessions created, expired and evicted so far.
+        """
+        with self._lock:
+            return {"sessions": len(self._sessions), "created": self.created,
+                    "expired": self.expired, "evicted": self.evicted}
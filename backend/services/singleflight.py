@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    def __init__(self):
+        """Deduplicates concurrent calls that share a key.
+
+        The first caller for a key runs the computation; callers arriving while it is in
+        flight wait for it and receive the same result (or the same exception). Nothing
+        is cached once the computation finishes. Thread-based callers (`do`) and asyncio
+        callers (`ado`) are tracked separately.
+        """
+        self.calls = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._futures: Dict[Hashable, Future] = {}
+        self._tasks: Dict[Hashable, "asyncio.Future"] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run `fn`, or wait for the in-flight call with the same key.
+
+        Args:
+            key (Hashable): Identity of the computation.
+            fn (Callable[[], Any]): Computation to run.
+
+        Returns:
+            Any: The result of `fn`.
+        """
+        with self._lock:
+            self.calls += 1
+            future = self._futures.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._futures[key] = future
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._futures[key]
+        return future.result()
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of `do`.
+
+        Args:
+            key (Hashable): Identity of the computation.
+            fn (Callable[[], Awaitable[Any]]): Coroutine function to run.
+
+        Returns:
+            Any: The result of `fn`.
+        """
+        # Keyed by loop too: a task can only be awaited from the loop that runs it.
+        key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            self.calls += 1
+            task = self._tasks.get(key)
+            if task is None:
+                task = asyncio.ensure_future(fn())
+                self._tasks[key] = task
+                task.add_done_callback(lambda _, key=key: self._forget(key))
+            else:
+                self.coalesced += 1
+        # Shielded so a cancelled waiter does not cancel the computation the others share.
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._tasks.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters of the deduplication.
+
+        Returns:
+            Dict[str, int]: total calls and how many of them were coalesced into another one.
+        """
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced}
@@ -1,17 +1,131 @@
 import os
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-URL = f"{os.getenv('RAG_URL')}/query"
+RAG_URL = os.getenv("RAG_URL")
+URL = f"{RAG_URL}/query"
+STREAM_URL = f"{RAG_URL}/query/stream"
+BATCH_URL = f"{RAG_URL}/query/batch"
 
-def get_llm_response(question: str) -> str:
-    payload = {
-        "question": question
-    }
-    try:
-        response = requests.post(URL, json=payload)
+CONNECT_TIMEOUT = float(os.getenv("RAG_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("RAG_READ_TIMEOUT", "60"))
+MAX_RETRIES = int(os.getenv("RAG_MAX_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("RAG_BACKOFF_FACTOR", "0.5"))
+POOL_SIZE = int(os.getenv("RAG_POOL_SIZE", "10"))
+# Messages of the chat history sent with every question.
+HISTORY_MESSAGES = int(os.getenv("RAG_HISTORY_MESSAGES", "6"))
+
+Message = Dict[str, str]
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """HTTP session shared by every Streamlit session and rerun.
+
+    Its connection pool keeps connections to the backend alive, so a question does
+    not pay a TCP handshake. Connection errors and 429/502/503/504 responses are
+    retried up to `RAG_MAX_RETRIES` times with exponential backoff plus jitter,
+    honoring `Retry-After`; a streamed answer is never retried once it has started.
+
+    Returns:
+        requests.Session: the pooled session
+    """
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_FACTOR,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _timeout() -> Tuple[float, float]:
+    """Connect and read timeouts. The read timeout bounds the wait between two bytes, not the whole answer."""
+    return CONNECT_TIMEOUT, READ_TIMEOUT
+
+def _payload(question: str, history: Optional[List[Message]], session_id: Optional[str]) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"question": question}
+    if session_id:
+        payload["session_id"] = session_id
+    if history and HISTORY_MESSAGES > 0:
+        payload["history"] = [{"role": m["role"], "content": m["content"]} for m in history[-HISTORY_MESSAGES:]
+                              if m.get("content")]
+    return payload
+
+def get_llm_response(question: str, history: Optional[List[Message]] = None, session_id: Optional[str] = None) -> str:
+    """Answer a question with the backend's `/query` endpoint.
+
+    Args:
+        question (str): the question
+        history (List[Message], optional): previous messages of the chat, oldest first; the backend
+            only uses them if it no longer holds the session
+        session_id (str, optional): chat session kept by the backend
+
+    Raises:
+        requests.exceptions.RequestException: if the backend cannot be reached or answers with an error
+
+    Returns:
+        str: the answer
+    """
+    response = get_session().post(URL, json=_payload(question, history, session_id), timeout=_timeout())
+    response.raise_for_status()
+    return response.json()["answer"]
+
+def stream_llm_response(question: str, history: Optional[List[Message]] = None,
+                        session_id: Optional[str] = None) -> Iterator[str]:
+    """Stream the answer to a question from the backend's `/query/stream` endpoint.
+
+    Args:
+        question (str): the question
+        history (List[Message], optional): previous messages of the chat, oldest first; the backend
+            only uses them if it no longer holds the session
+        session_id (str, optional): chat session kept by the backend
+
+    Raises:
+        requests.exceptions.RequestException: if the backend cannot be reached or answers with an error
+        RuntimeError: if the backend reports an error while generating the answer
+
+    Yields:
+        Iterator[str]: fragments of the answer, in order
+    """
+    with get_session().post(STREAM_URL, json=_payload(question, history, session_id), stream=True, timeout=_timeout()) as response:
         response.raise_for_status()
-        data = response.json()
-        return data["answer"]
-    except requests.exceptions.RequestException as e:
-        pass
+        # Server-Sent Events: only the `data:` lines of `token` events carry answer text.
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            event = json.loads(line[len("data:"):])
+            if event["type"] == "token":
+                yield event["text"]
+            elif event["type"] == "error":
+                raise RuntimeError(event.get("detail", "error del servicio RAG"))
 
+def get_batch_responses(questions: List[str], k: int = 4) -> Iterator[Dict[str, Any]]:
+    """Answer several questions with the backend's `/query/batch` endpoint.
+
+    Args:
+        questions (List[str]): the questions
+        k (int, optional): contexts retrieved per question. Defaults to 4.
+
+    Raises:
+        requests.exceptions.RequestException: if the backend cannot be reached or answers with an error
+
+    Yields:
+        Iterator[Dict[str, Any]]: one result per question as soon as it is ready, with "index" (its
+            position in `questions`), "question" and "answer", or "error" if that question failed
+    """
+    payload = {"questions": questions, "k": k}
+    with get_session().post(BATCH_URL, json=payload, stream=True, timeout=_timeout()) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                yield json.loads(line)
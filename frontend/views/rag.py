@@ -1,14 +1,20 @@
+import uuid
+import requests
 import streamlit as st
-from services.llm_service import get_llm_response
+from services.llm_service import stream_llm_response
 
 st.title("💬 Chat with AI (RAG)")
 
 # Initialise the message history in the session status if it does not exist
 if "messages" not in st.session_state:
     st.session_state.messages = []
+# The backend keeps the conversation under this ID and reuses its contexts for follow-ups
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 # Display messages from the history every time the app is reloaded
-with st.container(height=490):
+history = st.container(height=490)
+with history:
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
@@ -16,14 +22,24 @@ with st.container(height=490):
 with st.container():
     # Capture user input
     if prompt := st.chat_input("¿En qué puedo ayudarte?"):
+        # Previous turns go with the question, so the backend can resolve follow-ups
+        previous = list(st.session_state.messages)
         # Add the user's message to the history and display it in the UI
         st.session_state.messages.append({"role": "user", "content": prompt})
         
-        with st.spinner("Responding... 🤔"):
-            # Assistant's response
-            assistant_response = get_llm_response(prompt)
+        with history:
+            with st.chat_message("user"):
+                st.markdown(prompt)
+            # Assistant's response, rendered token by token as it arrives
+            with st.chat_message("assistant"):
+                try:
+                    assistant_response = st.write_stream(stream_llm_response(prompt, previous, st.session_state.session_id))
+                except (requests.exceptions.RequestException, RuntimeError) as e:
+                    assistant_response = None
+                    st.error(f"No se pudo obtener una respuesta del servicio RAG: {e}")
             
-            # Add the assistant's response to the history and display it in the UI
+        # Add the assistant's response to the history and display it in the UI.
+        # On error the message stays visible until the next question.
+        if assistant_response:
             st.session_state.messages.append({"role": "assistant", "content": assistant_response})
-        
-        st.rerun()
\ No newline at end of file
+            st.rerun()
\ No newline at end of file